@@ -0,0 +1,151 @@
+"""
+`basics/2. (De)Serialization.py` 에서는 Person 모델을 한 번에 하나씩 생성했다.
+- Person(**data), Person.model_validate(data), Person.model_validate_json(json_data)
+- 레코드가 수백만 건이 되면, 행(row)마다 발생하는 Python 함수 호출 비용과 에러 조립 비용이 누적된다.
+
+TypeAdapter를 사용하면, 리스트(혹은 JSON 배열) 전체를 pydantic-core 안에서 한 번에 검증할 수 있다.
+- 행 단위 반복문이 Python이 아닌 Rust 쪽에서 돌기 때문에, 호출 오버헤드가 배치 당 한 번으로 줄어든다.
+- 단, list[Person] 검증은 하나라도 실패하면 ValidationError를 발생시키고 성공한 인스턴스를 돌려주지 않는다.
+  - 그래서 각 행을 `Person | Any` (left_to_right) 로 검증한다. Person 검증에 실패한 행은 입력 그대로 남는다.
+  - 한 번의 일괄 검증 후 Person 인스턴스가 아닌 행만 골라, 그 행들만 다시 검증하여 에러를 수집한다.
+- 에러 리포트는 index 별로 loc, type, msg만 남긴다.(input, url, ctx는 제외하여 리포트를 작게 유지한다.)
+
+JSON 배열의 경우, 실패한 행을 다시 JSON으로 만들어 model_validate_json()으로 에러를 수집한다.
+- Python 객체 그대로 model_validate()를 호출하면, JSON 모드와 Python 모드의 검증 규칙 차이(strict 모드 등)가 생길 수 있기 때문이다.
+"""
+from timeit import timeit
+from typing import Any, Callable, Generic, NamedTuple, TypeVar
+
+from pydantic import BaseModel, ValidationError
+from pydantic_core import to_json
+
+from _playground import lenient_list_adapter
+
+ModelT = TypeVar('ModelT', bound=BaseModel)
+
+
+class BatchResult(NamedTuple, Generic[ModelT]):
+    valid: list[ModelT]  # 검증에 성공한 인스턴스 (입력 순서 유지)
+    valid_indices: list[int]  # valid 각 인스턴스의 입력 index
+    errors: dict[int, list[dict[str, Any]]]  # 입력 index -> [{'loc', 'type', 'msg'}, ...]
+
+
+class BatchValidator(Generic[ModelT]):
+    """
+    list[dict] 혹은 JSON 배열을 한 번에 검증한다.
+    - TypeAdapter 생성(=검증기 컴파일)은 비용이 크므로, 모델 당 한 번만 만들어 재사용한다.
+    """
+
+    def __init__(self, model: type[ModelT]):
+        self.model = model
+        self._adapter = lenient_list_adapter(model)
+
+    def validate_python(self, rows: list[Any]) -> BatchResult[ModelT]:
+        return self._collect(self._adapter.validate_python(rows), self.model.model_validate)
+
+    def validate_json(self, json_data: str | bytes) -> BatchResult[ModelT]:
+        outputs = self._adapter.validate_json(json_data)
+        return self._collect(outputs, lambda row: self.model.model_validate_json(to_json(row)))
+
+    def _collect(self, outputs: list[Any], revalidate: Callable[[Any], ModelT]) -> BatchResult[ModelT]:
+        valid, valid_indices, errors = [], [], {}
+        for index, output in enumerate(outputs):
+            if isinstance(output, self.model):
+                valid.append(output)
+                valid_indices.append(index)
+                continue
+            try:
+                instance = revalidate(output)
+            except ValidationError as ex:
+                errors[index] = [
+                    {'loc': error['loc'], 'type': error['type'], 'msg': error['msg']}
+                    for error in ex.errors(include_url=False, include_context=False, include_input=False)
+                ]
+            else:
+                # union 검증에서는 실패했지만 다시 검증하면 성공하는 행(예: 모델 검증기가 입력 상태에 의존하는 경우)도 버리지 않는다.
+                valid.append(instance)
+                valid_indices.append(index)
+        return BatchResult(valid, valid_indices, errors)
+
+
+class Person(BaseModel):
+    first_name: str
+    last_name: str
+    age: int
+
+
+person_batch = BatchValidator(Person)
+
+rows = [
+    {'first_name': 'Seongyeon', 'last_name': 'Kim', 'age': 29},
+    {'first_name': 'Isaac', 'age': 'unknown'},
+    {'first_name': 'Albert', 'last_name': 'Einstein', 'age': '76'},
+]
+result = person_batch.validate_python(rows)
+print(result.valid)
+# 출력: [Person(first_name='Seongyeon', last_name='Kim', age=29), Person(first_name='Albert', last_name='Einstein', age=76)]
+print(result.valid_indices)  # 출력: [0, 2]
+print(result.errors)
+# 출력: {1: [{'loc': ('last_name',), 'type': 'missing', 'msg': 'Field required'},
+#            {'loc': ('age',), 'type': 'int_parsing', 'msg': 'Input should be a valid integer, unable to parse string as an integer'}]}
+
+print()
+print("--------------------")
+
+json_rows = '''
+[
+    {"first_name": "Seongyeon", "last_name": "Kim", "age": 29},
+    "not an object",
+    {"first_name": "Albert", "last_name": "Einstein", "age": 76}
+]
+'''
+result = person_batch.validate_json(json_rows)
+print(result.valid_indices)  # 출력: [0, 2]
+print(result.errors)  # 출력: {1: [{'loc': (), 'type': 'model_type', 'msg': 'Input should be an object'}]}
+
+try:
+    person_batch.validate_json('{"first_name": "Seongyeon"}')
+except ValidationError as ex:
+    print(ex)
+    """
+    1 validation error for list[union[Person,any]]
+      Input should be a valid array [type=list_type, input_value={'first_name': 'Seongyeon'}, input_type=dict]
+        For further information visit https://errors.pydantic.dev/2.7/v/list_type
+    """
+
+print()
+print("--------------------")
+
+# 벤치마크: `basics/2. (De)Serialization.py` 의 행 단위 방식 vs 일괄 검증
+# - 깨끗한 배치(clean)와 1% 행에 오류가 섞인 배치(dirty)를 비교한다.
+ROWS = 10_000
+NUMBER = 20
+
+clean_rows = [{'first_name': f'first-{i}', 'last_name': f'last-{i}', 'age': i % 100} for i in range(ROWS)]
+dirty_rows = [row if i % 100 else {'first_name': row['first_name']} for i, row in enumerate(clean_rows)]
+clean_json = to_json(clean_rows)
+json_lines = [to_json(row) for row in clean_rows]
+
+
+def validate_per_row(rows: list[dict]) -> tuple[list[Person], dict[int, list[dict]]]:
+    valid, errors = [], {}
+    for i, row in enumerate(rows):
+        try:
+            valid.append(Person.model_validate(row))
+        except ValidationError as ex:
+            errors[i] = ex.errors(include_url=False)
+    return valid, errors
+
+
+benchmarks = {
+    'per-row model_validate (clean)': lambda: validate_per_row(clean_rows),
+    'batch validate_python (clean)': lambda: person_batch.validate_python(clean_rows),
+    'per-row model_validate (dirty)': lambda: validate_per_row(dirty_rows),
+    'batch validate_python (dirty)': lambda: person_batch.validate_python(dirty_rows),
+    'per-row model_validate_json': lambda: [Person.model_validate_json(line) for line in json_lines],
+    'batch validate_json': lambda: person_batch.validate_json(clean_json),
+}
+print(f"{ROWS:,} rows x {NUMBER} runs")
+for name, func in benchmarks.items():
+    seconds = timeit(func, number=NUMBER) / NUMBER
+    print(f"{name:<32} {seconds * 1000:8.2f} ms/batch {ROWS / seconds:>12,.0f} rows/s")
@@ -0,0 +1,156 @@
+"""
+`model configuration/5. Mutablity.py` 에서는 frozen 모델을 dictionary의 key로 사용했다.(`d = {m1: "model"}`)
+- frozen 모델의 hash()는 호출될 때마다 모든 필드 값으로 hash를 다시 계산한다.
+- `==` 역시 매번 `__dict__` 전체를 비교하므로, 같은 인스턴스를 여러 번 hash/비교하는 중복 제거(dedup) 단계에서 비용이 반복된다.
+
+CachedHashModel은 frozen 모델의 hash를 처음 요청될 때 한 번만 계산하여 slot(`_hash_cache`)에 저장한다.
+- frozen 모델은 필드 값을 수정할 수 없으므로, 캐시된 hash가 바뀔 일이 없다.
+  - 캐시는 `__dict__`가 아닌 slot에 저장하므로, model_dump()/`==`/pickle/model_copy()의 결과에 영향을 주지 않는다.
+- `==`는 먼저 동일한 객체인지 확인하고, 양쪽 모두 hash가 캐시되어 있는데 값이 다르면 필드를 비교하지 않고 False를 반환한다.
+  - 같은 타입이면 `__dict__`, extra, private 값을 직접 비교하고, 그 외의 경우는 BaseModel의 비교를 그대로 사용한다.
+
+InternTable은 같은 값을 가지는 frozen 인스턴스들이 하나의 대표(canonical) 인스턴스를 공유하도록 한다.(선택 사항)
+- 대표 인스턴스끼리의 비교는 동일 객체 확인에서 바로 끝나고, 중복된 인스턴스가 차지하던 메모리도 회수된다.
+- 테이블은 약한 참조(WeakValueDictionary)로 인스턴스를 가지고 있으므로, 어디에서도 사용하지 않는 인스턴스는 테이블에서도 사라진다.
+
+* 주의사항: `model_config`에서 frozen=True를 해제한 하위 클래스에서는 hash를 캐시하면 안 되므로, 정의 시점에 TypeError가 발생한다.
+"""
+import weakref
+from timeit import timeit
+from typing import Any, Generic, TypeVar
+
+from pydantic import BaseModel, ConfigDict, ValidationError
+
+ModelT = TypeVar('ModelT', bound=BaseModel)
+
+
+class CachedHashModel(BaseModel):
+    __slots__ = ('_hash_cache', '__weakref__')
+    model_config = ConfigDict(frozen=True)
+
+    @classmethod
+    def __pydantic_init_subclass__(cls, **kwargs: Any) -> None:
+        super().__pydantic_init_subclass__(**kwargs)
+        if not cls.model_config.get('frozen'):
+            raise TypeError(f'{cls.__name__} must be frozen to cache its hash')
+
+    def __hash__(self) -> int:
+        try:
+            return self._hash_cache
+        except AttributeError:  # 처음 요청될 때만 계산한다.
+            value = hash((type(self), *(self.__dict__[name] for name in self.model_fields)))
+            object.__setattr__(self, '_hash_cache', value)
+            return value
+
+    def __eq__(self, other: Any) -> bool:
+        if self is other:
+            return True
+        if type(other) is type(self):
+            try:
+                if self._hash_cache != other._hash_cache:
+                    return False
+            except AttributeError:  # 한쪽이라도 hash가 아직 계산되지 않았다면 필드를 비교한다.
+                pass
+            if (
+                self.__dict__ == other.__dict__
+                and self.__pydantic_extra__ == other.__pydantic_extra__
+                and self.__pydantic_private__ == other.__pydantic_private__
+            ):
+                return True
+        # `__dict__`에 필드가 아닌 값(cached_property 등)이 있는 경우를 포함하여, 나머지는 BaseModel의 비교를 따른다.
+        return super().__eq__(other)
+
+
+class InternTable(Generic[ModelT]):
+    def __init__(self):
+        # key: (모델 클래스, 필드 값 tuple) -> 대표 인스턴스(약한 참조)
+        self._table: weakref.WeakValueDictionary[tuple, ModelT] = weakref.WeakValueDictionary()
+        self.hits = self.misses = 0
+
+    def intern(self, instance: ModelT) -> ModelT:
+        """instance와 같은 값을 가지는 대표 인스턴스를 반환한다. 처음 보는 값이라면 instance가 대표가 된다."""
+        key = (type(instance), *(instance.__dict__[name] for name in instance.model_fields))
+        canonical = self._table.get(key)
+        if canonical is not None and canonical == instance:
+            self.hits += 1
+            return canonical
+        self.misses += 1
+        self._table[key] = instance
+        return instance
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+
+class ImmutableModel(BaseModel):
+    a: int
+    b: int
+    model_config = ConfigDict(frozen=True)
+
+
+class CachedImmutableModel(CachedHashModel):
+    a: int
+    b: int
+
+
+m1 = CachedImmutableModel(a=1, b=2)
+try:
+    m1.a = 10
+except ValidationError as ex:
+    print(ex)
+    """
+    1 validation error for CachedImmutableModel
+    a
+      Instance is frozen [type=frozen_instance, input_value=10, input_type=int]
+        For further information visit https://errors.pydantic.dev/2.7/v/frozen_instance
+    """
+
+d = {m1: "model"}
+print(d)  # 출력: {CachedImmutableModel(a=1, b=2): 'model'}
+print(m1._hash_cache == hash(m1))  # 출력: True | 첫 hash() 호출에서 계산되어 저장되었다.
+print(m1.model_dump(), m1 == CachedImmutableModel(a=1, b=2))  # 출력: {'a': 1, 'b': 2} True
+print(m1 == CachedImmutableModel(a=1, b=3))  # 출력: False
+print(hash(m1.model_copy(update={'a': 10})) == hash(m1))  # 출력: False | 복사본은 hash를 새로 계산한다.
+
+try:
+    class MutableCachedModel(CachedHashModel):
+        model_config = ConfigDict(frozen=False)
+
+        a: int
+except TypeError as ex:
+    print(ex)  # 출력: MutableCachedModel must be frozen to cache its hash
+
+interned: InternTable[CachedImmutableModel] = InternTable()
+first = interned.intern(CachedImmutableModel(a=1, b=2))
+second = interned.intern(CachedImmutableModel.model_validate_json('{"a": 1, "b": 2}'))
+print(first is second, len(interned))  # 출력: True 1
+del first, second
+print(len(interned))  # 출력: 0 | 사용하지 않는 인스턴스는 테이블에서 사라진다.
+
+print()
+print("--------------------")
+
+# 벤치마크: 중복 제거 단계 - N개의 인스턴스(서로 다른 값은 UNIQUE개)를 set/dict에 넣고 조회한다.
+# - ImmutableModel: 기본 frozen 모델 / CachedImmutableModel: hash 캐시 / interned: hash 캐시 + InternTable
+N = 200_000
+UNIQUE = 2_000
+rows = [{'a': i % UNIQUE, 'b': i % UNIQUE % 7} for i in range(N)]
+
+plain = [ImmutableModel(**row) for row in rows]
+cached = [CachedImmutableModel(**row) for row in rows]
+table: InternTable[CachedImmutableModel] = InternTable()
+interned_instances = [table.intern(CachedImmutableModel(**row)) for row in rows]
+print(f"{N:,} instances, {len(set(plain)):,} distinct values, {len(table):,} interned")
+
+
+def dedup(instances: list) -> int:
+    counts: dict[Any, int] = {}
+    for instance in instances:
+        counts[instance] = counts.get(instance, 0) + 1
+    return len(set(instances) & counts.keys())
+
+
+NUMBER = 5
+for name, instances in (('ImmutableModel', plain), ('CachedImmutableModel', cached), ('interned', interned_instances)):
+    seconds = timeit(lambda: dedup(instances), number=NUMBER) / NUMBER
+    print(f"{name:<22} {seconds * 1000:8.2f} ms {N / seconds:>14,.0f} instances/s")
@@ -0,0 +1,351 @@
+"""
+`model configuration/4. ValidatingAssignments.py` 의 ModelWithValidateAssignment(validate_assignment=True)는 값을 수정할 때마다 검증한다.
+- 수정한 필드의 검증 자체는 해당 필드만 검증하지만, model_validator(mode='after')는 모든 수정마다 전부 다시 실행된다.
+- 필드가 많고 모델 수준 검증이 무거운 모델에서, 하나의 필드를 수정할 때마다 관계없는 검증까지 반복된다.
+
+IncrementalModel은 수정한 필드와, 그 필드에 의존한다고 선언한 model_validator만 다시 실행한다.
+- `@depends_on('start', 'end')`로 after 검증기가 어떤 필드에 의존하는지 선언한다.
+  - 의존 필드를 선언하지 않은 after 검증기는 기존과 같이 모든 수정마다 실행된다.
+- 필드 검증은 모델의 core schema 중 필드 부분(model-fields)의 validate_assignment()를 사용하므로, field_validator 등 필드 규칙은 그대로 적용된다.
+- update(**changes)는 여러 필드를 한 번에 수정한다.
+  - 모든 필드를 검증한 뒤 에러를 모아 하나의 ValidationError로 알려주며, 관련된 after 검증기는 한 번만 실행한다.
+  - 검증이 하나라도 실패하면 어떤 필드도 수정되지 않는다.(atomic)
+- 모델에 before/wrap model_validator가 있다면 모델 전체가 입력으로 필요하므로, 기존 validate_assignment 방식으로 동작한다.
+- frozen(모델 설정, Field(frozen=True)) 필드, validate_assignment=False인 모델, extra='allow'의 추가 필드는 BaseModel과 같이 동작한다.
+  - update()에서 frozen 필드는 frozen_field 에러가 되고, extra='allow'라면 추가 필드도 함께 수정한다.
+- after 검증기가 발생시킨 PydanticCustomError는 BaseModel과 같이 원래의 type, message, ctx를 그대로 알려준다.
+- 전방 참조(`child: Optional['Child']`)로 클래스 정의 시점에 모델이 완성되지 않았다면, model_rebuild()(자동 rebuild 포함)로 완성될 때 검증기를 만든다.
+
+* 주의사항: after 검증기는 수정된 인스턴스(self)를 그대로 반환해야 한다.(다른 인스턴스를 반환하는 검증기는 지원하지 않는다.)
+"""
+from datetime import date
+from timeit import timeit
+from typing import Any, Callable, ClassVar
+
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, field_validator, model_validator
+from pydantic_core import PydanticCustomError, SchemaValidator
+
+from _playground import find_model_schema, init_error, with_definitions
+
+
+def depends_on(*fields: str) -> Callable:
+    """after model_validator가 의존하는 필드를 선언한다. `@model_validator(mode='after')` 아래에 사용한다."""
+    def decorator(func: Callable) -> Callable:
+        func.__depends_on__ = frozenset(fields)
+        return func
+    return decorator
+
+
+class IncrementalModel(BaseModel):
+    model_config = ConfigDict(validate_assignment=True)
+
+    # None이면 before/wrap model_validator가 있으므로 기존 validate_assignment를 사용한다.
+    __incremental_validator__: ClassVar[SchemaValidator | None] = None
+    # 검증기로 바로 수정할 수 있는 필드: frozen 필드, validate_assignment=False인 모델은 BaseModel.__setattr__이 처리한다.
+    __incremental_fields__: ClassVar[frozenset[str]] = frozenset()
+    __after_validators__: ClassVar[list[tuple[Callable, frozenset[str] | None]]] = []
+
+    @classmethod
+    def __pydantic_init_subclass__(cls, **kwargs: Any) -> None:
+        super().__pydantic_init_subclass__(**kwargs)
+        cls._build_incremental()
+
+    @classmethod
+    def model_rebuild(
+        cls,
+        *,
+        force: bool = False,
+        raise_errors: bool = True,
+        _parent_namespace_depth: int = 2,
+        _types_namespace: dict[str, Any] | None = None,
+    ) -> bool | None:
+        # 이 메소드의 frame이 하나 더 있으므로, 부모 namespace의 깊이를 1 늘린다.
+        rebuilt = super().model_rebuild(
+            force=force, raise_errors=raise_errors, _parent_namespace_depth=_parent_namespace_depth + 1, _types_namespace=_types_namespace
+        )
+        if rebuilt:
+            cls._build_incremental()
+        return rebuilt
+
+    @classmethod
+    def _build_incremental(cls) -> None:
+        if not cls.__pydantic_complete__:
+            # 전방 참조가 남아 있다면 core schema가 아직 없다. 완성될 때까지 BaseModel.__setattr__을 사용한다.
+            cls.__incremental_validator__ = None
+            cls.__incremental_fields__ = frozenset()
+            return
+        decorators = cls.__pydantic_decorators__.model_validators.values()
+        if any(decorator.info.mode != 'after' for decorator in decorators):
+            cls.__incremental_validator__ = None
+            cls.__incremental_fields__ = frozenset()
+            return
+        # model_validator(mode='after')는 model schema를 function-after로 감싸고, 재귀 모델은 definitions로 감싸진다.
+        schema = cls.__pydantic_core_schema__
+        model_schema = find_model_schema(schema)
+        cls.__incremental_validator__ = SchemaValidator(with_definitions(schema, model_schema['schema']), model_schema.get('config'))
+        if cls.model_config.get('validate_assignment') and not cls.model_config.get('frozen'):
+            cls.__incremental_fields__ = frozenset(name for name, field in cls.model_fields.items() if not field.frozen)
+        else:
+            cls.__incremental_fields__ = frozenset()
+        cls.__after_validators__ = [
+            (decorator.func, getattr(decorator.func, '__depends_on__', None))
+            for decorator in decorators
+        ]
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name not in self.__incremental_fields__:
+            super().__setattr__(name, value)  # frozen 확인, extra='allow'의 추가 필드 등은 BaseModel이 처리한다.
+            return
+        # validate_assignment()는 넘겨받은 dict를 직접 수정하므로, 실패했을 때 되돌릴 수 있도록 복사본을 넘긴다.
+        new_dict, _, _ = self.__incremental_validator__.validate_assignment(self.__dict__.copy(), name, value)
+        self._apply(new_dict, {name})
+
+    def update(self, **changes: Any) -> None:
+        """여러 필드를 한 번에 검증하고 수정한다. 하나라도 실패하면 아무것도 수정하지 않는다."""
+        if not self.__incremental_fields__:
+            copy = self.model_copy()
+            for name, value in changes.items():
+                BaseModel.__setattr__(copy, name, value)
+            self._apply(copy.__dict__, set(changes), copy.__pydantic_extra__, run_validators=False)
+            return
+
+        new_dict = self.__dict__.copy()
+        new_extra = None
+        errors = []
+        for name, value in changes.items():
+            if name in self.__incremental_fields__:
+                try:
+                    new_dict, _, _ = self.__incremental_validator__.validate_assignment(new_dict, name, value)
+                except ValidationError as ex:
+                    errors += [init_error(error) for error in ex.errors()]
+            elif name in self.model_fields:
+                errors.append({'type': 'frozen_field', 'loc': (name,), 'input': value})
+            elif self.model_config.get('extra') == 'allow':
+                new_extra = dict(self.__pydantic_extra__) if new_extra is None else new_extra
+                new_extra[name] = value
+            else:
+                errors.append({'type': 'no_such_attribute', 'loc': (name,), 'input': value, 'ctx': {'attribute': name}})
+        if errors:
+            raise ValidationError.from_exception_data(type(self).__name__, errors)
+        self._apply(new_dict, set(changes).intersection(self.model_fields), new_extra)
+
+    def _apply(
+        self, new_dict: dict[str, Any], changed: set[str], new_extra: dict[str, Any] | None = None, *, run_validators: bool = True
+    ) -> None:
+        old_dict, old_fields_set, old_extra = self.__dict__, self.__pydantic_fields_set__, self.__pydantic_extra__
+        object.__setattr__(self, '__dict__', new_dict)
+        object.__setattr__(self, '__pydantic_fields_set__', old_fields_set | changed)
+        if new_extra is not None:
+            object.__setattr__(self, '__pydantic_extra__', new_extra)
+        if not run_validators:
+            return
+        try:
+            for func, fields in self.__after_validators__:
+                if fields is None or not fields.isdisjoint(changed):
+                    func(self)
+        except (ValueError, AssertionError) as ex:
+            # 수정 전의 상태로 되돌린다.
+            object.__setattr__(self, '__dict__', old_dict)
+            object.__setattr__(self, '__pydantic_fields_set__', old_fields_set)
+            object.__setattr__(self, '__pydantic_extra__', old_extra)
+            if isinstance(ex, ValidationError):
+                raise
+            if isinstance(ex, PydanticCustomError):
+                # BaseModel과 같이 원래의 type, message, ctx를 그대로 사용한다.
+                error = {'type': ex, 'loc': (), 'input': new_dict}
+            else:
+                error_type = 'assertion_error' if isinstance(ex, AssertionError) else 'value_error'
+                error = {'type': error_type, 'loc': (), 'input': new_dict, 'ctx': {'error': ex}}
+            raise ValidationError.from_exception_data(type(self).__name__, [error]) from ex
+
+
+class ModelWithValidateAssignment(IncrementalModel):
+    a: int
+    b: int
+
+
+m1 = ModelWithValidateAssignment(a=1, b=2)
+
+try:
+    m1.a = "a"
+except ValidationError as ex:
+    print(ex)
+    """
+    1 validation error for ModelWithValidateAssignment
+    a
+      Input should be a valid integer, unable to parse string as an integer [type=int_parsing, input_value='a', input_type=str]
+        For further information visit https://errors.pydantic.dev/2.7/v/int_parsing
+    """
+
+m1.a = "10"
+print(m1)  # 출력: a=10 b=2
+
+try:
+    m1.update(a=20, b="b")
+except ValidationError as ex:
+    print(ex.errors(include_url=False))
+    # 출력: [{'type': 'int_parsing', 'loc': ('b',), 'msg': 'Input should be a valid integer, unable to parse string as an integer', 'input': 'b'}]
+print(m1)  # 출력: a=10 b=2 | atomic: a도 수정되지 않았다.
+
+print()
+print("--------------------")
+
+
+class Booking(IncrementalModel):
+    room: str
+    guests: int
+    start: date
+    end: date
+    note: str = ''
+
+    @field_validator('room')
+    @classmethod
+    def normalize_room(cls, value: str) -> str:
+        return value.upper()
+
+    @model_validator(mode='after')
+    @depends_on('start', 'end')
+    def check_dates(self) -> 'Booking':
+        if self.start >= self.end:
+            raise ValueError('end must be after start')
+        return self
+
+    @model_validator(mode='after')
+    @depends_on('room', 'guests')
+    def check_capacity(self) -> 'Booking':
+        if self.guests > ROOM_CAPACITY.get(self.room, 0):
+            raise ValueError(f'room {self.room} cannot accommodate {self.guests} guests')
+        return self
+
+
+ROOM_CAPACITY = {'A101': 2, 'B201': 4}
+
+booking = Booking(room='a101', guests=2, start=date(2024, 5, 1), end=date(2024, 5, 3))
+booking.note = 'late check-in'  # 의존하는 검증기가 없으므로 note 필드만 검증한다.
+
+try:
+    booking.guests = 3
+except ValidationError as ex:
+    print(ex)
+    """
+    1 validation error for Booking
+      Value error, room A101 cannot accommodate 3 guests [type=value_error, input_value={'room': 'A101', 'guests'...'note': 'late check-in'}, input_type=dict]
+        For further information visit https://errors.pydantic.dev/2.7/v/value_error
+    """
+print(booking.guests)  # 출력: 2 | 실패한 수정은 반영되지 않는다.
+
+booking.update(room='b201', guests=3)  # check_capacity는 한 번만 실행된다.
+print(booking)
+# 출력: room='B201' guests=3 start=datetime.date(2024, 5, 1) end=datetime.date(2024, 5, 3) note='late check-in'
+
+try:
+    booking.update(start='2024-05-10', end='2024-05-05')
+except ValidationError as ex:
+    print(ex.errors(include_url=False)[0]['msg'])  # 출력: Value error, end must be after start
+print(booking.start, booking.end)  # 출력: 2024-05-01 2024-05-03
+print()
+
+
+class Account(IncrementalModel):
+    model_config = ConfigDict(extra='allow')
+
+    id: int = Field(frozen=True)
+    balance: int
+    parent: 'Account | None' = None  # 재귀 모델: core schema가 definitions로 감싸진다.
+
+    @model_validator(mode='after')
+    @depends_on('balance')
+    def check_balance(self) -> 'Account':
+        if self.balance < 0:
+            raise PydanticCustomError('negative_balance', 'balance {balance} is negative', {'balance': self.balance})
+        return self
+
+
+account = Account(id=1, balance=10)
+print(Account.__incremental_validator__ is not None)  # 출력: True
+
+try:
+    account.id = 2
+except ValidationError as ex:
+    print(ex.errors(include_url=False))  # 출력: [{'type': 'frozen_field', 'loc': ('id',), 'msg': 'Field is frozen', 'input': 2}]
+
+try:
+    account.update(balance=-1)
+except ValidationError as ex:
+    print(ex.errors(include_url=False)[0]['type'], ex.errors(include_url=False)[0]['ctx'])
+    # 출력: negative_balance {'balance': -1} | PydanticCustomError는 그대로 전달된다.
+
+account.update(balance=20, memo='vip')  # extra='allow'이므로 추가 필드도 수정할 수 있다.
+print(account, account.parent)  # 출력: id=1 balance=20 parent=None memo='vip' None
+account.parent = {'id': 0, 'balance': 100}
+print(account.parent)  # 출력: id=0 balance=100 parent=None
+
+
+class Parent(IncrementalModel):  # 전방 참조: Child가 정의될 때까지 모델이 완성되지 않는다.
+    name: str
+    child: 'Child | None' = None
+
+
+print(Parent.__pydantic_complete__, Parent.__incremental_validator__)  # 출력: False None
+
+
+class Child(IncrementalModel):
+    x: int
+
+
+parent = Parent(name='p')  # 처음 사용할 때 자동으로 rebuild 되고, 검증기도 만들어진다.
+parent.child = {'x': '2'}
+print(parent, Parent.__incremental_validator__ is not None)  # 출력: name='p' child=Child(x=2) True
+
+print()
+print("--------------------")
+
+# 벤치마크: 필드 20개 + after model_validator 5개 모델의 필드 하나 수정 비용
+# - validate_assignment: 기존 방식(수정마다 모든 after 검증기 실행)
+# - IncrementalModel: 수정한 필드에 의존하는 검증기 하나만 실행
+FIELDS = [f'field_{i}' for i in range(20)]
+VALIDATORS = 5
+
+
+def make_check(group: list[str]) -> Callable:
+    def check_group(self):
+        if sum(getattr(self, field) for field in group) < 0:
+            raise ValueError('negative sum')
+        return self
+    return check_group
+
+
+def make_model(base: type[BaseModel], name: str) -> type[BaseModel]:
+    namespace: dict[str, Any] = {'__annotations__': {field: int for field in FIELDS}}
+    if base is BaseModel:
+        namespace['model_config'] = ConfigDict(validate_assignment=True)
+    for i in range(VALIDATORS):
+        group = FIELDS[i * 4:(i + 1) * 4]
+        namespace[f'check_{i}'] = model_validator(mode='after')(depends_on(*group)(make_check(group)))
+    return type(name, (base,), namespace)
+
+
+EagerModel = make_model(BaseModel, 'EagerModel')
+LazyModel = make_model(IncrementalModel, 'LazyModel')
+data = {field: i for i, field in enumerate(FIELDS)}
+eager, lazy = EagerModel(**data), LazyModel(**data)
+
+NUMBER = 50_000
+
+
+def assign_three(instance: BaseModel) -> None:
+    instance.field_0 = 1
+    instance.field_1 = 2
+    instance.field_2 = 3
+
+
+benchmarks = {
+    'assign 1 field': (lambda: setattr(eager, 'field_0', 1), lambda: setattr(lazy, 'field_0', 1)),
+    'assign 3 fields': (lambda: assign_three(eager), lambda: assign_three(lazy)),
+    'update(3 fields)': (lambda: assign_three(eager), lambda: lazy.update(field_0=1, field_1=2, field_2=3)),
+}
+print(f"{'':<20} {'validate_assignment':>20} {'IncrementalModel':>20}")
+for name, (eager_func, lazy_func) in benchmarks.items():
+    eager_seconds = timeit(eager_func, number=NUMBER) / NUMBER
+    lazy_seconds = timeit(lazy_func, number=NUMBER) / NUMBER
+    print(f"{name:<20} {eager_seconds * 1e6:17.2f} µs {lazy_seconds * 1e6:17.2f} µs x{eager_seconds / lazy_seconds:.2f}")
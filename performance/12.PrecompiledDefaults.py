@@ -0,0 +1,259 @@
+"""
+`model configuration/3. ValidatingDefaultValues.py` 의 ModelLevelValidateDefault, FieldLevelValidateDefault는 기본값을 검증한다.
+- 그러나 기본값 검증은 인스턴스를 만들 때마다 실행된다.
+- `port: int = '8080'` 같은 고정된 기본값은 항상 같은 결과로 검증되므로, 인스턴스마다 다시 검증할 필요가 없다.
+- 기본값이 많은 설정(config) 모델에서는 인스턴스 생성 비용의 대부분이 기본값 검증이 된다.
+
+PrecompiledDefaultsModel은 클래스를 정의할 때 고정된 기본값을 한 번만 검증한다.
+- 검증에 성공하면 기본값을 검증된 값으로 바꾸고, 해당 필드의 validate_default를 해제한 뒤 검증기를 다시 만든다.
+  - 검증된 값이 list, dict 같은 mutable 값이라면 바꾸지 않는다.
+    - 검증하지 않는 mutable 기본값은 인스턴스마다 deepcopy 되는데, 벤치마크 결과 이 비용이 다시 검증하는 비용보다 크다.
+- 검증에 실패하면 클래스 정의 시점의 에러를 `__default_errors__`에 기록하고, 해당 필드는 지금처럼 인스턴스마다 검증한다.
+  - 기본값을 사용하는 인스턴스 생성은 기존과 같은 ValidationError를 발생시킨다.
+- default_factory로 만들어지는 기본값은 매번 다른 값이 나올 수 있으므로, 지금처럼 인스턴스마다 검증한다.
+- field_validator가 적용된 필드는 다른 필드 값(info.data)이나 context에 따라 결과가 달라질 수 있으므로, 미리 검증하지 않는다.
+  - Annotated[..., AfterValidator(...)] 처럼 타입에 포함된 검증기도 info를 사용한다면 미리 검증하지 않는다.
+- `port: int = '8080'` 처럼 lax 모드에서만 통과하는 기본값은, model_validate(..., strict=True)에서 원래의 검증기(기본값을 검증하는)를 사용한다.
+- 클래스를 다시 만드는(model_rebuild) 대신, core schema의 기본값만 바꾸어 검증기와 serializer를 다시 만든다.
+- 전방 참조로 클래스 정의 시점에 모델이 완성되지 않았다면, model_rebuild()(자동 rebuild 포함)로 완성될 때 미리 검증한다.
+"""
+from datetime import datetime
+from timeit import repeat
+from typing import Annotated, Any, ClassVar, Optional, Self
+
+from pydantic import AfterValidator, BaseModel, ConfigDict, Field, ValidationError, ValidationInfo
+from pydantic_core import PydanticUndefined, SchemaSerializer, SchemaValidator
+
+from _playground import find_model_schema, replace_model_schema, with_definitions
+
+
+class PrecompiledDefaultsModel(BaseModel):
+    __default_errors__: ClassVar[dict[str, ValidationError]] = {}
+    # lax 모드에서만 통과하는 기본값을 미리 검증했다면, strict=True 검증에 사용할 원래의 검증기
+    __strict_validator__: ClassVar[SchemaValidator | None] = None
+
+    @classmethod
+    def __pydantic_init_subclass__(cls, **kwargs: Any) -> None:
+        super().__pydantic_init_subclass__(**kwargs)
+        cls._precompile_defaults()
+
+    @classmethod
+    def model_rebuild(
+        cls,
+        *,
+        force: bool = False,
+        raise_errors: bool = True,
+        _parent_namespace_depth: int = 2,
+        _types_namespace: dict[str, Any] | None = None,
+    ) -> bool | None:
+        # 부모 namespace는 호출한 쪽의 frame에서 찾으므로, 이 메소드의 frame 만큼 깊이를 늘린다.
+        rebuilt = super().model_rebuild(
+            force=force, raise_errors=raise_errors, _parent_namespace_depth=_parent_namespace_depth + 1, _types_namespace=_types_namespace
+        )
+        if rebuilt:
+            cls._precompile_defaults()  # 새로 만들어진 core schema에 다시 반영한다.
+        return rebuilt
+
+    @classmethod
+    def _precompile_defaults(cls) -> None:
+        cls.__default_errors__ = {}
+        cls.__strict_validator__ = None
+        if not cls.__pydantic_complete__:
+            return  # 전방 참조가 남아 있다면 core schema가 없다. model_rebuild() 이후에 미리 검증한다.
+        schema = cls.__pydantic_core_schema__
+        model_schema = find_model_schema(schema)
+        fields = dict(model_schema['schema']['fields'])
+        precompiled = lax_only = False
+        for name, field in _static_default_fields(cls, fields):
+            validator = SchemaValidator(with_definitions(schema, fields[name]['schema']['schema']), model_schema.get('config'))
+            try:
+                value = validator.validate_python(field.default)
+            except ValidationError as ex:
+                cls.__default_errors__[name] = ex
+                continue
+            if not _is_immutable(value):
+                # mutable 기본값은 인스턴스마다 deepcopy 되는데, 이 비용이 다시 검증하는 비용보다 크다.
+                continue
+            try:
+                validator.validate_python(field.default, strict=True)
+            except ValidationError:
+                lax_only = True  # '8080' -> 8080: strict=True 검증에서는 기본값이 에러가 되어야 한다.
+            field.default = value
+            field.validate_default = False
+            field._attributes_set.update(default=value, validate_default=False)
+            default_schema = {**fields[name]['schema'], 'default': value, 'validate_default': False}
+            fields[name] = {**fields[name], 'schema': default_schema}
+            precompiled = True
+        if not precompiled:
+            return
+        # model_rebuild()는 Python 쪽 schema 생성부터 다시 하므로, core schema의 기본값만 바꾸어 검증기를 다시 만든다.
+        if lax_only:
+            cls.__strict_validator__ = cls.__pydantic_validator__
+        schema = replace_model_schema(schema, schema={**model_schema['schema'], 'fields': fields})
+        cls.__pydantic_core_schema__ = schema
+        cls.__pydantic_validator__ = SchemaValidator(schema, model_schema.get('config'))
+        cls.__pydantic_serializer__ = SchemaSerializer(schema, model_schema.get('config'))
+
+    @classmethod
+    def model_validate(
+        cls, obj: Any, *, strict: bool | None = None, from_attributes: bool | None = None, context: dict[str, Any] | None = None
+    ) -> Self:
+        validator = cls.__strict_validator__ if strict and cls.__strict_validator__ else cls.__pydantic_validator__
+        return validator.validate_python(obj, strict=strict, from_attributes=from_attributes, context=context)
+
+    @classmethod
+    def model_validate_json(
+        cls, json_data: str | bytes | bytearray, *, strict: bool | None = None, context: dict[str, Any] | None = None
+    ) -> Self:
+        validator = cls.__strict_validator__ if strict and cls.__strict_validator__ else cls.__pydantic_validator__
+        return validator.validate_json(json_data, strict=strict, context=context)
+
+    @classmethod
+    def model_validate_strings(cls, obj: Any, *, strict: bool | None = None, context: dict[str, Any] | None = None) -> Self:
+        validator = cls.__strict_validator__ if strict and cls.__strict_validator__ else cls.__pydantic_validator__
+        return validator.validate_strings(obj, strict=strict, context=context)
+
+
+def _static_default_fields(cls: type[BaseModel], fields: dict[str, Any]):
+    decorated = {
+        field
+        for decorator in cls.__pydantic_decorators__.field_validators.values()
+        for field in decorator.info.fields
+    }
+    model_validate_default = cls.model_config.get('validate_default', False)
+    for name, field in cls.model_fields.items():
+        validate_default = field.validate_default if field.validate_default is not None else model_validate_default
+        if not validate_default or field.default is PydanticUndefined or field.default_factory is not None:
+            continue
+        if name in decorated or '*' in decorated:
+            continue
+        if _uses_info(fields[name]['schema']):  # Annotated[..., AfterValidator(...)] 등 info/context를 사용하는 검증기
+            continue
+        yield name, field
+
+
+def _uses_info(schema: Any) -> bool:
+    if isinstance(schema, dict):
+        function = schema.get('function')
+        if str(schema.get('type')).startswith('function-') and function.get('type') == 'with-info':
+            return True
+        return any(map(_uses_info, schema.values()))
+    if isinstance(schema, list):
+        return any(map(_uses_info, schema))
+    return False
+
+
+def _is_immutable(value: Any) -> bool:
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return True
+
+
+class ModelLevelValidateDefault(PrecompiledDefaultsModel):
+    model_config = ConfigDict(validate_default=True)
+
+    field_1: int = None
+    field_2: str = 100
+
+
+print(list(ModelLevelValidateDefault.__default_errors__))  # 출력: ['field_1', 'field_2'] | 클래스 정의 시점에 발견된 에러
+print(ModelLevelValidateDefault.__default_errors__['field_1'].errors(include_url=False))
+# 출력: [{'type': 'int_type', 'loc': (), 'msg': 'Input should be a valid integer', 'input': None}]
+
+try:
+    ModelLevelValidateDefault()
+except ValueError as ex:
+    print(ex)
+    """
+    2 validation errors for ModelLevelValidateDefault
+    field_1
+      Input should be a valid integer [type=int_type, input_value=None, input_type=NoneType]
+        For further information visit https://errors.pydantic.dev/2.7/v/int_type
+    field_2
+      Input should be a valid string [type=string_type, input_value=100, input_type=int]
+        For further information visit https://errors.pydantic.dev/2.7/v/string_type
+    """
+
+print()
+print("--------------------")
+
+
+class FieldLevelValidateDefault(PrecompiledDefaultsModel):
+    field_1: int = Field(default='1', validate_default=True)
+    field_2: list[int] = Field(default=('2', 3), validate_default=True)
+    created_at: datetime = Field(default_factory=lambda: '2024-05-01T00:00:00', validate_default=True)
+
+
+print(FieldLevelValidateDefault.model_fields['field_1'])  # 출력: annotation=int required=False default=1 validate_default=False
+print(FieldLevelValidateDefault.model_fields['field_2'])
+# 출력: annotation=list[int] required=False default=('2', 3) validate_default=True | mutable 값은 인스턴스마다 검증한다.
+print(FieldLevelValidateDefault())  # 출력: field_1=1 field_2=[2, 3] created_at=datetime.datetime(2024, 5, 1, 0, 0)
+
+try:
+    FieldLevelValidateDefault.model_validate({}, strict=True)
+except ValidationError as ex:
+    print([(error['type'], error['loc']) for error in ex.errors()])
+    # 출력: [('int_type', ('field_1',)), ('list_type', ('field_2',)), ('datetime_type', ('created_at',))] | BaseModel과 같은 strict 에러
+
+
+def scale(value: int, info: ValidationInfo) -> int:
+    return value * (info.context or {}).get('scale', 1)
+
+
+class ScaledDefault(PrecompiledDefaultsModel):
+    size: Annotated[int, AfterValidator(scale)] = Field(default='10', validate_default=True)
+
+
+# context에 따라 결과가 달라지므로, 인스턴스마다 검증한다.
+print(ScaledDefault.model_fields['size'].validate_default)  # 출력: True
+print(ScaledDefault.model_validate({}, context={'scale': 3}))  # 출력: size=30
+
+
+class Service(PrecompiledDefaultsModel):  # 전방 참조: Endpoint가 정의될 때까지 모델이 완성되지 않는다.
+    port: int = Field(default='8080', validate_default=True)
+    endpoint: Optional['Endpoint'] = None
+
+
+class Endpoint(PrecompiledDefaultsModel):
+    path: str = '/'
+
+
+print(Service(), Service.model_fields['port'].validate_default)  # 출력: port=8080 endpoint=None False | 자동 rebuild 때 미리 검증한다.
+
+print()
+print("--------------------")
+
+# 벤치마크: 기본값이 많은 설정 모델의 인스턴스 생성 비용
+# - validate_default=True: 인스턴스마다 기본값 검증 / PrecompiledDefaultsModel: 클래스 정의 시 한 번 검증
+DEFAULTS = {
+    'host': (str, 'localhost'),
+    'port': (int, '8080'),
+    'timeout': (float, '2.5'),
+    'retries': (int, 3),
+    'debug': (bool, 'false'),
+    'tags': (list[str], ('api', 'internal')),
+    'limits': (dict[str, int], {'rps': '100', 'burst': '200'}),
+    'created_at': (datetime, '2024-05-01T00:00:00'),
+}
+
+
+def make_config_model(base: type[BaseModel], name: str) -> type[BaseModel]:
+    namespace: dict[str, Any] = {
+        '__annotations__': {field: annotation for field, (annotation, _) in DEFAULTS.items()},
+        'model_config': ConfigDict(validate_default=True),
+        **{field: default for field, (_, default) in DEFAULTS.items()},
+    }
+    return type(name, (base,), namespace)
+
+
+EagerConfig = make_config_model(BaseModel, 'EagerConfig')
+PrecompiledConfig = make_config_model(PrecompiledDefaultsModel, 'PrecompiledConfig')
+assert EagerConfig().model_dump() == PrecompiledConfig().model_dump()
+
+NUMBER, REPEAT = 20_000, 7  # 측정 잡음을 줄이기 위해 REPEAT번 측정한 값 중 가장 빠른 값을 사용한다.
+for name, model in (('validate_default=True', EagerConfig), ('PrecompiledDefaultsModel', PrecompiledConfig)):
+    seconds = min(repeat(model, number=NUMBER, repeat=REPEAT)) / NUMBER
+    override = min(repeat(lambda: model(port=9090), number=NUMBER, repeat=REPEAT)) / NUMBER
+    print(f"{name:<26} {seconds * 1e6:8.2f} µs/instance (all defaults) {override * 1e6:8.2f} µs/instance (port=9090)")
@@ -0,0 +1,287 @@
+"""
+`model configuration/7.StandardzingString.py` 의 str_strip_whitespace/str_to_lower/str_to_upper 설정과
+`Annotated Types/AnnotatedTypes.py` 의 StandardString(StringConstraints)은 문자열마다, 필드마다, 인스턴스마다 변환을 적용한다.
+- 주소, 코드처럼 문자열 필드가 대부분인 데이터를 대량으로 검증하면, 검증 시간의 상당 부분(벤치마크 모델에서 약 1/3)이 문자열 변환에 사용된다.
+  - pydantic-core는 변환이 필요 없는(이미 정규화된) 문자열도 새 문자열 객체로 만든다.
+
+normalize_column()은 하나의 컬럼(같은 필드의 값 목록)에 strip/lower/upper를 한 번에 적용한다.
+- strip: str.strip은 제거할 공백이 없으면 새 문자열을 만들지 않고 원래 객체를 그대로 돌려준다.
+  - pydantic-core(Rust의 str::trim)와 같은 공백 문자(Unicode White_Space)만 제거한다.
+    인자 없는 str.strip()은 \x1c~\x1f(정보 구분 문자)도 제거하므로, 제거할 문자를 _WHITESPACE로 지정한다.
+- lower/upper (ASCII fast path): 컬럼 전체가 ASCII라면 컬럼을 하나의 문자열로 이어 붙여 한 번에 변환한다.
+  - 변환 결과가 원래와 같다면(이미 정규화된 컬럼) 새 문자열을 하나도 만들지 않고 원래 값을 그대로 사용한다.
+  - ASCII가 아닌 문자열은 그리스어 종결 시그마(Σ) 처럼 앞뒤 문자에 따라 결과가 달라질 수 있으므로 값마다 변환한다.
+
+NormalizingBatchValidator는 모델의 변환 설정(ConfigDict, StringConstraints)을 읽어서,
+- 변환이 적용되는 최상위 str 필드는 컬럼 단위로 미리 정규화하고,
+- 해당 필드의 변환을 끈(strip_whitespace=False 등) 검증기로 한 번에 검증한다.(min_length 등 다른 제약은 그대로 적용된다.)
+- dict가 아닌 행이나, 변환할 필드에 str이 아닌 입력(bytes 등 lax 모드에서 str로 변환되는 값)이 있는 행은 원래의 검증기로 검증한다.
+  - 에러는 입력 순서(행 번호)대로 합쳐서 하나의 ValidationError로 알려준다.
+- field_validator가 적용된 필드나 list[str] 처럼 중첩된 문자열은 지금처럼 pydantic-core가 변환한다.
+
+* 주의사항: 효과는 크지 않다. 벤치마크에서 이미 정규화된(clean) 입력은 약 x1.1 빠르고,
+  정규화가 필요한(dirty) 입력은 컬럼을 꺼내고 다시 써넣는 비용 때문에 약 x0.9로 오히려 느리다.
+  - 대부분의 값이 이미 정규화된 대량의 입력에서만 사용하고, 실제 데이터로 측정한 뒤에 적용한다.
+"""
+from operator import is_, itemgetter
+from types import NoneType
+from timeit import repeat
+from typing import Annotated, Any, Generic, Iterable, NamedTuple, Optional, Sequence, TypeVar
+
+from pydantic import BaseModel, ConfigDict, StringConstraints, ValidationError
+from pydantic_core import SchemaValidator, core_schema
+
+from _playground import copy_schema, find_model_schema, init_error, replace_model_schema
+
+ModelT = TypeVar('ModelT', bound=BaseModel)
+
+# pydantic-core의 str_strip_whitespace가 제거하는 문자(Unicode White_Space)
+_WHITESPACE = '\t\n\x0b\x0c\r \x85\xa0\u1680' + ''.join(map(chr, range(0x2000, 0x200b))) + '\u2028\u2029\u202f\u205f\u3000'
+
+
+class StringTransform(NamedTuple):
+    strip: bool = False
+    lower: bool = False
+    upper: bool = False
+
+    def __bool__(self) -> bool:
+        return self.strip or self.lower or self.upper
+
+    def apply(self, value: str) -> str:
+        if self.strip:
+            value = value.strip(_WHITESPACE)
+        if self.lower:
+            return value.lower()
+        if self.upper:
+            return value.upper()
+        return value
+
+
+def normalize_column(values: Iterable[str], transform: StringTransform) -> list[str]:
+    values = [value.strip(_WHITESPACE) for value in values] if transform.strip else list(values)
+    if not (transform.lower or transform.upper) or not values:
+        return values
+    case = str.lower if transform.lower else str.upper
+
+    joined = '\0'.join(values)
+    if joined.isascii() and joined.count('\0') == len(values) - 1:
+        converted = case(joined)
+        if converted == joined:
+            return values  # 이미 정규화된 컬럼: 새 문자열을 만들지 않는다.
+        return converted.split('\0')
+    return list(map(case, values))
+
+
+class _NormalizedField(NamedTuple):
+    name: str
+    keys: tuple[str, ...]  # 입력 dict에서 찾을 key (alias, populate_by_name인 경우 필드 이름)
+    transform: StringTransform
+
+
+class NormalizingBatchValidator(Generic[ModelT]):
+    def __init__(self, model: type[ModelT]):
+        self.model = model
+        original = model.__pydantic_core_schema__
+        model_schema = find_model_schema(original)
+        # 필드의 변환 설정을 끄기 위해 필드 schema를 복사한다.(definitions의 중첩 모델은 원래 schema를 그대로 사용한다.)
+        fields_schema = copy_schema(model_schema['schema'])
+        schema = replace_model_schema(original, schema=fields_schema)
+
+        config = model_schema.get('config') or {}
+        self.fields = [
+            normalized for name, field in fields_schema['fields'].items()
+            if (normalized := _take_transform(name, field, config)) is not None
+        ]
+        self._validator = SchemaValidator(_list_schema(schema))
+        self._stock_validator = SchemaValidator(_list_schema(original))
+
+    def validate_python(self, rows: Sequence[dict[str, Any]]) -> list[ModelT]:
+        rows = list(rows)
+        # dict가 아닌 행과, 변환할 필드에 str이 아닌 값(bytes 등)이 있는 행은 원래의 검증기로 검증한다.
+        # (bytes는 검증하면서 str로 바뀌므로, 미리 정규화할 수 없다. 정규화하지 않고 검증하면 max_length 등의 결과가 달라진다.)
+        stock = set()
+        if not set(map(type, rows)) <= {dict}:
+            stock.update(i for i, row in enumerate(rows) if type(row) is not dict)
+        dict_rows = [{} if i in stock else row for i, row in enumerate(rows)] if stock else rows
+        columns = []
+        for field in self.fields:
+            for key in field.keys:
+                try:
+                    column = list(map(itemgetter(key), dict_rows))
+                except KeyError:  # 일부 행에만 있는 key(기본값, alias/이름 혼용)
+                    column = [row.get(key) for row in dict_rows]
+                if not set(map(type, column)) <= {str, NoneType}:
+                    stock.update(i for i, value in enumerate(column) if type(value) not in (str, NoneType))
+                columns.append((key, field, column))
+
+        positions = [i for i in range(len(rows)) if i not in stock] if stock else None
+        fast_rows = rows if positions is None else [rows[i] for i in positions]
+        copied = False
+        for key, field, column in columns:
+            if positions is not None:
+                column = [column[i] for i in positions]
+            if NoneType in set(map(type, column)):  # None(값이 없는 행)은 변환하지 않는다.
+                indices = [i for i, value in enumerate(column) if value is not None]
+                values = [column[i] for i in indices]
+            else:
+                indices, values = None, column
+            normalized = normalize_column(values, field.transform)
+            if normalized is values or all(map(is_, values, normalized)):
+                continue  # 이미 정규화된 컬럼
+            if not copied:  # 입력 dict는 수정하지 않는다.
+                fast_rows = list(map(dict, fast_rows))
+                copied = True
+            for row, value in zip(fast_rows if indices is None else map(fast_rows.__getitem__, indices), normalized):
+                row[key] = value
+
+        if positions is None:
+            return self._validator.validate_python(fast_rows)
+        return self._merge(rows, positions, fast_rows, sorted(stock))
+
+    def _merge(self, rows: list[Any], positions: list[int], fast_rows: list[Any], stock: list[int]) -> list[ModelT]:
+        """정규화한 행과 원래의 검증기로 검증할 행을 따로 검증하고, 결과와 에러를 입력 순서로 합친다."""
+        instances: list[Any] = [None] * len(rows)
+        errors = []
+        for validator, indices, inputs in (
+            (self._validator, positions, fast_rows),
+            (self._stock_validator, stock, [rows[i] for i in stock]),
+        ):
+            try:
+                for i, instance in zip(indices, validator.validate_python(inputs)):
+                    instances[i] = instance
+            except ValidationError as ex:
+                errors += [
+                    {**init_error(error), 'loc': (indices[error['loc'][0]], *error['loc'][1:])} for error in ex.errors()
+                ]
+        if errors:
+            errors.sort(key=lambda error: error['loc'][0])
+            raise ValidationError.from_exception_data(self._validator.title, errors)
+        return instances
+
+
+def _list_schema(schema: dict[str, Any]) -> dict[str, Any]:
+    if schema['type'] == 'definitions':
+        return core_schema.definitions_schema(core_schema.list_schema(schema['schema']), schema['definitions'])
+    return core_schema.list_schema(schema)
+
+
+def _take_transform(name: str, field: dict[str, Any], config: dict[str, Any]) -> _NormalizedField | None:
+    """최상위 str 필드라면 변환 설정을 꺼내고, 필드의 str schema에서는 변환을 끈다."""
+    if field['type'] != 'model-field':
+        return None
+    schema = field['schema']
+    while schema['type'] in ('default', 'nullable'):
+        schema = schema['schema']
+    if schema['type'] != 'str':
+        return None  # field_validator(function-*)가 적용되었거나, str이 아닌 필드
+
+    transform = StringTransform(
+        strip=schema.get('strip_whitespace', config.get('str_strip_whitespace', False)),
+        lower=schema.get('to_lower', config.get('str_to_lower', False)),
+        upper=schema.get('to_upper', config.get('str_to_upper', False)),
+    )
+    if not transform:
+        return None
+    alias = field.get('validation_alias', name)
+    if not isinstance(alias, str):
+        return None  # AliasPath, AliasChoices
+    keys = (alias,) if alias == name or not config.get('populate_by_name') else (alias, name)
+
+    # schema에 명시한 값은 config보다 우선한다.
+    schema.update(strip_whitespace=False, to_lower=False, to_upper=False)
+    return _NormalizedField(name, keys, transform)
+
+
+print(normalize_column(['  Hello, World!  ', 'Hello, World!'], StringTransform(strip=True)))
+# 출력: ['Hello, World!', 'Hello, World!']
+print(normalize_column(['Seoul ', 'BUSAN', 'Αθήνα'], StringTransform(strip=True, lower=True)))  # 출력: ['seoul', 'busan', 'αθήνα']
+
+already_normalized = ['seoul', 'busan']
+print(all(a is b for a, b in zip(normalize_column(already_normalized, StringTransform(lower=True)), already_normalized)))
+# 출력: True | 이미 정규화된 값은 새 문자열을 만들지 않는다.
+print(normalize_column(['\x1fab\x1c', '\u3000ab\n'], StringTransform(strip=True)))
+# 출력: ['\x1fab\x1c', 'ab'] | pydantic-core처럼 \x1c~\x1f는 제거하지 않는다.(인자 없는 str.strip()은 제거한다.)
+
+print()
+print("--------------------")
+
+
+class Model(BaseModel):
+    field: str
+
+    model_config = ConfigDict(str_strip_whitespace=True)
+
+
+StandardString = Annotated[
+    str,
+    StringConstraints(to_lower=True, min_length=2, strip_whitespace=True)
+]
+
+
+class Address(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True)
+
+    street: str
+    city: str
+    code: StandardString
+    country: Annotated[str, StringConstraints(to_upper=True, max_length=2)]
+    note: Optional[str] = None
+
+
+print(NormalizingBatchValidator(Model).validate_python([{'field': '  Hello, World!  '}, {'field': 'Hello, World!'}]))
+# 출력: [Model(field='Hello, World!'), Model(field='Hello, World!')]
+edge_cases = [{'field': '\x1fab\x1c'}, {'field': '\u3000ab\n'}]
+assert NormalizingBatchValidator(Model).validate_python(edge_cases) == [Model(**row) for row in edge_cases]
+
+addresses = NormalizingBatchValidator(Address)
+print([(field.name, field.transform) for field in addresses.fields])
+# 출력: [('street', StringTransform(strip=True, lower=False, upper=False)), ...,
+#        ('code', StringTransform(strip=True, lower=True, upper=False)), ('country', StringTransform(strip=True, lower=False, upper=True)), ...]
+print(addresses.validate_python([
+    {'street': ' 1 Main St ', 'city': 'Seoul', 'code': b'AB12  ', 'country': 'kr '},
+]))
+# 출력: [Address(street='1 Main St', city='Seoul', code='ab12', country='KR', note=None)] | bytes 입력도 같은 결과
+
+try:
+    addresses.validate_python([{'street': 'x', 'city': 'y', 'code': '   a   ', 'country': 'kr'}])
+except ValidationError as ex:
+    print(ex)
+    """
+    1 validation error for list[Address]
+    0.code
+      String should have at least 2 characters [type=string_too_short, input_value='a', input_type=str]
+        For further information visit https://errors.pydantic.dev/2.7/v/string_too_short
+    """
+
+print(addresses.validate_python([{'street': 'x', 'city': 'y', 'code': 'ab', 'country': b'kr '}]))
+# 출력: [Address(street='x', city='y', code='ab', country='KR', note=None)] | bytes는 원래의 검증기가 변환한 뒤 max_length를 확인한다.
+
+try:
+    addresses.validate_python([{'street': 'x', 'city': 'y', 'code': 'a', 'country': 'kr'}, 'not a dict', {'code': b'ab'}])
+except ValidationError as ex:
+    print([(error['type'], error['loc']) for error in ex.errors()])
+    # 출력: [('string_too_short', (0, 'code')), ('model_type', (1,)), ('missing', (2, 'street')), ('missing', (2, 'city')), ('missing', (2, 'country'))]
+
+print()
+print("--------------------")
+
+# 벤치마크: 주소 데이터 일괄 검증 처리량
+# - dirty: 공백/대소문자 정규화가 필요한 입력, clean: 이미 정규화된 입력
+ROWS = 100_000
+dirty = [
+    {'street': f'  {i} Main Street ', 'city': ' Seoul', 'code': f'AB{i % 1000:03}  ', 'country': 'kr'}
+    for i in range(ROWS)
+]
+clean = [
+    {'street': f'{i} Main Street', 'city': 'Seoul', 'code': f'ab{i % 1000:03}', 'country': 'KR'}
+    for i in range(ROWS)
+]
+
+stock = SchemaValidator(core_schema.list_schema(Address.__pydantic_core_schema__))
+for name, rows in (('dirty', dirty), ('clean', clean)):
+    assert stock.validate_python(rows) == addresses.validate_python(rows)
+    stock_seconds = min(repeat(lambda: stock.validate_python(rows), number=1, repeat=5))
+    batch_seconds = min(repeat(lambda: addresses.validate_python(rows), number=1, repeat=5))
+    print(f"{name:<6} {'list[Address]':<28} {ROWS / stock_seconds:>12,.0f} rows/s")
+    print(f"{name:<6} {'NormalizingBatchValidator':<28} {ROWS / batch_seconds:>12,.0f} rows/s "
+          f"x{stock_seconds / batch_seconds:.2f}")
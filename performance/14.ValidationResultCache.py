@@ -0,0 +1,313 @@
+"""
+`basics/2. (De)Serialization.py` 의 `Person.model_validate_json(json_data)`는 같은 payload가 다시 들어와도 매번 파싱하고 검증한다.
+- 게이트웨이에서는 재시도, fan-out, polling 클라이언트 때문에 byte 단위로 똑같은 payload가 반복해서 들어오는 경우가 많다.
+
+ValidationCache는 (모델, 원본 payload, strict) 조합 별로 검증 결과를 캐시한다.(opt-in)
+- key는 원본 payload(str/bytes) 자체이다. bytes의 hash는 C로 계산되고 객체에 캐시되며, 충돌하더라도 값 비교로 구분된다.
+- 캐시된 인스턴스를 그대로 돌려주면, 호출자가 수정했을 때 다른 호출자에게 영향을 주므로 인스턴스의 상태에 따라 돌려주는 방법이 다르다.
+  - frozen 모델이고 모든 값이 immutable(str, int, tuple, frozen 모델 등): 캐시된 인스턴스를 공유한다.
+  - frozen이 아니지만 모든 값이 immutable: `__dict__`만 복사한 새 인스턴스를 돌려준다.
+    - 벤치마크 결과 필드가 3개인 작은 모델(Person)은 복사와 lock 비용 때문에 캐시하지 않는 것보다 느리다.(x0.65~0.9)
+      검증 비용이 큰 모델(필드가 많거나, 검증기가 무거운 모델)에서만 사용한다.
+  - model_post_init이 있는(private attribute 포함) 모델은 frozen이라도 복사한 뒤 model_post_init을 다시 실행한다.
+  - list, dict 등 mutable 값을 포함: 캐시하지 않는다.
+    - 깊은 복사(model_copy(deep=True))는 벤치마크 결과 다시 검증하는 것보다 느리다.
+    - 호출자가 결과를 수정하지 않는다면(읽기 전용), share_mutable=True로 캐시된 인스턴스를 공유하도록 할 수 있다.
+- 크기 제한
+  - max_entries: 항목 수, max_bytes: 캐시된 payload와 인스턴스 크기의 합. 넘으면 가장 오래 사용되지 않은 항목부터 제거한다.(LRU)
+    - 인스턴스 크기는 모델 별로 처음 저장할 때 한 번, 인스턴스와 값들의 sys.getsizeof()를 더해서 (payload 크기 대비) 비율을 구한다.
+      이후에는 `payload 크기 x 비율`로 추정한다.(모든 객체를 따라가며 크기를 계산하면 검증보다 몇 배 느리다.)
+  - max_entry_bytes보다 큰 payload는 캐시하지 않는다.
+  - ttl(초): 저장된 지 ttl초가 지난 항목은 사용하지 않고 제거한다.
+- stats()로 hits/misses/evictions/expirations 와 현재 항목 수, 크기를 확인할 수 있다.
+- 검증에 실패한 payload와 context를 사용하는 검증은 캐시하지 않는다.(context에 따라 결과가 달라질 수 있다.)
+
+* 참고사항: sys.getsizeof()는 interning 된 문자열, 작은 int 처럼 다른 곳과 공유하는 객체도 세므로, 실제보다 조금 크게 계산된다.
+"""
+import sys
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from enum import Enum
+from time import monotonic
+from timeit import timeit
+from typing import Any, Callable, Hashable, NamedTuple, TypeVar
+from uuid import UUID
+
+from pydantic import BaseModel, ConfigDict, PrivateAttr, ValidationError
+
+ModelT = TypeVar('ModelT', bound=BaseModel)
+
+_IMMUTABLE_TYPES = (str, bytes, int, float, complex, bool, Decimal, date, datetime, time, timedelta, UUID, Enum)
+
+_SHARE, _SHALLOW_COPY = 'share', 'shallow'
+_new_instance = object.__new__
+_set_fields_set = BaseModel.__dict__['__pydantic_fields_set__'].__set__
+_set_extra = BaseModel.__dict__['__pydantic_extra__'].__set__
+_set_private = BaseModel.__dict__['__pydantic_private__'].__set__
+
+
+class CacheStats(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    entries: int
+    bytes: int
+
+
+class _Entry(NamedTuple):
+    instance: BaseModel
+    policy: str  # 캐시된 인스턴스를 돌려주는 방법: _SHARE, _SHALLOW_COPY
+    size: int
+    expires_at: float
+
+
+class ValidationCache:
+    def __init__(
+        self,
+        max_entries: int = 10_000,
+        max_bytes: int = 64 * 1024 * 1024,
+        max_entry_bytes: int = 64 * 1024,
+        ttl: float | None = None,
+        share_mutable: bool = False,
+        clock: Callable[[], float] = monotonic,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.ttl = ttl
+        self.share_mutable = share_mutable
+        self._clock = clock
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self._bytes = 0
+        self._size_ratios: dict[type[BaseModel], float] = {}  # 모델 별 (인스턴스 크기 / payload 크기)
+        self._lock = threading.Lock()
+        self._hits = self._misses = self._evictions = self._expirations = 0
+
+    def validate_json(
+        self, model: type[ModelT], json_data: str | bytes | bytearray, *, strict: bool | None = None, context: dict | None = None
+    ) -> ModelT:
+        if context is not None or len(json_data) > self.max_entry_bytes:
+            return model.model_validate_json(json_data, strict=strict, context=context)
+        if not isinstance(json_data, (str, bytes)):
+            json_data = bytes(json_data)  # bytearray, memoryview는 hash 할 수 없다.
+
+        key = (model, json_data, strict)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if self.ttl is not None and entry.expires_at <= self._clock():
+                    self._remove(key)
+                    self._expirations += 1
+                else:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return _clone(entry.instance, entry.policy)
+            self._misses += 1
+
+        instance = model.model_validate_json(json_data, strict=strict)
+        policy = _policy(instance, self.share_mutable)
+        if policy is None:
+            return instance
+        expires_at = self._clock() + self.ttl if self.ttl is not None else 0.0
+        with self._lock:
+            if key in self._entries:  # 다른 스레드가 먼저 저장한 경우
+                self._remove(key)
+            size = len(json_data) + self._estimate_size(instance, len(json_data))
+            self._entries[key] = _Entry(instance, policy, size, expires_at)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._evictions += 1
+        return _clone(instance, policy)
+
+    def stats(self) -> CacheStats:
+        return CacheStats(self._hits, self._misses, self._evictions, self._expirations, len(self._entries), self._bytes)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _estimate_size(self, instance: BaseModel, payload_size: int) -> int:
+        ratio = self._size_ratios.get(type(instance))
+        if ratio is None:
+            ratio = self._size_ratios[type(instance)] = _instance_size(instance) / max(payload_size, 1)
+        return int(payload_size * ratio)
+
+    def _remove(self, key: Hashable) -> None:
+        self._bytes -= self._entries.pop(key).size
+
+
+def _policy(instance: BaseModel, share_mutable: bool) -> str | None:
+    if share_mutable:
+        return _SHARE
+    if not _is_immutable(instance, require_frozen=False):
+        return None
+    if instance.model_config.get('frozen') and not type(instance).__pydantic_post_init__:
+        return _SHARE
+    return _SHALLOW_COPY  # model_post_init은 인스턴스마다 실행되어야 하므로 공유하지 않는다.
+
+
+def _is_immutable(value: Any, require_frozen: bool = True) -> bool:
+    if value is None or isinstance(value, _IMMUTABLE_TYPES):
+        return True
+    if isinstance(value, (tuple, frozenset)):
+        return all(map(_is_immutable, value))
+    if isinstance(value, BaseModel):
+        # 중첩된 모델은 frozen이어야 한다. 최상위 모델은 복사하므로 frozen이 아니어도 되고,
+        # private attribute는 복사한 뒤 model_post_init에서 다시 초기화된다.
+        if require_frozen and not value.model_config.get('frozen'):
+            return False
+        return (
+            (not require_frozen or not value.__pydantic_private__)
+            and all(map(_is_immutable, value.__dict__.values()))
+            and all(map(_is_immutable, (value.__pydantic_extra__ or {}).values()))
+        )
+    return False
+
+
+def _clone(instance: ModelT, policy: str) -> ModelT:
+    if policy == _SHARE:
+        return instance
+    # 값이 모두 immutable 이므로, 인스턴스의 상태(dict, set)만 복사하면 된다.(model_copy()보다 빠르다.)
+    clone = _new_instance(type(instance))
+    clone.__dict__.update(instance.__dict__)
+    _set_fields_set(clone, instance.__pydantic_fields_set__.copy())
+    _set_extra(clone, instance.__pydantic_extra__ and instance.__pydantic_extra__.copy())
+    _set_private(clone, None)
+    if type(clone).__pydantic_post_init__:  # model_post_init, private attribute 초기화
+        clone.model_post_init(None)
+    return clone
+
+
+def _instance_size(value: Any, seen: set[int] | None = None) -> int:
+    seen = set() if seen is None else seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, BaseModel):
+        # 필드 이름(key)은 클래스와 공유하는 문자열이므로 세지 않는다.
+        size += sys.getsizeof(value.__dict__) + sys.getsizeof(value.__pydantic_fields_set__)
+        size += sum(_instance_size(item, seen) for item in value.__dict__.values())
+        size += sum(_instance_size(item, seen) for item in (value.__pydantic_extra__, value.__pydantic_private__) if item)
+    elif isinstance(value, dict):
+        size += sum(_instance_size(item, seen) for pair in value.items() for item in pair)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(_instance_size(item, seen) for item in value)
+    return size
+
+
+class Person(BaseModel):
+    first_name: str
+    last_name: str
+    age: int
+
+
+class ImmutableModel(BaseModel):
+    a: int
+    b: int
+    model_config = ConfigDict(frozen=True)
+
+
+class Team(BaseModel):
+    name: str
+    members: list[Person]
+
+
+cache = ValidationCache(max_entries=3)
+json_data = b'{"first_name": "Seongyeon", "last_name": "Kim", "age": 29}'
+
+# 1. mutable 모델: 호출자마다 다른 인스턴스를 받으므로, 수정해도 캐시에 영향을 주지 않는다.
+p1 = cache.validate_json(Person, json_data)
+p1.age = 30
+p2 = cache.validate_json(Person, json_data)
+print(p2, p1 is p2)  # 출력: first_name='Seongyeon' last_name='Kim' age=29 False
+print(p2 == Person.model_validate_json(json_data), p2.model_fields_set)  # 출력: True {'first_name', 'last_name', 'age'}
+assert p2.age == 29 and p1 is not p2, '수정한 결과가 캐시에 영향을 주면 안 된다.'
+
+# 2. frozen 모델: 캐시된 인스턴스를 공유한다.
+m1 = cache.validate_json(ImmutableModel, '{"a": 1, "b": 2}')
+print(m1 is cache.validate_json(ImmutableModel, '{"a": 1, "b": 2}'))  # 출력: True
+assert m1 is cache.validate_json(ImmutableModel, '{"a": 1, "b": 2}'), 'frozen 모델은 인스턴스를 공유한다.'
+try:
+    m1.a = 10
+except ValidationError as ex:
+    print(ex.errors()[0]['type'])  # 출력: frozen_instance
+
+# 3. mutable 값(list)을 포함한 모델: 기본적으로 캐시하지 않으므로, list를 수정해도 다른 호출자에게 영향을 주지 않는다.
+team_json = b'{"name": "core", "members": [{"first_name": "Seongyeon", "last_name": "Kim", "age": 29}]}'
+cache.validate_json(Team, team_json).members.clear()
+print(len(cache.validate_json(Team, team_json).members))  # 출력: 1
+assert cache.validate_json(Team, team_json).members, 'mutable 값을 수정해도 다른 호출자에게 영향을 주면 안 된다.'
+
+read_only_cache = ValidationCache(share_mutable=True)  # 결과를 수정하지 않는 읽기 전용 경로
+print(read_only_cache.validate_json(Team, team_json) is read_only_cache.validate_json(Team, team_json))  # 출력: True
+
+# 4. strict 여부는 key에 포함된다. 검증에 실패한 payload는 캐시하지 않는다.
+try:
+    cache.validate_json(ImmutableModel, '{"a": "1", "b": 2}', strict=True)
+except ValidationError as ex:
+    print(ex.errors(include_url=False))
+    # 출력: [{'type': 'int_type', 'loc': ('a',), 'msg': 'Input should be a valid integer', 'input': '1'}]
+print(cache.validate_json(ImmutableModel, '{"a": "1", "b": 2}'))  # 출력: a=1 b=2
+cache.validate_json(Person, b'{"first_name": "Isaac", "last_name": "Newton", "age": 84}')  # max_entries=3을 넘는다.
+print(cache.stats())  # 출력: CacheStats(hits=3, misses=8, evictions=1, expirations=0, entries=3, bytes=...)
+
+# 5. TTL: 시계를 직접 넘겨 만료를 확인한다.
+now = [0.0]
+ttl_cache = ValidationCache(ttl=60, clock=lambda: now[0])
+ttl_cache.validate_json(Person, json_data)
+now[0] = 61
+ttl_cache.validate_json(Person, json_data)
+print(ttl_cache.stats())  # 출력: CacheStats(hits=0, misses=2, evictions=0, expirations=1, entries=1, bytes=676)
+# bytes: payload 58 bytes + 인스턴스(__dict__, fields_set, 값) 618 bytes
+
+
+# 6. model_post_init이 있는 모델: 캐시된 값으로 만든 인스턴스마다 model_post_init이 실행된다.
+class Session(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    user: str
+    _requests: list[str] = PrivateAttr(default_factory=list)
+
+
+s1 = cache.validate_json(Session, '{"user": "kim"}')
+s1._requests.append('GET /')
+hits = cache.stats().hits
+s2 = cache.validate_json(Session, '{"user": "kim"}')
+print(s1 is s2, s2._requests)  # 출력: False [] | 캐시에서 가져왔지만 private attribute는 새로 초기화된다.
+assert cache.stats().hits == hits + 1 and s2._requests == [], 'private attribute는 인스턴스마다 초기화된다.'
+
+print()
+print("--------------------")
+
+# 벤치마크: DISTINCT개의 서로 다른 payload가 반복되는 요청 N개를 검증하는 시간
+N = 100_000
+DISTINCT = 100
+
+
+def person_payload(i: int) -> bytes:
+    return f'{{"first_name": "first-{i}", "last_name": "last-{i}", "age": {i % 100}}}'.encode()
+
+
+def team_payload(i: int) -> bytes:
+    members = ','.join(person_payload(i * 100 + j).decode() for j in range(100))
+    return f'{{"name": "team-{i}", "members": [{members}]}}'.encode()
+
+
+workloads = {
+    'Person (shallow copy)': (Person, [person_payload(i % DISTINCT) for i in range(N)]),
+    'ImmutableModel (share)': (ImmutableModel, [f'{{"a": {i % DISTINCT}, "b": 2}}'.encode() for i in range(N)]),
+    'Team, 100 members (not cached)': (Team, [team_payload(i % DISTINCT) for i in range(N // 100)]),
+    'Team, 100 members (share_mutable)': (Team, [team_payload(i % DISTINCT) for i in range(N // 100)]),
+}
+for name, (model, payloads) in workloads.items():
+    benchmark_cache = ValidationCache(share_mutable='share_mutable' in name)
+    uncached = timeit(lambda: [model.model_validate_json(payload) for payload in payloads], number=1)
+    cached = timeit(lambda: [benchmark_cache.validate_json(model, payload) for payload in payloads], number=1)
+    print(f"{name:<34} model_validate_json {uncached * 1e6 / len(payloads):8.2f} µs/request, "
+          f"ValidationCache {cached * 1e6 / len(payloads):8.2f} µs/request x{uncached / cached:.2f}")
@@ -0,0 +1,168 @@
+"""
+`basics/1.Pydantic의 BaseModel 사용하기.py`, `basics/2. (De)Serialization.py` 에서는 model_validate_json()에 str을 넘겼다.
+- 실제 서비스에서는 socket, 파일에서 bytes로 데이터를 받는다.
+- bytes를 str로 decode 하면 같은 데이터가 메모리에 두 번 존재하고, 일부 구간만 검증하려고 slice 하면 또 복사된다.
+  - ASCII가 아닌 문자(한글 등)가 포함된 str은 문자 하나에 2~4 bytes를 사용하고,
+    pydantic-core가 읽기 위한 UTF-8 사본도 str 객체 안에 따로 만들어진다.
+
+validate_json_buffer()는 bytes, bytearray, memoryview, mmap을 str로 decode 하지 않고 검증한다.
+- pydantic-core(2.18)는 str, bytes, bytearray만 입력으로 받으며, 이 타입들은 복사하지 않고 그대로 읽는다.
+  - bytes, bytearray 전체: 복사 없이 그대로 넘긴다.
+  - bytes, bytearray 전체를 가리키는 memoryview: 원본 객체(memoryview.obj)를 넘긴다.(복사 없음)
+  - 그 외(일부 구간, mmap 등): 검증할 구간만 bytes로 한 번 복사한다.(파일 전체나 str 사본은 만들지 않는다.)
+- start, end로 버퍼의 일부 구간(예: 헤더 뒤의 JSON body)만 검증할 수 있다.
+  - 파일의 일부 구간이라면 파일 전체를 read() 하지 않고 mmap의 구간을 검증하면, 해당 구간만 한 번 복사된다.
+
+벤치마크는 tracemalloc으로 입력을 읽고 검증하는 동안의 최대 메모리 사용량을 비교한다.
+"""
+import mmap
+import os
+import tempfile
+import tracemalloc
+from typing import Any, TypeVar
+
+from pydantic import BaseModel
+
+ModelT = TypeVar('ModelT', bound=BaseModel)
+
+Buffer = bytes | bytearray | memoryview | mmap.mmap
+
+
+def as_json_input(buffer: Buffer, start: int = 0, end: int | None = None) -> bytes | bytearray:
+    """pydantic-core가 읽을 수 있는 입력(bytes, bytearray)으로 변환한다. 가능하면 복사하지 않는다."""
+    size = len(buffer) if not isinstance(buffer, memoryview) else buffer.nbytes
+    end = size if end is None else end
+    whole = start == 0 and end == size
+    if isinstance(buffer, (bytes, bytearray)) and whole:
+        return buffer
+    if isinstance(buffer, memoryview):
+        if buffer.format not in ('B', 'b', 'c') or not buffer.c_contiguous:
+            buffer = buffer.cast('B')
+        obj = buffer.obj
+        if whole and isinstance(obj, (bytes, bytearray)) and len(obj) == size:
+            return obj
+        return buffer[start:end].tobytes()
+    # 일부 구간, mmap: 검증할 구간만 복사한다.
+    return buffer[start:end]
+
+
+def validate_json_buffer(
+    model: type[ModelT],
+    buffer: Buffer,
+    start: int = 0,
+    end: int | None = None,
+    *,
+    strict: bool | None = None,
+    context: dict[str, Any] | None = None,
+) -> ModelT:
+    return model.model_validate_json(as_json_input(buffer, start, end), strict=strict, context=context)
+
+
+class Person(BaseModel):
+    first_name: str
+    last_name: str
+    age: int
+
+
+class Directory(BaseModel):
+    people: list[Person]
+
+
+json_bytes = b'{"first_name": "Seongyeon", "last_name": "Kim", "age": 29}'
+print(validate_json_buffer(Person, json_bytes))  # 출력: first_name='Seongyeon' last_name='Kim' age=29
+print(validate_json_buffer(Person, bytearray(json_bytes)))  # 출력: first_name='Seongyeon' last_name='Kim' age=29
+print(validate_json_buffer(Person, memoryview(json_bytes)))  # 출력: first_name='Seongyeon' last_name='Kim' age=29
+print(as_json_input(memoryview(json_bytes)) is json_bytes)  # 출력: True | memoryview의 원본 bytes를 그대로 사용한다.
+
+# 헤더(길이 prefix) 뒤에 JSON body가 있는 메시지: body 구간만 검증한다.
+message = len(json_bytes).to_bytes(4, 'big') + json_bytes + b'<trailing frame>'
+body_size = int.from_bytes(message[:4], 'big')
+print(validate_json_buffer(Person, memoryview(message), 4, 4 + body_size))
+# 출력: first_name='Seongyeon' last_name='Kim' age=29
+
+with tempfile.TemporaryFile() as file:
+    file.write(json_bytes)
+    file.flush()
+    with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        print(validate_json_buffer(Person, mm))  # 출력: first_name='Seongyeon' last_name='Kim' age=29
+
+print()
+print("--------------------")
+
+# 벤치마크: 약 35MB JSON 파일을 읽고 검증하는 동안의 최대 메모리 사용량(tracemalloc)
+# - 이름에 한글이 포함되어 있으므로, str로 decode 하면 문자 하나에 2 bytes(UCS-2)를 사용한다.
+# - 검증 결과(Directory 인스턴스)가 사용하는 메모리는 모든 방법에서 같으므로, 차이는 입력 사본의 크기이다.
+PEOPLE = 200_000
+people = ','.join(
+    f'{{"first_name": "성연{i}", "last_name": "김{i}", "age": {i % 100}, "bio": "{"안녕하세요 " * 6}"}}'
+    for i in range(PEOPLE)
+)
+payload = f'{{"people": [{people}]}}'.encode()
+del people
+framed = len(payload).to_bytes(4, 'big') + payload
+
+path = os.path.join(tempfile.mkdtemp(), 'directory.json')
+with open(path, 'wb') as f:
+    f.write(payload)
+framed_path = path + '.framed'
+with open(framed_path, 'wb') as f:
+    f.write(framed)
+del payload, framed
+
+
+def str_path() -> Directory:
+    with open(path, encoding='utf-8') as f:
+        return Directory.model_validate_json(f.read())
+
+
+def bytes_path() -> Directory:
+    with open(path, 'rb') as f:
+        return validate_json_buffer(Directory, f.read())
+
+
+def mmap_path() -> Directory:
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return validate_json_buffer(Directory, mm)
+
+
+def framed_str_path() -> Directory:
+    with open(framed_path, 'rb') as f:
+        data = f.read()
+    return Directory.model_validate_json(data[4:].decode())
+
+
+def framed_buffer_path() -> Directory:
+    with open(framed_path, 'rb') as f:
+        data = f.read()
+    return validate_json_buffer(Directory, memoryview(data), 4)
+
+
+def framed_mmap_path() -> Directory:
+    with open(framed_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return validate_json_buffer(Directory, mm, 4, 4 + int.from_bytes(mm[:4], 'big'))
+
+
+def measure(func) -> tuple[int, int]:
+    tracemalloc.start()
+    result = func()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return peak, current
+
+
+print(f"payload size: {os.path.getsize(path) / 1e6:.1f} MB")
+for name, func in (
+    ('read() str -> model_validate_json', str_path),
+    ('read() bytes -> validate_json_buffer', bytes_path),
+    ('mmap -> validate_json_buffer', mmap_path),
+    ('framed: slice + decode -> str', framed_str_path),
+    ('framed: memoryview range', framed_buffer_path),
+    ('framed: mmap range', framed_mmap_path),
+):
+    peak, result_size = measure(func)
+    print(f"{name:<38} peak {peak / 1e6:8.1f} MB (input buffers {(peak - result_size) / 1e6:8.1f} MB)")
+
+os.remove(path)
+os.remove(framed_path)
+os.rmdir(os.path.dirname(path))
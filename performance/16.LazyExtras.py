@@ -0,0 +1,351 @@
+"""
+`model configuration/1.ExtraFieldsHandling.py` 의 AllowExtraFields(extra="allow")는 필요한 필드만 검증하고 나머지는 그대로 사용할 수 있다.
+- 그러나 검증하지 않는 추가 필드도 모두 Python 객체로 변환되어 `__pydantic_extra__`에 저장되고, model_dump() 할 때 다시 직렬화된다.
+- key가 10,000개인 JSON 문서에서 필드 3개만 확인하는 경우, 대부분의 시간이 추가 필드를 변환하는 데 사용된다.
+
+LazyExtrasModel은 model_validate_json()으로 검증할 때 추가 필드를 변환하지 않고, 원본 JSON(str/bytes)을 그대로 보관한다.
+- 검증은 extra="ignore"로 바꾼 검증기로 한다.(선언한 필드만 변환한다.)
+- 추가 필드는 처음 사용할 때 원본 JSON에서 변환한다.(model_extra, 속성 접근, model_dump(), dict(), ==, repr 등)
+  - 변환된 결과는 extra="allow"로 검증한 것과 같다.(model_extra, model_fields_set 포함)
+  - 추가 필드는 검증하지 않는 JSON 값이므로 표준 라이브러리 json.loads()로 변환한다.(벤치마크 문서에서 pydantic_core.from_json()보다 빠르다.)
+- 추가 필드를 결국 모두 사용하는 경우(validate + model_extra, 필드 수정 후 model_dump_json)는
+  필드 검증과 추가 필드 변환을 따로 하므로 extra="allow"보다 조금 느리다.(벤치마크 x0.93)
+- extra="allow"일 때만 동작한다. 하위 클래스가 extra="forbid"/"ignore"로 바꾸면 기존과 같이 검증한다.
+- 전방 참조가 있는 모델은 model_rebuild()(자동 rebuild 포함)로 완성된 뒤부터 동작한다.
+- model_dump_json()은 원본 JSON을 그대로(verbatim) 돌려준다. 단, 다음 조건을 모두 만족해야 한다.
+  - 인자 없이 호출하고, 필드를 수정하지 않았고, 추가 필드를 변환한 적이 없다.
+  - 모든 필드가 JSON 값을 그대로 사용하는 타입(int, float, str, bool, None, Optional)이고, alias, serializer, computed_field,
+    문자열 변환(str_strip_whitespace 등)이 없다.
+    - float 필드는 allow_inf_nan=False일 때만 해당한다. NaN, Infinity는 JSON 값이 아니므로, model_dump_json()은 null로 직렬화한다.
+  - 모든 필드가 입력에 있고, strict 모드로 검증된다.(lax 모드의 형변환("1" -> 1)이 없다.)
+    - strict 검증에 실패하면 lax 모드로 한 번 더 검증한다. 이 경우 JSON을 두 번 파싱하지만, 여전히 extra="allow" 보다 빠르다.
+  - 조건을 만족하지 않으면 추가 필드를 변환한 뒤 기존과 같이 직렬화한다.
+  - 원본 JSON과 key 순서, 공백, escape 표기는 다를 수 있지만, 같은 JSON 값을 나타낸다.
+
+* 참고사항: 요청은 추가 필드 구간만 잘라 원본 그대로 이어 붙이는(splice) 방식이었지만,
+  pydantic-core는 key의 위치(구간)를 알려주지 않고, Python으로 JSON을 토큰 단위로 읽으면 pydantic-core가 전체를 직렬화하는 것보다 느리다.
+  (벤치마크 문서 기준 Python 스캐너 약 54ms, extra="allow" model_dump_json() 약 8ms)
+  그래서 원본 전체를 그대로 사용할 수 있는 경우에만 원본을 사용하고, 그 외에는 추가 필드를 변환한다.
+* 주의사항: `__pydantic_extra__`를 직접 읽으면 변환 전에는 None이다. model_extra를 사용한다.
+"""
+import json
+from timeit import repeat
+from typing import Any, ClassVar, Optional
+
+from pydantic import BaseModel, ConfigDict, ValidationError
+from pydantic_core import SchemaValidator
+
+from _playground import find_model_schema, input_keys, replace_model_schema
+
+_JSON_NATIVE_SCHEMAS = frozenset({'int', 'float', 'str', 'bool', 'none'})
+_STR_TRANSFORMS = (('strip_whitespace', 'str_strip_whitespace'), ('to_lower', 'str_to_lower'), ('to_upper', 'str_to_upper'))
+
+
+class LazyExtrasModel(BaseModel):
+    __slots__ = ('_lazy_state',)  # (원본 JSON, 원본을 그대로 직렬화할 수 있는지) 또는 미설정(일반 인스턴스)
+
+    model_config = ConfigDict(extra='allow')
+
+    __lazy_validator__: ClassVar[SchemaValidator]
+    __lazy_field_keys__: ClassVar[frozenset[str]]  # 필드가 사용하는 입력 key: 추가 필드에서 제외한다.
+    __lazy_verbatim__: ClassVar[bool]
+    __lazy_enabled__: ClassVar[bool]  # extra="allow"일 때만 추가 필드를 나중에 변환한다.
+
+    @classmethod
+    def __pydantic_init_subclass__(cls, **kwargs: Any) -> None:
+        super().__pydantic_init_subclass__(**kwargs)
+        cls._build_lazy()
+
+    @classmethod
+    def model_rebuild(
+        cls,
+        *,
+        force: bool = False,
+        raise_errors: bool = True,
+        _parent_namespace_depth: int = 2,
+        _types_namespace: dict[str, Any] | None = None,
+    ) -> bool | None:
+        # 이 메소드를 거치는 만큼 호출한 쪽의 frame이 한 단계 멀어진다.
+        rebuilt = super().model_rebuild(
+            force=force, raise_errors=raise_errors, _parent_namespace_depth=_parent_namespace_depth + 1, _types_namespace=_types_namespace
+        )
+        if rebuilt:
+            cls._build_lazy()
+        return rebuilt
+
+    @classmethod
+    def _build_lazy(cls) -> None:
+        if not cls.__pydantic_complete__:
+            # 전방 참조가 해결되지 않아 core schema가 없다. model_validate_json()은 기존 방식(자동 rebuild 포함)으로 동작한다.
+            cls.__lazy_enabled__ = False
+            return
+        schema = cls.__pydantic_core_schema__
+        model_schema = find_model_schema(schema)
+        config = model_schema.get('config') or {}
+        # 하위 클래스가 extra="forbid"/"ignore"로 바꾸었다면, 추가 필드를 보관하지 않으므로 기존과 같이 검증한다.
+        cls.__lazy_enabled__ = config.get('extra_fields_behavior') == 'allow'
+        fields_schema = model_schema['schema']
+        cls.__lazy_field_keys__ = frozenset(
+            key for name, field in fields_schema['fields'].items() for key in input_keys(name, field, config)
+        )
+        cls.__lazy_verbatim__ = (
+            not cls.__pydantic_decorators__.model_validators  # model_validator는 값을 바꿀 수 있으므로 원본을 사용하지 않는다.
+            and 'serialization' not in model_schema
+            and not fields_schema.get('computed_fields')
+            and all(_is_verbatim_field(name, field, config) for name, field in fields_schema['fields'].items())
+        )
+
+        ignore_config = {**config, 'extra_fields_behavior': 'ignore'}
+        cls.__lazy_validator__ = SchemaValidator(replace_model_schema(schema, config=ignore_config), ignore_config)
+
+    @classmethod
+    def model_validate_json(
+        cls, json_data: str | bytes | bytearray, *, strict: bool | None = None, context: dict[str, Any] | None = None
+    ) -> 'LazyExtrasModel':
+        __tracebackhide__ = True
+        if not cls.__lazy_enabled__:
+            return super().model_validate_json(json_data, strict=strict, context=context)
+        if isinstance(json_data, bytearray):
+            json_data = bytes(json_data)  # 호출자가 bytearray를 수정할 수 있으므로 보관할 사본을 만든다.
+        verbatim = cls.__lazy_verbatim__ and strict is not False
+        if verbatim:
+            try:
+                instance = cls.__lazy_validator__.validate_json(json_data, strict=True, context=context)
+            except ValidationError:
+                if strict:
+                    raise
+                verbatim = False
+        if not verbatim:
+            instance = cls.__lazy_validator__.validate_json(json_data, strict=strict, context=context)
+        verbatim = verbatim and len(instance.__pydantic_fields_set__) == len(cls.model_fields)
+        _set_lazy_state(instance, (json_data, verbatim))
+        return instance
+
+    @property
+    def model_extra(self) -> dict[str, Any] | None:
+        self._materialize()
+        return self.__pydantic_extra__
+
+    @property
+    def model_fields_set(self) -> set[str]:
+        self._materialize()  # extra="allow"로 검증하면 추가 필드도 fields_set에 포함된다.
+        return self.__pydantic_fields_set__
+
+    def model_dump(self, **kwargs: Any) -> dict[str, Any]:
+        self._materialize()
+        return super().model_dump(**kwargs)
+
+    def model_dump_json(self, **kwargs: Any) -> str:
+        state = _get_lazy_state(self)
+        if state is not None and state[1] and not kwargs:
+            json_data = state[0]
+            return json_data if isinstance(json_data, str) else json_data.decode()
+        self._materialize()
+        return super().model_dump_json(**kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        if not name.startswith('_'):
+            self._materialize()
+        return super().__getattr__(name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        state = _get_lazy_state(self)
+        if state is not None:
+            if name in self.model_fields:
+                _set_lazy_state(self, (state[0], False))  # 수정된 필드는 원본과 다르다.
+            elif not name.startswith('_'):
+                self._materialize()  # 추가 필드
+        super().__setattr__(name, value)
+
+    def __delattr__(self, name: str) -> None:
+        self._materialize()
+        super().__delattr__(name)
+
+    def __iter__(self):
+        self._materialize()
+        return super().__iter__()
+
+    def __eq__(self, other: Any) -> bool:
+        self._materialize()
+        if isinstance(other, LazyExtrasModel):
+            other._materialize()
+        return super().__eq__(other)
+
+    def __repr_args__(self):
+        self._materialize()
+        return super().__repr_args__()
+
+    def __copy__(self):
+        self._materialize()
+        return super().__copy__()
+
+    def __deepcopy__(self, memo: dict[int, Any] | None = None):
+        self._materialize()
+        return super().__deepcopy__(memo)
+
+    def __getstate__(self) -> dict[Any, Any]:
+        self._materialize()
+        return super().__getstate__()
+
+    def _materialize(self) -> None:
+        """원본 JSON에서 추가 필드를 변환한다. 이후에는 원본을 보관하지 않는다."""
+        state = _get_lazy_state(self)
+        if state is None:
+            return
+        field_keys = self.__lazy_field_keys__
+        extra = {key: value for key, value in json.loads(state[0]).items() if key not in field_keys}
+        _del_lazy_state(self)
+        object.__setattr__(self, '__pydantic_extra__', extra)
+        object.__setattr__(self, '__pydantic_fields_set__', self.__pydantic_fields_set__ | extra.keys())
+
+
+_lazy_state = LazyExtrasModel.__dict__['_lazy_state']
+_set_lazy_state = _lazy_state.__set__
+_del_lazy_state = _lazy_state.__delete__
+
+
+def _get_lazy_state(instance: LazyExtrasModel) -> tuple[str | bytes, bool] | None:
+    # slot을 직접 읽으므로, 설정되지 않은 경우에도 __getattr__을 거치지 않는다.
+    try:
+        return _lazy_state.__get__(instance)
+    except AttributeError:
+        return None
+
+
+def _is_verbatim_field(name: str, field: dict[str, Any], config: dict[str, Any]) -> bool:
+    """검증된 값을 직렬화한 결과가 입력의 JSON 값과 같은 필드인지 확인한다."""
+    if field['type'] != 'model-field' or field.get('serialization_exclude'):
+        return False
+    if field.get('validation_alias', name) != name or field.get('serialization_alias', name) != name:
+        return False
+    schema = field['schema']
+    while schema['type'] in ('default', 'nullable'):
+        if 'serialization' in schema:
+            return False
+        schema = schema['schema']
+    if schema['type'] not in _JSON_NATIVE_SCHEMAS or 'serialization' in schema:
+        return False  # field_validator(function-*), datetime, 중첩 모델 등
+    if schema['type'] == 'str':
+        return not any(schema.get(key, config.get(config_key, False)) for key, config_key in _STR_TRANSFORMS)
+    if schema['type'] == 'float':
+        # 입력의 NaN, Infinity는 null로 직렬화되므로, 검증에서 거부되는 경우에만 원본을 그대로 사용한다.
+        return schema.get('allow_inf_nan', config.get('allow_inf_nan', True)) is False
+    return True
+
+
+class AllowExtraFields(LazyExtrasModel):
+    field1: int
+
+
+a1 = AllowExtraFields.model_validate_json('{"field1": 1, "field2": 2}')
+print(a1.model_dump_json())  # 출력: {"field1": 1, "field2": 2} | 원본 JSON을 그대로 사용한다.(공백 포함)
+print("a1: ", a1)  # 출력: a1:  field1=1 field2=2 | 추가 필드를 사용할 때 변환한다.
+print(a1.model_extra, a1.model_fields_set)  # 출력: {'field2': 2} {'field1', 'field2'}
+
+a4 = AllowExtraFields.model_validate_json('{"field1": 1, "field2": 2}')
+print(a4.model_fields_set)  # 출력: {'field1', 'field2'} | 추가 필드를 사용하기 전에도 extra="allow"와 같다.
+assert a4.model_fields_set == BaseModel.model_fields_set.fget(a4) == {'field1', 'field2'}
+
+a2 = AllowExtraFields.model_validate_json('{"field1": "1", "field2": 2}')  # lax 모드의 형변환("1" -> 1)
+print(a2.model_dump_json())  # 출력: {"field1":1,"field2":2} | 원본과 다르므로 추가 필드를 변환하여 직렬화한다.
+
+a3 = AllowExtraFields.model_validate_json('{"field1": 1, "field2": 2}')
+a3.field1 = 10
+print(a3.model_dump_json())  # 출력: {"field1":10,"field2":2}
+print(a3.field2, a3 == AllowExtraFields(field1=10, field2=2))  # 출력: 2 True
+
+try:
+    AllowExtraFields.model_validate_json('{"field1": "a", "field2": 2}')
+except ValidationError as ex:
+    print(ex.errors(include_url=False))
+    # 출력: [{'type': 'int_parsing', 'loc': ('field1',), 'msg': 'Input should be a valid integer, unable to parse string as an integer', 'input': 'a'}]
+
+
+class Tree(LazyExtrasModel):  # 재귀 모델: core schema가 definitions와 definition-ref로 감싸진다.
+    name: str
+    children: list['Tree'] = []
+
+
+class ForbidExtraFields(AllowExtraFields):
+    model_config = ConfigDict(extra='forbid')  # 하위 클래스가 extra 설정을 바꾸면 기존과 같이 검증한다.
+
+
+try:
+    ForbidExtraFields.model_validate_json('{"field1": 1, "field2": 2}')
+except ValidationError as ex:
+    print(ex.errors(include_url=False)[0]['type'])  # 출력: extra_forbidden
+
+tree = Tree.model_validate_json('{"name": "root", "children": [{"name": "leaf", "color": "red"}], "owner": "me"}')
+print(tree.model_extra, tree.children[0].model_extra)  # 출력: {'owner': 'me'} {'color': 'red'} | 중첩된 모델은 기존과 같이 검증된다.
+
+
+class Measurement(LazyExtrasModel):
+    x: float
+    y: int
+
+
+# NaN은 JSON 값이 아니므로 원본을 사용하지 않는다.(extra="allow"와 같이 null로 직렬화한다.)
+print(Measurement.model_validate_json('{"x": NaN, "y": 1}').model_dump_json())  # 출력: {"x":null,"y":1}
+
+
+class Folder(LazyExtrasModel):  # 전방 참조: File이 정의될 때까지 모델이 완성되지 않는다.
+    name: str
+    file: Optional['File'] = None
+
+
+class File(LazyExtrasModel):
+    path: str
+
+
+folder = Folder.model_validate_json('{"name": "docs", "file": {"path": "a.txt"}, "owner": "me"}')
+print(folder, folder.model_extra)  # 출력: name='docs' file=File(path='a.txt') owner='me' {'owner': 'me'}
+folder = Folder.model_validate_json('{"name": "docs", "owner": "me"}')  # rebuild 이후에는 추가 필드를 나중에 변환한다.
+print(_get_lazy_state(folder) is not None, folder.model_extra)  # 출력: True {'owner': 'me'}
+
+print()
+print("--------------------")
+
+
+class Document(LazyExtrasModel):
+    id: int
+    name: str
+    active: Optional[bool] = None
+
+
+class EagerDocument(BaseModel):
+    id: int
+    name: str
+    active: Optional[bool] = None
+
+    model_config = ConfigDict(extra='allow')
+
+
+# 벤치마크: key가 10,000개인 JSON 문서에서 필드 3개를 확인하는 작업
+KEYS = 10_000
+body = {f'key_{i}': {'value': i, 'tags': ['a', 'b'], 'note': f'note {i}'} for i in range(KEYS)}
+raw = json.dumps({'id': 1, 'name': 'document', 'active': True, **body}).encode()
+coerced_raw = json.dumps({'id': '1', 'name': 'document', 'active': 'true', **body}).encode()
+assert Document.model_validate_json(raw).model_dump() == EagerDocument.model_validate_json(raw).model_dump()
+assert json.loads(Document.model_validate_json(raw).model_dump_json()) == json.loads(
+    EagerDocument.model_validate_json(raw).model_dump_json())
+
+
+def modify_and_dump(model: type[BaseModel]) -> str:
+    instance = model.model_validate_json(raw)
+    instance.name = 'renamed'
+    return instance.model_dump_json()
+
+
+workloads = {
+    'validate, read 3 fields': lambda model: model.model_validate_json(raw).name,
+    'validate (coerced input)': lambda model: model.model_validate_json(coerced_raw).name,
+    'validate + model_dump_json': lambda model: model.model_validate_json(raw).model_dump_json(),
+    'validate + model_extra': lambda model: model.model_validate_json(raw).model_extra,
+    'modify field + dump_json': modify_and_dump,
+}
+print(f"payload size: {len(raw) / 1e3:.0f} KB")
+print(f"{'':<28} {'extra=allow':>14} {'LazyExtrasModel':>16}")
+for name, func in workloads.items():
+    eager = min(repeat(lambda: func(EagerDocument), number=1, repeat=7))
+    lazy = min(repeat(lambda: func(Document), number=1, repeat=7))
+    print(f"{name:<28} {eager * 1e3:11.2f} ms {lazy * 1e3:13.2f} ms x{eager / lazy:.2f}")
@@ -0,0 +1,315 @@
+"""
+`model configuration/1.ExtraFieldsHandling.py` 의 ForbidExtraFields(extra="forbid")는 모델에 없는 key가 있으면 에러를 발생시킨다.
+- 공개 API에서 key가 수천 개인 악의적인 요청을 받으면, 모든 key에 대한 에러가 하나의 ValidationError에 담긴다.
+- 벤치마크 결과 검증 자체보다, 에러 목록을 만드는(errors(), str(), json()) 비용과 메모리가 훨씬 크다.
+  - API 프레임워크는 에러 응답을 만들기 위해 errors()를 호출한다.
+
+FastForbidModel은 허용된 key(필드 이름, alias)를 클래스 정의 시점에 frozenset으로 만들어 두고 입력의 key를 먼저 확인한다.
+- dict 입력(model_validate, Model(**data)): `data.keys() <= allowed`는 C로 실행되는 집합 비교이다.
+  - 허용되지 않은 key가 없다면 지금처럼 검증한다.(추가 비용은 집합 비교 한 번)
+- `__forbid_fail_fast__ = N`: 허용되지 않은 key를 N개 찾으면, 필드를 검증하지 않고 바로 에러를 발생시킨다.(나머지 key는 확인하지 않는다.)
+- `__forbid_max_errors__ = M`(기본 10): fail-fast가 아니라면 필드 에러와 허용되지 않은 key 에러를 모아서, 최대 M개까지만 알려준다.
+  - 생략된 에러가 있다면 마지막에 `extra_forbidden_truncated` 에러로 생략된 개수를 알려준다.
+- JSON 입력(model_validate_json): JSON은 파싱하기 전에 key를 알 수 없으므로, extra="allow"로 바꾼 검증기로 파싱과 검증을 한 번에 한다.
+  - 허용되지 않은 key는 에러 대신 `__pydantic_extra__`에 모이므로, 에러를 만들지 않고 key의 개수를 알 수 있다.
+  - 추가 필드가 없다면 그대로 돌려준다.(정상 요청에는 추가 파싱이 없다.)
+  - 필드 에러가 있는 경우에만 JSON을 다시 읽어(pydantic_core.from_json) 허용되지 않은 key를 찾는다.
+  - jiter(from_json)나 json.loads(object_pairs_hook)로 key를 먼저 세면, 정상 요청도 JSON을 두 번 파싱하게 된다.
+
+* 참고사항: 전방 참조로 클래스 정의 시점에 완성되지 않은 모델은, model_rebuild()(자동 rebuild 포함)로 완성된 뒤부터 key를 먼저 확인한다.
+* 참고사항: 최상위 모델의 key만 확인한다. 중첩된 모델의 extra="forbid" 에러는 pydantic-core가 만든 그대로 사용한다.
+* 참고사항: 요청의 perfect hash는 Python의 frozenset(hash table)으로 대신한다. 필드 이름은 str이고 hash가 캐시되므로 충분히 빠르다.
+"""
+import json
+import tracemalloc
+from itertools import filterfalse, islice
+from timeit import repeat
+from typing import Any, ClassVar, Optional
+
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
+from pydantic_core import PydanticCustomError, SchemaValidator, from_json
+
+from _playground import find_model_schema, init_error, input_keys, replace_model_schema
+
+
+class FastForbidModel(BaseModel):
+    model_config = ConfigDict(extra='forbid')
+
+    __forbid_fail_fast__: ClassVar[int | None] = None
+    __forbid_max_errors__: ClassVar[int] = 10
+
+    __allowed_keys__: ClassVar[frozenset[str]] = frozenset()
+    __ignore_validator__: ClassVar[SchemaValidator]  # extra="ignore"로 바꾼 검증기: 필드 에러만 확인한다.
+    __allow_validator__: ClassVar[SchemaValidator]  # extra="allow"로 바꾼 검증기: JSON의 추가 key를 에러 없이 모은다.
+
+    @classmethod
+    def __pydantic_init_subclass__(cls, **kwargs: Any) -> None:
+        super().__pydantic_init_subclass__(**kwargs)
+        if cls.__pydantic_complete__:  # 전방 참조가 남아 있다면 model_rebuild()에서 만든다.
+            cls._build_validators()
+
+    @classmethod
+    def model_rebuild(
+        cls,
+        *,
+        force: bool = False,
+        raise_errors: bool = True,
+        _parent_namespace_depth: int = 2,
+        _types_namespace: dict[str, Any] | None = None,
+    ) -> bool | None:
+        # 이 메소드의 frame을 건너뛰도록 부모 namespace의 깊이를 1 늘린다.
+        rebuilt = super().model_rebuild(
+            force=force, raise_errors=raise_errors, _parent_namespace_depth=_parent_namespace_depth + 1, _types_namespace=_types_namespace
+        )
+        if rebuilt:
+            cls._build_validators()
+        return rebuilt
+
+    @classmethod
+    def _build_validators(cls) -> None:
+        schema = cls.__pydantic_core_schema__
+        model_schema = find_model_schema(schema)
+        config = model_schema.get('config') or {}
+        cls.__allowed_keys__ = frozenset(
+            key for name, field in model_schema['schema']['fields'].items() for key in input_keys(name, field, config)
+        )
+        # __init__을 재정의하면 pydantic-core는 model_validate()에서도 __init__을 호출(custom_init)하므로 이를 끈다.
+        # Model(**data)는 __init__에서 key를 확인하고, model_validate()는 classmethod에서 확인한다.
+        custom_init = cls.__init__ is not FastForbidModel.__init__
+        validator_schema = replace_model_schema(schema, custom_init=custom_init)
+        ignore_config = {**config, 'extra_fields_behavior': 'ignore'}
+        ignore_schema = replace_model_schema(schema, custom_init=False, config=ignore_config)
+        allow_config = {**config, 'extra_fields_behavior': 'allow'}
+        allow_schema = replace_model_schema(schema, custom_init=custom_init, config=allow_config)
+        cls.__pydantic_validator__ = SchemaValidator(validator_schema, config)
+        cls.__ignore_validator__ = SchemaValidator(ignore_schema, ignore_config)
+        cls.__allow_validator__ = SchemaValidator(allow_schema, allow_config)
+
+    def __init__(self, /, **data: Any) -> None:
+        __tracebackhide__ = True
+        # 완성되지 않은 모델은 BaseModel이 자동으로 rebuild 하고 검증한다.(이후에는 key를 먼저 확인한다.)
+        if self.__pydantic_complete__ and not data.keys() <= self.__allowed_keys__:
+            type(self)._reject(data, lambda: self.__ignore_validator__.validate_python(data, self_instance=self))
+        super().__init__(**data)
+
+    @classmethod
+    def model_validate(
+        cls, obj: Any, *, strict: bool | None = None, from_attributes: bool | None = None, context: dict[str, Any] | None = None
+    ) -> 'FastForbidModel':
+        __tracebackhide__ = True
+        if not cls.__pydantic_complete__:
+            return super().model_validate(obj, strict=strict, from_attributes=from_attributes, context=context)
+        if type(obj) is dict and not obj.keys() <= cls.__allowed_keys__:
+            cls._reject(obj, lambda: cls.__ignore_validator__.validate_python(
+                obj, strict=strict, from_attributes=from_attributes, context=context
+            ))
+        return cls.__pydantic_validator__.validate_python(obj, strict=strict, from_attributes=from_attributes, context=context)
+
+    @classmethod
+    def model_validate_json(
+        cls, json_data: str | bytes | bytearray, *, strict: bool | None = None, context: dict[str, Any] | None = None
+    ) -> 'FastForbidModel':
+        __tracebackhide__ = True
+        if not cls.__pydantic_complete__:
+            return super().model_validate_json(json_data, strict=strict, context=context)
+        try:
+            instance = cls.__allow_validator__.validate_json(json_data, strict=strict, context=context)
+        except ValidationError as ex:
+            # 필드 에러가 있는 경우에만 JSON을 다시 읽어 허용되지 않은 key를 찾는다.
+            try:
+                data = from_json(json_data)
+            except ValueError:
+                raise ex from None  # 문법이 깨진 JSON은 원래의 json_invalid 에러를 그대로 알려준다.
+            if not isinstance(data, dict) or data.keys() <= cls.__allowed_keys__:
+                raise
+            error = ex
+
+            def validate_fields() -> None:
+                raise error
+        else:
+            data = instance.__pydantic_extra__
+            if not data:
+                object.__setattr__(instance, '__pydantic_extra__', None)  # extra="forbid"와 같이 None이다.
+                return instance
+
+            def validate_fields() -> None:
+                pass  # 필드는 이미 검증에 성공했다.
+        cls._reject(data, validate_fields)
+
+    @classmethod
+    def _error_limit(cls) -> int:
+        if cls.__forbid_fail_fast__ is None:
+            return cls.__forbid_max_errors__
+        return min(cls.__forbid_fail_fast__, cls.__forbid_max_errors__)
+
+    @classmethod
+    def _reject(cls, data: dict[str, Any], validate_fields) -> None:
+        """허용되지 않은 key가 있는 입력의 에러를 최대 __forbid_max_errors__개까지 모아서 발생시킨다."""
+        allowed = cls.__allowed_keys__
+        fail_fast = cls.__forbid_fail_fast__
+        limit = cls._error_limit()
+
+        errors = []
+        if fail_fast is None:
+            try:
+                validate_fields()
+            except ValidationError as ex:
+                errors = [init_error(error) for error in ex.errors()[:limit]]
+        forbidden = list(islice(filterfalse(allowed.__contains__, data), limit - len(errors)))
+        errors += [{'type': 'extra_forbidden', 'loc': (key,), 'input': data[key]} for key in forbidden]
+
+        if fail_fast is None:
+            # 허용된 key의 개수만 세므로, 나머지 key를 하나씩 확인하지 않는다.
+            omitted = len(data) - sum(map(data.__contains__, allowed)) - len(forbidden)
+            if omitted:
+                errors.append({
+                    'type': PydanticCustomError(
+                        'extra_forbidden_truncated', '{count} more extra inputs are not permitted', {'count': omitted}
+                    ),
+                    'loc': (),
+                    'input': omitted,
+                })
+        raise ValidationError.from_exception_data(cls.__name__, errors)
+
+
+class ForbidExtraFields(FastForbidModel):
+    field1: int
+
+
+try:
+    f1 = ForbidExtraFields(field1=1, field2=2)
+except ValueError as ex:
+    print(ex)
+    """
+    1 validation error for ForbidExtraFields
+    field2
+      Extra inputs are not permitted [type=extra_forbidden, input_value=2, input_type=int]
+        For further information visit https://errors.pydantic.dev/2.7/v/extra_forbidden
+    """
+
+junk = {f'junk_{i}': i for i in range(10_000)}
+try:
+    ForbidExtraFields.model_validate({'field1': 'a', **junk})
+except ValidationError as ex:
+    print(ex.error_count(), [error['type'] for error in ex.errors()])
+    # 출력: 11 ['int_parsing', 'extra_forbidden', ..., 'extra_forbidden', 'extra_forbidden_truncated']
+    print(ex.errors(include_url=False)[-1])
+    # 출력: {'type': 'extra_forbidden_truncated', 'loc': (), 'msg': '9991 more extra inputs are not permitted', 'input': 9991, 'ctx': {'count': 9991}}
+
+try:
+    ForbidExtraFields.model_validate_json(json.dumps({'field1': 1, **junk}))
+except ValidationError as ex:
+    print(ex.error_count())  # 출력: 11 | JSON 입력도 같은 방법으로 에러 목록을 줄인다.
+
+try:
+    ForbidExtraFields.model_validate_json(json.dumps({'field1': 'a', **junk}))
+except ValidationError as ex:
+    print(ex.error_count(), ex.errors()[0]['type'])  # 출력: 11 int_parsing | 필드 에러와 허용되지 않은 key 에러를 함께 알려준다.
+print(ForbidExtraFields.model_validate_json('{"field1": 1}').model_extra)  # 출력: None
+
+try:
+    ForbidExtraFields.model_validate_json('{"field1": 1')
+except ValidationError as ex:
+    print(ex.errors()[0]['type'])  # 출력: json_invalid | 문법이 깨진 JSON은 BaseModel과 같은 에러이다.
+
+
+class Tree(FastForbidModel):  # 재귀 모델: core schema가 definitions와 definition-ref로 감싸진다.
+    name: str
+    children: list['Tree'] = []
+
+
+try:
+    Tree.model_validate({'name': 'root', 'children': [{'name': 'leaf', 'color': 'red'}]})
+except ValidationError as ex:
+    print([(error['type'], error['loc']) for error in ex.errors()])  # 출력: [('extra_forbidden', ('children', 0, 'color'))]
+
+
+class Order(FastForbidModel):  # 전방 참조: Customer가 정의될 때까지 모델이 완성되지 않는다.
+    customer: Optional['Customer'] = None
+
+
+class Customer(FastForbidModel):
+    name: str
+
+
+print(Order(customer={'name': 'kim'}))  # 출력: customer=Customer(name='kim') | 처음 사용할 때 자동으로 rebuild 된다.
+print(Order.__allowed_keys__)  # 출력: frozenset({'customer'})
+try:
+    Order.model_validate({'customer': None, **junk})
+except ValidationError as ex:
+    print(ex.error_count())  # 출력: 11
+
+print()
+print("--------------------")
+
+
+class PublicRequest(FastForbidModel):
+    __forbid_fail_fast__ = 1  # 허용되지 않은 key를 하나라도 발견하면 바로 거부한다.
+
+    user_id: int = Field(alias='userId')
+    query: str
+    limit: int = 10
+
+
+print(PublicRequest.__allowed_keys__)  # 출력: frozenset({'userId', 'query', 'limit'}) | alias를 사용한다.
+print(PublicRequest.model_validate({'userId': 1, 'query': 'pydantic'}))  # 출력: user_id=1 query='pydantic' limit=10
+
+try:
+    PublicRequest.model_validate({'userId': 'a', 'query': 'pydantic', **junk})
+except ValidationError as ex:
+    print(ex.errors(include_url=False))
+    # 출력: [{'type': 'extra_forbidden', 'loc': ('junk_0',), 'msg': 'Extra inputs are not permitted', 'input': 0}]
+    # userId 필드는 검증하지 않는다.
+
+print()
+print("--------------------")
+
+
+# 벤치마크: 허용되지 않은 key가 10,000개인 요청을 검증하고, 에러 응답을 만드는(errors()) 비용
+class StockRequest(BaseModel):
+    model_config = ConfigDict(extra='forbid')
+
+    user_id: int = Field(alias='userId')
+    query: str
+    limit: int = 10
+
+
+class CappedRequest(FastForbidModel):
+    user_id: int = Field(alias='userId')
+    query: str
+    limit: int = 10
+
+
+valid = {'userId': 1, 'query': 'pydantic'}
+hostile = {**valid, **junk}
+valid_json = json.dumps(valid).encode()
+hostile_json = json.dumps(hostile).encode()
+
+
+def reject(func) -> list[dict[str, Any]]:
+    try:
+        func()
+    except ValidationError as ex:
+        return ex.errors()
+    raise AssertionError('expected ValidationError')
+
+
+def peak_memory(func) -> int:
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+cases = {
+    'valid dict': lambda model: model.model_validate(valid),
+    'valid JSON': lambda model: model.model_validate_json(valid_json),
+    'hostile dict': lambda model: reject(lambda: model.model_validate(hostile)),
+    'hostile JSON': lambda model: reject(lambda: model.model_validate_json(hostile_json)),
+}
+models = {'extra=forbid': StockRequest, 'FastForbidModel (max 10)': CappedRequest, 'FastForbidModel (fail-fast)': PublicRequest}
+for case, func in cases.items():
+    for name, model in models.items():
+        seconds = min(repeat(lambda: func(model), number=10, repeat=5)) / 10
+        print(f"{case:<14} {name:<28} {seconds * 1e3:9.3f} ms  peak {peak_memory(lambda: func(model)) / 1e6:7.2f} MB")
@@ -0,0 +1,138 @@
+"""
+`model configuration/2.StrictAndLaxTypeCoercion.py` 의 StrictExampleModel(strict=True)은 정확한 타입만 허용한다.
+- 그렇다면 LooseExampleModel처럼 형변환(lax) 규칙을 확인할 필요가 없으므로, strict 모델은 더 빨라야 할 것 같다.
+
+벤치마크 결과(아래 `field_1..field_4` 모델), strict 모드 자체로 얻는 이득은 거의 없다.
+- pydantic-core는 이미 schema를 만들 때 strict/lax 검증기를 따로 만든다.(strict 모델은 strict 전용 검증기를 사용한다.)
+- lax 검증기도 입력이 이미 정확한 타입이면 가장 먼저 확인하는 경로(exact type check)에서 끝나므로, 형변환 규칙을 찾지 않는다.
+- 형변환 비용은 실제로 형변환이 필요한 입력("1" -> 1 등)에서만 발생하는데, strict 모드는 이 입력을 거부한다.
+- Python으로 `type(value) is str` 등을 직접 확인하는 검증기도 만들어 보았지만, pydantic-core보다 느렸다.
+
+그래서 StrictValidator는 검증기를 새로 만들지 않고, 남아 있는 Python 호출 비용을 줄인다.
+- model_validate()는 classmethod(Python 함수)를 한 번 거친다. StrictValidator는 pydantic-core 검증기의 메소드를
+  functools.partial(strict=True)로 묶어 두므로, 호출하면 Python 함수를 거치지 않고 바로 pydantic-core가 실행된다.
+- strict=True를 검증할 때 넘기므로, 모델의 설정과 관계없이(중첩된 모델 포함) strict 모드로 검증한다.
+- validate_many_python/json은 `list[Model]` 검증기로 여러 행을 한 번에 검증하여, 행마다 발생하는 Python 호출도 없앤다.
+
+* 참고사항: 내부 서비스를 strict 모드로 바꾸는 이유는 속도가 아니라, 예상하지 못한 형변환을 막는 것이어야 한다.
+"""
+from functools import partial
+from timeit import repeat
+from typing import Any, Callable, Generic, TypeVar
+
+from pydantic import BaseModel, ConfigDict, ValidationError
+from pydantic_core import SchemaValidator, core_schema
+
+ModelT = TypeVar('ModelT', bound=BaseModel)
+
+
+class StrictValidator(Generic[ModelT]):
+    validate_python: Callable[[Any], ModelT]
+    validate_json: Callable[[str | bytes | bytearray], ModelT]
+    validate_many_python: Callable[[Any], list[ModelT]]
+    validate_many_json: Callable[[str | bytes | bytearray], list[ModelT]]
+
+    def __init__(self, model: type[ModelT]):
+        self.model = model
+        validator = model.__pydantic_validator__
+        self.validate_python = partial(validator.validate_python, strict=True)
+        self.validate_json = partial(validator.validate_json, strict=True)
+
+        schema = model.__pydantic_core_schema__
+        if schema['type'] == 'definitions':
+            list_schema = core_schema.definitions_schema(core_schema.list_schema(schema['schema']), schema['definitions'])
+        else:
+            list_schema = core_schema.list_schema(schema)
+        many = SchemaValidator(list_schema)
+        self.validate_many_python = partial(many.validate_python, strict=True)
+        self.validate_many_json = partial(many.validate_json, strict=True)
+
+
+class LooseExampleModel(BaseModel):
+    field_1: str
+    field_2: float
+    field_3: list
+    field_4: tuple
+
+
+class StrictExampleModel(BaseModel):
+    model_config = ConfigDict(strict=True)
+
+    field_1: str
+    field_2: float
+    field_3: list
+    field_4: tuple
+
+
+strict = StrictValidator(LooseExampleModel)  # 모델의 설정이 lax여도 strict 모드로 검증한다.
+print(strict.validate_python({'field_1': 'a', 'field_2': 1.5, 'field_3': [1, 2, 3], 'field_4': (1, 2, 3)}))
+# 출력: field_1='a' field_2=1.5 field_3=[1, 2, 3] field_4=(1, 2, 3)
+
+try:
+    strict.validate_python({'field_1': 100, 'field_2': 1, 'field_3': (1, 2, 3), 'field_4': [1, 2, 3]})
+except ValidationError as ex:
+    print(ex)
+    """
+    3 validation errors for LooseExampleModel
+    field_1
+      Input should be a valid string [type=string_type, input_value=100, input_type=int]
+        For further information visit https://errors.pydantic.dev/2.7/v/string_type
+    field_3
+      Input should be a valid list [type=list_type, input_value=(1, 2, 3), input_type=tuple]
+        For further information visit https://errors.pydantic.dev/2.7/v/list_type
+    field_4
+      Input should be a valid tuple [type=tuple_type, input_value=[1, 2, 3], input_type=list]
+        For further information visit https://errors.pydantic.dev/2.7/v/tuple_type
+    """
+
+print(strict.validate_many_json('[{"field_1": "a", "field_2": 1, "field_3": [1], "field_4": [2]}]'))
+# 출력: [LooseExampleModel(field_1='a', field_2=1.0, field_3=[1], field_4=(2,))] | JSON에는 tuple이 없으므로 array를 허용한다.
+
+print()
+print("--------------------")
+
+# 벤치마크: field_1..field_4 각각의 필드만 가진 모델과, 네 필드를 모두 가진 모델의 검증 처리량
+# - 입력은 모두 정확한 타입이다.(lax/strict 모두 성공하는 입력)
+SHAPES = {
+    'field_1: str': (str, 'text'),
+    'field_2: float': (float, 1.5),
+    'field_3: list': (list, [1, 2, 3]),
+    'field_4: tuple': (tuple, (1, 2, 3)),
+}
+
+
+def make_models(name: str, annotations: dict[str, type]) -> tuple[type[BaseModel], type[BaseModel]]:
+    lax = type(f'Lax{name}', (BaseModel,), {'__annotations__': annotations})
+    strict_model = type(f'Strict{name}', (BaseModel,), {'__annotations__': annotations, 'model_config': ConfigDict(strict=True)})
+    return lax, strict_model
+
+
+benchmarks = {
+    shape: (make_models(f'Field{i}', {f'field_{i}': annotation}), {f'field_{i}': value})
+    for i, (shape, (annotation, value)) in enumerate(SHAPES.items(), start=1)
+}
+benchmarks['field_1..field_4'] = (
+    (LooseExampleModel, StrictExampleModel),
+    {'field_1': 'text', 'field_2': 1.5, 'field_3': [1, 2, 3], 'field_4': (1, 2, 3)},
+)
+
+NUMBER, REPEAT, ROWS = 100_000, 5, 10_000
+
+
+def per_second(func: Callable[[], Any], number: int = NUMBER) -> float:
+    return number / min(repeat(func, number=number, repeat=REPEAT))
+
+
+print(f"{'':<18} {'lax':>12} {'strict=True':>12} {'StrictValidator':>16} {'lax list':>12} {'validate_many':>14}  (rows/s)")
+for shape, ((lax_model, strict_model), data) in benchmarks.items():
+    validator = StrictValidator(strict_model)
+    rows = [data] * ROWS
+    lax_many = SchemaValidator(core_schema.list_schema(lax_model.__pydantic_core_schema__))
+    results = [
+        per_second(lambda: lax_model.model_validate(data)),
+        per_second(lambda: strict_model.model_validate(data)),
+        per_second(lambda: validator.validate_python(data)),
+        per_second(lambda: lax_many.validate_python(rows), number=1) * ROWS,
+        per_second(lambda: validator.validate_many_python(rows), number=1) * ROWS,
+    ]
+    print(f"{shape:<18} {results[0]:>12,.0f} {results[1]:>12,.0f} {results[2]:>16,.0f} {results[3]:>12,.0f} {results[4]:>14,.0f}")
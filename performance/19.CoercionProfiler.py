@@ -0,0 +1,204 @@
+"""
+`basics/3.TypeCoercion.py` 의 `Coordinate(x=0, y='-2.2')`는 int, str 입력을 float로 조용히 변환(lax)한다.
+`model configuration/6.CoercingNumberToString.py` 의 coerce_numbers_to_str=True는 숫자 입력을 문자열로 변환한다.
+- 실제 트래픽에서 어떤 필드가 얼마나 자주 형변환되는지(정확한 타입이 아닌 입력이 들어오는지) 알 수 없다.
+  - strict 모드로 바꿔도 되는지, 어떤 클라이언트가 잘못된 타입을 보내는지 판단하려면 이 정보가 필요하다.
+
+CoercionProfiler는 모델의 필드마다 다음 횟수를 기록한다.(opt-in)
+- exact: 입력과 검증 결과의 타입이 같다.
+- 형변환 종류: 입력과 결과의 타입이 다르다. 예) 'str->float', 'int->float', 'list->tuple', 'int->str', 'dict->Address'
+- failed: 검증에 실패했다.
+
+동작 방식
+- enable(Model)은 모델의 core schema를 복사하여 모든 model-field schema를 function-wrap 검증기로 감싸고,
+  이 schema로 만든 검증기로 `Model.__pydantic_validator__`를 바꾼다.(중첩된 모델의 필드도 모델 이름으로 기록된다.)
+  - 감싼 검증기는 원래 검증기(handler)를 실행한 뒤 입력과 결과의 타입만 비교하므로, 검증 결과와 에러는 그대로이다.
+  - JSON 입력은 JSON 값 기준이다.(JSON의 array는 list, object는 dict, 숫자는 int/float)
+- disable(Model)은 원래 검증기로 되돌린다. 꺼져 있을 때는 원래 검증기를 그대로 사용하므로 추가 비용이 없다.
+- snapshot()은 {모델: {필드: {종류: 횟수}}} dict를, to_prometheus()는 Prometheus text format을 돌려준다.
+
+* 주의사항: 켜져 있는 동안에는 필드마다 Python 함수 호출이 추가되어 검증이 수 배 느려진다.
+  트래픽 일부(샘플링)나 짧은 기간에만 사용한다.
+"""
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from timeit import repeat
+from typing import Any, Callable
+
+from pydantic import BaseModel, ConfigDict, ValidationError
+from pydantic_core import SchemaValidator, core_schema
+
+from _playground import copy_schema, find_model_schema
+
+EXACT, FAILED = 'exact', 'failed'
+
+
+class CoercionProfiler:
+    def __init__(self):
+        self._counts: Counter[tuple[str, str, str]] = Counter()
+        self._lock = threading.Lock()
+        self._originals: dict[type[BaseModel], SchemaValidator] = {}
+
+    def enable(self, *models: type[BaseModel]) -> None:
+        for model in models:
+            if model in self._originals:
+                continue
+            schema = copy_schema(model.__pydantic_core_schema__)
+            self._instrument(schema)
+            self._originals[model] = model.__pydantic_validator__
+            # model_config(ConfigDict)가 아닌, core schema의 CoreConfig(str_max_length 등 이름이 다르다)를 사용한다.
+            model.__pydantic_validator__ = SchemaValidator(schema, find_model_schema(schema).get('config'))
+
+    def disable(self, *models: type[BaseModel]) -> None:
+        """지정한 모델(없으면 모든 모델)의 검증기를 원래대로 되돌린다. 기록된 횟수는 유지된다."""
+        for model in models or list(self._originals):
+            original = self._originals.pop(model, None)
+            if original is not None:
+                model.__pydantic_validator__ = original
+
+    @contextmanager
+    def profiling(self, *models: type[BaseModel]):
+        self.enable(*models)
+        try:
+            yield self
+        finally:
+            self.disable(*models)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts.clear()
+
+    def snapshot(self) -> dict[str, dict[str, dict[str, int]]]:
+        with self._lock:
+            counts = list(self._counts.items())
+        result: dict[str, dict[str, dict[str, int]]] = {}
+        for (model, field, kind), count in sorted(counts):
+            result.setdefault(model, {}).setdefault(field, {})[kind] = count
+        return result
+
+    def to_prometheus(self, metric: str = 'pydantic_field_validations_total') -> str:
+        lines = [
+            f'# HELP {metric} Field validations by outcome (exact, coerced, failed) and conversion.',
+            f'# TYPE {metric} counter',
+        ]
+        for model, fields in self.snapshot().items():
+            for field, kinds in fields.items():
+                for kind, count in kinds.items():
+                    outcome = kind if kind in (EXACT, FAILED) else 'coerced'
+                    labels = {'model': model, 'field': field, 'outcome': outcome, 'conversion': '' if outcome != 'coerced' else kind}
+                    label_text = ','.join(f'{key}="{_escape_label(value)}"' for key, value in labels.items())
+                    lines.append(f'{metric}{{{label_text}}} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def _instrument(self, schema: Any) -> None:
+        """schema 안의 모든 model schema의 필드를 기록하는 function-wrap 검증기로 감싼다."""
+        if isinstance(schema, list):
+            for item in schema:
+                self._instrument(item)
+            return
+        if not isinstance(schema, dict):
+            return
+        for value in schema.values():
+            self._instrument(value)
+        if schema.get('type') == 'model' and schema['schema'].get('type') == 'model-fields':
+            model_name = schema['cls'].__name__
+            for name, field in schema['schema']['fields'].items():
+                target = field
+                # 기본값(default)은 입력이 없을 때 사용되므로, 기본값 schema 안쪽을 감싼다.
+                if field['schema']['type'] == 'default':
+                    target = field['schema']
+                target['schema'] = core_schema.no_info_wrap_validator_function(
+                    self._recorder(model_name, name), target['schema']
+                )
+
+    def _recorder(self, model_name: str, field: str) -> Callable[[Any, Callable[[Any], Any]], Any]:
+        counts, lock = self._counts, self._lock
+        exact, failed = (model_name, field, EXACT), (model_name, field, FAILED)
+
+        def record(value: Any, handler: Callable[[Any], Any]) -> Any:
+            try:
+                result = handler(value)
+            except ValidationError:
+                with lock:
+                    counts[failed] += 1
+                raise
+            if type(result) is type(value):
+                key = exact
+            else:
+                key = (model_name, field, f'{type(value).__name__}->{type(result).__name__}')
+            with lock:
+                counts[key] += 1
+            return result
+
+        return record
+
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Coordinate(BaseModel):
+    x: float
+    y: float
+
+
+class CoerceNumberToStringModel(BaseModel):
+    field: str
+    model_config = ConfigDict(coerce_numbers_to_str=True)
+
+
+class Route(BaseModel):
+    name: str
+    points: tuple[Coordinate, ...]
+
+
+profiler = CoercionProfiler()
+original_validator = Coordinate.__pydantic_validator__
+
+with profiler.profiling(Coordinate, CoerceNumberToStringModel, Route):
+    Coordinate(x=1.1, y=-2.2)
+    Coordinate(x=0, y='-2.2')
+    CoerceNumberToStringModel(field=1)
+    Route.model_validate_json('{"name": "home", "points": [{"x": 1, "y": 2.5}]}')
+    try:
+        Coordinate(x='a', y=1.0)
+    except ValidationError as ex:
+        print(ex.errors()[0]['type'])  # 출력: float_parsing | 검증 결과와 에러는 그대로이다.
+
+print(Coordinate.__pydantic_validator__ is original_validator)  # 출력: True | 끄면 원래 검증기로 되돌아간다.
+print(profiler.snapshot())
+"""
+{'CoerceNumberToStringModel': {'field': {'int->str': 1}},
+ 'Coordinate': {'x': {'exact': 1, 'failed': 1, 'int->float': 2}, 'y': {'exact': 3, 'str->float': 1}},
+ 'Route': {'name': {'exact': 1}, 'points': {'list->tuple': 1}}}
+"""
+print(profiler.to_prometheus())
+"""
+# HELP pydantic_field_validations_total Field validations by outcome (exact, coerced, failed) and conversion.
+# TYPE pydantic_field_validations_total counter
+pydantic_field_validations_total{model="CoerceNumberToStringModel",field="field",outcome="coerced",conversion="int->str"} 1
+pydantic_field_validations_total{model="Coordinate",field="x",outcome="exact",conversion=""} 1
+...
+"""
+
+print()
+print("--------------------")
+
+# 벤치마크: Coordinate 검증 비용(꺼져 있을 때, 켜져 있을 때)
+NUMBER, REPEAT = 100_000, 5
+data = {'x': 1.1, 'y': '-2.2'}
+
+
+def per_call() -> float:
+    return min(repeat(lambda: Coordinate.model_validate(data), number=NUMBER, repeat=REPEAT)) / NUMBER
+
+
+baseline = per_call()
+profiler.enable(Coordinate)
+enabled = per_call()
+profiler.disable(Coordinate)
+disabled = per_call()
+print(f"{'baseline':<10} {baseline * 1e6:6.2f} µs")
+print(f"{'enabled':<10} {enabled * 1e6:6.2f} µs x{enabled / baseline:.2f}")
+print(f"{'disabled':<10} {disabled * 1e6:6.2f} µs x{disabled / baseline:.2f}")
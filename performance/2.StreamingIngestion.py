@@ -0,0 +1,280 @@
+"""
+`Person.model_validate_json()`, `Contact.model_validate_json()`은 완성된 JSON 문자열 하나를 메모리에 올려야 사용할 수 있다.
+- 수 GB 크기의 NDJSON(줄 단위 JSON) 파일을 통째로 읽으면, 파일 크기 + 모델 인스턴스 만큼의 메모리가 필요하다.
+
+제너레이터를 사용하면 파일(혹은 mmap)에서 레코드를 조금씩 읽어 모델 인스턴스로 검증하고, 하나씩 넘겨줄 수 있다.
+- chunk_size 만큼의 줄을 모아 `[line1,line2,...]` 형태의 JSON 배열로 이어 붙인 뒤, 한 번에 validate_json()을 호출한다.
+  - 줄마다 model_validate_json()을 호출하는 것보다 호출 오버헤드가 적고, JSON 모드의 검증 규칙도 그대로 유지된다.
+- 메모리에는 항상 chunk 하나 분량만 올라가므로, 파일 크기와 무관하게 메모리 사용량이 일정하게 유지된다.
+- on_error
+  - "raise": 첫 번째 잘못된 행에서 ValidationError를 발생시킨다.(몇 번째 줄인지 note로 추가된다.)
+  - "skip": 잘못된 행은 건너뛰고, on_skip 콜백이 있다면 (줄 번호, 에러)를 전달한다.
+
+JSON 배열 형태의 파일(`[{...}, {...}, ...]`)도 같은 방식으로 처리할 수 있다.
+- json.JSONDecoder.raw_decode()로 원소의 끝 위치만 찾아 원본 텍스트 조각을 잘라내고, 조각들을 chunk 단위로 검증한다.
+- 배열 자체의 JSON 문법이 깨진 경우에는 다음 원소의 위치를 알 수 없으므로, on_error와 무관하게 에러를 발생시킨다.
+"""
+import codecs
+import json
+import mmap
+import os
+import tempfile
+import tracemalloc
+from itertools import islice
+from typing import IO, Any, Callable, Iterator, Literal, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+from _playground import lenient_list_adapter
+
+ModelT = TypeVar('ModelT', bound=BaseModel)
+Source = IO[str] | IO[bytes] | mmap.mmap
+OnSkip = Callable[[int, ValidationError], None]
+
+_WHITESPACE = ' \t\n\r'
+
+
+class ChunkValidator:
+    """
+    JSON 텍스트 조각들을 chunk 단위로 이어 붙여 한 번에 검증한다.
+    - 각 원소를 `Model | Any` (left_to_right) 로 검증하므로, 잘못된 원소가 있어도 나머지 원소는 그대로 검증된다.
+    """
+
+    def __init__(self, model: type[ModelT], on_error: Literal['raise', 'skip'] = 'raise', on_skip: OnSkip | None = None):
+        self.model = model
+        self.on_error = on_error
+        self.on_skip = on_skip
+        self._adapter = lenient_list_adapter(model)
+
+    def validate(self, line_numbers: list[int], pieces: list[str] | list[bytes]) -> Iterator[ModelT]:
+        separator, brackets = (',', '[]') if isinstance(pieces[0], str) else (b',', b'[]')
+        try:
+            outputs = self._adapter.validate_json(brackets[:1] + separator.join(pieces) + brackets[1:])
+        except ValidationError:
+            # 어떤 줄의 JSON 문법이 깨져 있으면 배열 전체를 파싱할 수 없다. 이 chunk만 한 줄씩 검증한다.
+            outputs = None
+        if outputs is None or len(outputs) != len(pieces):
+            # `{...},{...}` 처럼 값이 여러 개인 줄은 배열의 원소 수를 바꾸므로, 결과를 줄과 맞출 수 없다.
+            outputs = [self._validate_piece(piece) for piece in pieces]
+
+        instances = []
+        for line_number, piece, output in zip(line_numbers, pieces, outputs):
+            if isinstance(output, self.model):
+                instances.append(output)
+                continue
+            try:
+                instance = self.model.model_validate_json(piece)
+            except ValidationError as ex:
+                if self.on_error == 'raise':
+                    ex.add_note(f'line {line_number}: {piece[:80]!r}')
+                    # 이미 검증된 앞쪽 행은 먼저 넘겨준 뒤 에러를 발생시킨다.
+                    yield from instances
+                    raise
+                if self.on_skip is not None:
+                    self.on_skip(line_number, ex)
+            else:
+                instances.append(instance)  # 다시 검증하면 성공하는 행도 버리지 않는다.
+        yield from instances
+
+    def _validate_piece(self, piece: str | bytes) -> Any:
+        try:
+            return self.model.model_validate_json(piece)
+        except ValidationError:
+            return piece
+
+
+def iter_ndjson(
+    source: Source,
+    model: type[ModelT],
+    chunk_size: int = 1000,
+    on_error: Literal['raise', 'skip'] = 'raise',
+    on_skip: OnSkip | None = None,
+) -> Iterator[ModelT]:
+    """NDJSON 파일 객체(텍스트/바이너리) 혹은 mmap에서 한 줄에 하나씩 레코드를 읽어 검증한다."""
+    validator = ChunkValidator(model, on_error, on_skip)
+    lines = iter(source.readline, b'') if isinstance(source, mmap.mmap) else iter(source)
+    numbered = ((number, line.strip()) for number, line in enumerate(lines, start=1))
+    numbered = ((number, line) for number, line in numbered if line)  # 빈 줄은 무시한다.
+
+    while chunk := list(islice(numbered, chunk_size)):
+        line_numbers, pieces = zip(*chunk)
+        yield from validator.validate(list(line_numbers), list(pieces))
+
+
+def iter_json_array(
+    source: Source,
+    model: type[ModelT],
+    chunk_size: int = 1000,
+    on_error: Literal['raise', 'skip'] = 'raise',
+    on_skip: OnSkip | None = None,
+    read_size: int = 1 << 16,
+) -> Iterator[ModelT]:
+    """`[{...}, {...}]` 형태의 JSON 배열 파일을 read_size 만큼씩 읽으며, 원소 단위로 검증한다. (on_skip의 번호는 원소 index 이다.)"""
+    validator = ChunkValidator(model, on_error, on_skip)
+    indices: list[int] = []
+    pieces: list[str] = []
+    for index, piece in enumerate(_iter_array_elements(source, read_size)):
+        indices.append(index)
+        pieces.append(piece)
+        if len(pieces) == chunk_size:
+            yield from validator.validate(indices, pieces)
+            indices, pieces = [], []
+    if pieces:
+        yield from validator.validate(indices, pieces)
+
+
+def _iter_array_elements(source: Source, read_size: int) -> Iterator[str]:
+    decoder = json.JSONDecoder()
+    chunks = _iter_text(source, read_size)
+    buffer, position = '', 0
+    expect: Literal['[', 'first', 'value', ',', 'end'] = '['
+
+    while True:
+        while position < len(buffer) and buffer[position] in _WHITESPACE:
+            position += 1
+        if position == len(buffer):
+            buffer, position = next(chunks, None), 0
+            if buffer is None:
+                if expect == 'end':
+                    return
+                raise json.JSONDecodeError('Unexpected end of JSON array', '', 0)
+            continue
+
+        char = buffer[position]
+        if expect == '[':
+            if char != '[':
+                raise json.JSONDecodeError("Expecting '['", buffer, position)
+            position, expect = position + 1, 'first'
+        elif expect == 'end':
+            raise json.JSONDecodeError('Extra data', buffer, position)
+        elif expect == ',':
+            if char not in ',]':
+                raise json.JSONDecodeError("Expecting ',' delimiter", buffer, position)
+            position, expect = position + 1, 'value' if char == ',' else 'end'
+        elif expect == 'first' and char == ']':
+            position, expect = position + 1, 'end'
+        else:
+            try:
+                _, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError as ex:
+                # 원소가 buffer 경계에서 잘린 경우(닫히지 않은 문자열, 잘린 리터럴/숫자)에만 다음 조각을 기다린다.
+                if not (ex.msg.startswith('Unterminated string') or len(buffer) - ex.pos <= len('-Infinity')):
+                    raise
+                end = None
+            if end is None or end == len(buffer):
+                # 숫자처럼 끝이 명확하지 않은 원소는, 뒤에 데이터가 더 이어질 수 있으므로 다음 조각을 확인한다.
+                more = next(chunks, None)
+                if more is not None:
+                    buffer, position = buffer[position:] + more, 0
+                    continue
+                if end is None:
+                    decoder.raw_decode(buffer, position)  # 파일이 끝났으므로 원래의 에러를 발생시킨다.
+            yield buffer[position:end]
+            position, expect = end, ','
+
+
+def _iter_text(source: Source, read_size: int) -> Iterator[str]:
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    while chunk := source.read(read_size):
+        yield chunk if isinstance(chunk, str) else decoder.decode(chunk)
+    if tail := decoder.decode(b'', final=True):
+        yield tail
+
+
+class Person(BaseModel):
+    first_name: str
+    last_name: str
+    age: int
+
+
+class Contact(BaseModel):
+    email: str
+
+
+# NDJSON 파일을 만들어 사용한다.(2번째 줄은 검증 실패, 4번째 줄은 JSON 문법 오류)
+ndjson_lines = [
+    '{"first_name": "Seongyeon", "last_name": "Kim", "age": 29}',
+    '{"first_name": "Isaac", "last_name": "Newton", "age": "unknown"}',
+    '',
+    '{"first_name": "Albert", "last_name": "Einstein"',
+    '{"first_name": "Marie", "last_name": "Curie", "age": 66}',
+]
+with tempfile.NamedTemporaryFile('w', suffix='.ndjson', delete=False, encoding='utf-8') as f:
+    f.write('\n'.join(ndjson_lines))
+    ndjson_path = f.name
+
+skipped = []
+with open(ndjson_path, encoding='utf-8') as f:
+    people = list(iter_ndjson(f, Person, chunk_size=2, on_error='skip', on_skip=lambda n, ex: skipped.append((n, ex.error_count()))))
+print(people)  # 출력: [Person(first_name='Seongyeon', last_name='Kim', age=29), Person(first_name='Marie', last_name='Curie', age=66)]
+print(skipped)  # 출력: [(2, 1), (4, 1)] | (줄 번호, 에러 개수)
+
+with open(ndjson_path, 'rb') as f:
+    try:
+        for person in iter_ndjson(f, Person):
+            print(person)  # 출력: first_name='Seongyeon' last_name='Kim' age=29
+    except ValidationError as ex:
+        print(ex)
+        """
+        1 validation error for Person
+        age
+          Input should be a valid integer, unable to parse string as an integer [type=int_parsing, input_value='unknown', input_type=str]
+            For further information visit https://errors.pydantic.dev/2.7/v/int_parsing
+        """
+        print(ex.__notes__)  # 출력: ['line 2: b\'{"first_name": "Isaac", "last_name": "Newton", "age": "unknown"}\'']
+
+# mmap을 사용하면 파일 내용을 Python 객체로 복사하지 않고, OS 페이지 캐시에서 바로 줄을 읽는다.
+with open(ndjson_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+    print(len(list(iter_ndjson(mm, Person, on_error='skip'))))  # 출력: 2
+os.remove(ndjson_path)
+
+# 한 줄에 JSON 값이 두 개인 잘못된 줄은 배열의 원소 수를 바꾸므로, 그 chunk는 한 줄씩 검증한다.
+merged_lines = [
+    '{"first_name": "Ada", "last_name": "Lovelace", "age": 36},{"first_name": "Alan", "last_name": "Turing", "age": 41}',
+    '{"first_name": "Grace", "last_name": "Hopper", "age": 85}',
+]
+skipped = []
+print(list(iter_ndjson(merged_lines, Person, on_error='skip', on_skip=lambda n, ex: skipped.append(n))))
+# 출력: [Person(first_name='Grace', last_name='Hopper', age=85)]
+print(skipped)  # 출력: [1]
+
+print()
+print("--------------------")
+
+# JSON 배열 형태의 입력: `basics/3.TypeCoercion.py` 의 Contact 모델
+with tempfile.TemporaryFile('w+', encoding='utf-8') as f:
+    json.dump([{'email': 'inewton@principia.com'}, {'email': {'work': 'isaac.newton@themint.com'}}, {'email': 'a@b.c'}], f)
+    f.seek(0)
+    print(list(iter_json_array(f, Contact, on_error='skip', read_size=16)))
+    # 출력: [Contact(email='inewton@principia.com'), Contact(email='a@b.c')]
+
+print()
+print("--------------------")
+
+# 메모리 비교: 파일 전체를 읽어 검증 vs 스트리밍 검증
+# - 스트리밍은 인스턴스를 바로 소비(여기서는 나이 합계)하므로 최대 메모리가 chunk 하나 분량으로 유지된다.
+ROWS = 200_000
+with tempfile.NamedTemporaryFile('w', suffix='.ndjson', delete=False, encoding='utf-8') as f:
+    for i in range(ROWS):
+        f.write(f'{{"first_name": "first-{i}", "last_name": "last-{i}", "age": {i % 100}}}\n')
+    large_path = f.name
+
+
+def read_all() -> int:
+    with open(large_path, encoding='utf-8') as f:
+        return sum(Person.model_validate_json(line).age for line in f.read().splitlines())
+
+
+def stream() -> int:
+    with open(large_path, 'rb') as f:
+        return sum(person.age for person in iter_ndjson(f, Person, chunk_size=1000))
+
+
+print(f"file size: {os.path.getsize(large_path) / 1e6:.1f} MB, {ROWS:,} rows")
+for name, func in {'read whole file': read_all, 'iter_ndjson': stream}.items():
+    tracemalloc.start()
+    total = func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<16} total age={total:,} peak memory={peak / 1e6:6.1f} MB")
+os.remove(large_path)
@@ -0,0 +1,303 @@
+"""
+`basics/` 의 Person, Circle, Contact와 `model configuration/` 의 모델들은 호출하고 나면 어디에 시간이 쓰였는지 알 수 없다.
+- 모델이 수백 개인 서비스에서 p99 지연 시간을 늘리는 모델을 찾으려면 모델별, 작업별 측정값이 필요하다.
+
+ValidationTracer는 BaseModel의 model_validate, model_validate_json, model_dump, model_dump_json을 감싸서 측정한다.(opt-in)
+- install()은 BaseModel의 메소드를 측정하는 함수로 바꾸므로, 모든 모델(이미 정의된 모델 포함)이 측정된다.
+  - uninstall()은 원래 메소드로 되돌린다. 설치하지 않았다면 추가 비용이 없다.
+  - 중첩된 모델은 pydantic-core 안에서 검증/직렬화되므로, 최상위 호출만 한 번 측정된다.
+- (모델, 작업) 별로 다음 값을 모은다.
+  - 지연 시간 히스토그램: log2 bucket(1ns, 2ns, 4ns, ...). 값 하나를 기록하는 비용은 int.bit_length()와 list 증가 한 번이다.
+  - 호출 수, 에러 수, 총 시간, bytes(JSON 입력/출력의 길이, str은 문자 수)
+- 최근 호출은 ring buffer(collections.deque(maxlen))에 (시작 시각, 모델, 작업, ns, bytes, 성공 여부)로 남는다.
+- 측정값은 스레드마다 따로 모으고 조회할 때 합치므로, 기록할 때 lock을 사용하지 않는다.
+- hook: add_hook(begin, end)로 호출 전후에 실행할 함수를 등록한다.(예: 분산 tracing의 span 시작/종료)
+  - begin(model, op)의 반환값이 end(state, event)의 state로 전달된다.
+- trace(model, op) context manager로 Model(**data) 처럼 감싸지 않은 구간도 같은 방식으로 측정할 수 있다.
+- summary()는 p50/p99(bucket 상한값)와 총 시간을 기준으로 정렬된 목록을 돌려준다.
+
+* 주의사항: 설치하면 호출마다 Python 함수 호출과 기록 비용(벤치마크에서 약 2µs)이 추가된다.
+  작은 모델의 검증 시간과 비슷한 크기이므로, 운영 환경에서는 일부 프로세스나 짧은 기간에만 사용한다.
+* 참고사항: 히스토그램의 백분위수는 bucket 단위(2배 간격)이므로 대략적인 값이다. 모델 사이의 비교에는 충분하다.
+"""
+import threading
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+from time import perf_counter_ns
+from timeit import repeat
+from typing import Any, Callable, NamedTuple, Optional
+
+from pydantic import BaseModel, ValidationError
+
+BUCKETS = 64
+OPERATIONS = ('model_validate', 'model_validate_json', 'model_dump', 'model_dump_json')
+
+
+class TraceEvent(NamedTuple):
+    started_at_ns: int  # time.perf_counter_ns() 기준(프로세스 안에서의 순서, 간격 비교용)
+    model: str
+    operation: str
+    elapsed_ns: int
+    bytes: int
+    ok: bool
+
+
+class OperationStats:
+    __slots__ = ('count', 'errors', 'total_ns', 'bytes', 'buckets')
+
+    def __init__(self):
+        self.count = self.errors = self.total_ns = self.bytes = 0
+        self.buckets = [0] * BUCKETS  # buckets[i]: 2**(i-1) <= ns < 2**i
+
+    def percentile(self, q: float) -> int:
+        """q(0~1) 백분위수가 속한 bucket의 상한값(ns)"""
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank and count:
+                return 1 << i
+        return 0
+
+
+class SummaryRow(NamedTuple):
+    model: str
+    operation: str
+    count: int
+    errors: int
+    p50_us: float
+    p99_us: float
+    total_ms: float
+    bytes: int
+
+
+class ValidationTracer:
+    def __init__(self, buffer_size: int = 65_536):
+        self._events: deque[tuple] = deque(maxlen=buffer_size)
+        self._hooks: list[tuple[Optional[Callable], Optional[Callable]]] = []
+        # 스레드마다 따로 모으고 summary()에서 합치므로, 기록할 때 lock을 사용하지 않는다.
+        self._local = threading.local()
+        self._tables: list[dict[tuple[type, str], OperationStats]] = []
+        self._tables_lock = threading.Lock()
+        self._originals: dict[str, Any] = {}
+
+    def add_hook(self, begin: Callable[[type, str], Any] | None = None,
+                 end: Callable[[Any, TraceEvent], None] | None = None) -> None:
+        self._hooks.append((begin, end))
+
+    def install(self) -> None:
+        if self._originals:
+            return
+        for operation in OPERATIONS:
+            original = BaseModel.__dict__[operation]
+            self._originals[operation] = original
+            if isinstance(original, classmethod):
+                setattr(BaseModel, operation, classmethod(self._wrap(original.__func__, operation, is_class=True)))
+            else:
+                setattr(BaseModel, operation, self._wrap(original, operation, is_class=False))
+
+    def uninstall(self) -> None:
+        for operation, original in self._originals.items():
+            setattr(BaseModel, operation, original)
+        self._originals.clear()
+
+    @contextmanager
+    def trace(self, model: type, operation: str, nbytes: int = 0):
+        states = self._begin(model, operation)
+        start = perf_counter_ns()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self._record(model, operation, start, perf_counter_ns() - start, nbytes, ok, states)
+
+    @property
+    def events(self) -> list[TraceEvent]:
+        """ring buffer에 남아 있는 최근 호출(오래된 순서)"""
+        return [TraceEvent(start, model.__qualname__, *rest) for start, model, *rest in list(self._events)]
+
+    def stats(self, model: type, operation: str) -> OperationStats | None:
+        return self._merge().get((model, operation))
+
+    def summary(self, sort_by: str = 'p99_us', limit: int | None = None) -> list[SummaryRow]:
+        rows = [
+            SummaryRow(
+                model.__qualname__, operation, stats.count, stats.errors,
+                stats.percentile(0.5) / 1e3, stats.percentile(0.99) / 1e3, stats.total_ns / 1e6, stats.bytes,
+            )
+            for (model, operation), stats in self._merge().items()
+        ]
+        rows.sort(key=lambda row: getattr(row, sort_by), reverse=True)
+        return rows[:limit]
+
+    def reset(self) -> None:
+        with self._tables_lock:
+            for table in self._tables:
+                table.clear()
+        self._events.clear()
+
+    def _merge(self) -> dict[tuple[type, str], OperationStats]:
+        merged: dict[tuple[type, str], OperationStats] = {}
+        with self._tables_lock:
+            tables = [list(table.items()) for table in self._tables]
+        for items in tables:
+            for key, stats in items:
+                total = merged.get(key)
+                if total is None:
+                    total = merged[key] = OperationStats()
+                total.count += stats.count
+                total.errors += stats.errors
+                total.total_ns += stats.total_ns
+                total.bytes += stats.bytes
+                total.buckets = list(map(int.__add__, total.buckets, stats.buckets))
+        return merged
+
+    def _table(self) -> dict[tuple[type, str], OperationStats]:
+        table = self._local.__dict__.get('table')
+        if table is None:
+            table = self._local.table = {}
+            with self._tables_lock:
+                self._tables.append(table)
+        return table
+
+    def _wrap(self, func: Callable, operation: str, *, is_class: bool) -> Callable:
+        record, begin, hooks = self._record, self._begin, self._hooks
+        json_input, json_output = operation == 'model_validate_json', operation == 'model_dump_json'
+
+        @wraps(func)
+        def traced(target, *args, **kwargs):
+            model = target if is_class else type(target)
+            if json_input and not args:
+                args = (kwargs.pop('json_data'),)
+            states = begin(model, operation) if hooks else None
+            start = perf_counter_ns()
+            try:
+                result = func(target, *args, **kwargs)
+            except BaseException:
+                nbytes = len(args[0]) if json_input else 0
+                record(model, operation, start, perf_counter_ns() - start, nbytes, False, states)
+                raise
+            elapsed = perf_counter_ns() - start
+            nbytes = len(args[0]) if json_input else len(result) if json_output else 0
+            record(model, operation, start, elapsed, nbytes, True, states)
+            return result
+
+        return traced
+
+    def _begin(self, model: type, operation: str) -> list[Any] | None:
+        if not self._hooks:
+            return None
+        return [begin(model, operation) if begin is not None else None for begin, _ in self._hooks]
+
+    def _record(self, model: type, operation: str, start: int, elapsed: int, nbytes: int, ok: bool,
+                states: list[Any] | None) -> None:
+        key = (model, operation)
+        try:
+            stats = self._local.table[key]
+        except (AttributeError, KeyError):
+            stats = self._table()[key] = OperationStats()
+        stats.count += 1
+        stats.total_ns += elapsed
+        stats.bytes += nbytes
+        stats.buckets[elapsed.bit_length() if elapsed < 1 << (BUCKETS - 1) else BUCKETS - 1] += 1
+        if not ok:
+            stats.errors += 1
+        self._events.append((start, model, operation, elapsed, nbytes, ok))  # deque.append는 thread-safe 하다.
+        if states is not None:
+            event = TraceEvent(start, model.__qualname__, operation, elapsed, nbytes, ok)
+            for (_, end), state in zip(self._hooks, states):
+                if end is not None:
+                    end(state, event)
+
+
+class Person(BaseModel):
+    first_name: str
+    last_name: str
+    age: int
+
+
+class Circle(BaseModel):
+    center: tuple[int, int] = (0, 0)
+    radius: int
+
+
+class Contact(BaseModel):
+    email: str
+
+
+tracer = ValidationTracer(buffer_size=1_000)
+spans = []
+tracer.add_hook(
+    begin=lambda model, operation: f'{model.__name__}.{operation}',
+    end=lambda span, event: spans.append((span, event.ok)),
+)
+original_model_validate = BaseModel.__dict__['model_validate']
+tracer.install()
+
+person = Person.model_validate({'first_name': 'Isaac', 'last_name': 'Newton', 'age': 84})
+person.model_dump_json()
+Circle.model_validate_json('{"radius": 1}')
+try:
+    Contact.model_validate_json('{"email": {"personal": "inewton@principia.com"}}')
+except ValidationError:
+    pass
+with tracer.trace(Circle, '__init__'):
+    Circle(radius=2)
+
+tracer.uninstall()
+print(BaseModel.__dict__['model_validate'] is original_model_validate)  # 출력: True | uninstall() 이후에는 원래 메소드를 사용한다.
+
+print(spans)
+# 출력: [('Person.model_validate', True), ('Person.model_dump_json', True), ('Circle.model_validate_json', True),
+#        ('Contact.model_validate_json', False), ('Circle.__init__', True)]
+print(tracer.stats(Person, 'model_dump_json').bytes)  # 출력: 52 | 직렬화된 JSON의 길이
+print(tracer.events[-2])
+# 출력: TraceEvent(started_at_ns=..., model='Contact', operation='model_validate_json', elapsed_ns=..., bytes=48, ok=False)
+
+print()
+print("--------------------")
+
+# 모델별 p99: 큰 모델과 작은 모델을 섞어서 검증한 뒤, p99 기준으로 정렬한다.
+class Team(BaseModel):
+    name: str
+    members: list[Person]
+
+
+team_json = Team(
+    name='core', members=[Person(first_name=f'first-{i}', last_name='last', age=i % 100) for i in range(1_000)]
+).model_dump_json()
+tracer.reset()
+tracer.install()
+for i in range(1_000):
+    Person.model_validate({'first_name': 'Isaac', 'last_name': 'Newton', 'age': i})
+    Circle.model_validate_json('{"radius": 1}')
+    if i % 10 == 0:
+        Team.model_validate_json(team_json)
+tracer.uninstall()
+for row in tracer.summary():
+    print(f"{row.model:<8} {row.operation:<20} count {row.count:>5} p50 {row.p50_us:>8.1f} µs p99 {row.p99_us:>8.1f} µs "
+          f"total {row.total_ms:>7.2f} ms bytes {row.bytes:>9,}")
+
+print()
+print("--------------------")
+
+# 벤치마크: Person.model_validate 한 번의 비용(설치 전, 설치 후, hook 등록)
+NUMBER, REPEAT = 100_000, 5
+data = {'first_name': 'Isaac', 'last_name': 'Newton', 'age': 84}
+
+
+def per_call() -> float:
+    return min(repeat(lambda: Person.model_validate(data), number=NUMBER, repeat=REPEAT)) / NUMBER
+
+
+results = {'not installed': per_call()}
+benchmark_tracer = ValidationTracer()
+benchmark_tracer.install()
+results['installed'] = per_call()
+benchmark_tracer.add_hook(begin=lambda model, operation: None, end=lambda state, event: None)
+results['installed + hook'] = per_call()
+benchmark_tracer.uninstall()
+for name, seconds in results.items():
+    print(f"{name:<18} {seconds * 1e6:6.2f} µs (+{(seconds - results['not installed']) * 1e6:.2f} µs)")
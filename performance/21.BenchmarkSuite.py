@@ -0,0 +1,290 @@
+"""
+14개 예제 모듈(`basics/1..6`, `Annotated Types/AnnotatedTypes.py`, `model configuration/1..7`)의 모델을 같은 작업으로 측정하는 벤치마크
+
+- 모델은 `_playground.py`로 불러온다.(예제를 실행하고 print 하는 모듈 본문은 실행하지 않는다.)
+- 입력 데이터는 필드의 타입과 제약 조건으로부터 만든다.(sample_data)
+  - 타입마다 후보 값을 순서대로 시도하여, 모델 검증을 통과하는 첫 번째 조합을 사용한다.(예: Gt(0), Le(100) -> 1)
+  - 항상 같은 데이터가 만들어지므로, 실행 간 결과를 비교할 수 있다.
+- 작업(workload)
+  - construct: Model(**data), validate: model_validate(data), validate_json: model_validate_json(json)
+  - dump: model_dump(), dump_json: model_dump_json()
+  - assignment: 첫 번째 필드에 값을 대입(frozen 모델은 제외), hash: hash(instance)(frozen 모델만)
+- batch 크기(--sizes)마다 입력 목록 전체를 처리하는 시간을 측정하고, 항목 하나당 시간(ns)으로 기록한다.
+  - timeit처럼 GC를 끄고 측정하며, 한 번의 측정이 --min-time 이상이 되도록 반복 횟수를 정한다. --repeat 번 측정한 값 중 최소값을 사용한다.
+- 결과는 JSON으로 저장하고(--output), 이전 결과(--compare)와 비교하여 --threshold 보다 느려진 항목이 있으면 exit code 1로 종료한다.
+
+사용 예)
+  python "performance/21.BenchmarkSuite.py" --output baseline.json
+  python "performance/21.BenchmarkSuite.py" --compare baseline.json --threshold 0.1
+  python "performance/21.BenchmarkSuite.py" --modules "model configuration" --workloads validate validate_json --sizes 1
+"""
+import argparse
+import gc
+import json
+import platform
+import sys
+from datetime import datetime, timezone
+from itertools import product
+from time import perf_counter
+from types import NoneType, UnionType
+from typing import Annotated, Any, Callable, Iterator, NamedTuple, Union, get_args, get_origin
+
+import pydantic
+import pydantic_core
+from pydantic import BaseModel, ValidationError
+
+from _playground import load_all
+
+WORKLOADS = ('construct', 'validate', 'validate_json', 'dump', 'dump_json', 'assignment', 'hash')
+MAX_ATTEMPTS = 50
+
+_SCALAR_CANDIDATES: dict[Any, list[Any]] = {
+    int: [1, 50, 100, 0, -1],
+    float: [1.5, 50.0, 0.0, -1.5],
+    str: ['text', 'ab', 'Seoul', 'a'],
+    bool: [True, False],
+    bytes: [b'bytes'],
+    NoneType: [None],
+    Any: ['text'],
+    list: [[1, 2, 3]],
+    tuple: [(1, 2, 3)],
+    dict: [{'key': 'value'}],
+}
+
+
+class BenchmarkCase(NamedTuple):
+    module: str
+    model: str
+    cls: type[BaseModel]
+    data: dict[str, Any]
+
+
+class Result(NamedTuple):
+    module: str
+    model: str
+    workload: str
+    batch: int
+    ns_per_item: float
+
+
+def candidates(annotation: Any) -> list[Any]:
+    """타입의 후보 값 목록. 앞의 값일수록 먼저 시도한다."""
+    origin, args = get_origin(annotation), get_args(annotation)
+    if origin is Annotated:
+        return candidates(args[0])
+    if origin in (Union, UnionType):
+        # None이 아닌 타입의 값을 먼저 시도하여, 측정하는 데이터가 가능한 한 많은 필드를 채우도록 한다.
+        return [value for arg in sorted(args, key=lambda arg: arg is NoneType) for value in candidates(arg)]
+    if origin is list:
+        return [[value] for value in candidates(args[0])] if args else _SCALAR_CANDIDATES[list]
+    if origin is tuple:
+        if not args:
+            return _SCALAR_CANDIDATES[tuple]
+        if len(args) == 2 and args[1] is Ellipsis:
+            return [(value,) for value in candidates(args[0])]
+        return [tuple(values) for values in _first_products(*(candidates(arg) for arg in args))]
+    if origin is dict:
+        return [{key: value} for key, value in _first_products(candidates(args[0]), candidates(args[1]))] if args \
+            else _SCALAR_CANDIDATES[dict]
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return [sample_data(annotation)]
+    return _SCALAR_CANDIDATES.get(annotation, [None])
+
+
+def _first_products(*iterables: list[Any], limit: int = 5) -> list[tuple[Any, ...]]:
+    return [values for _, values in zip(range(limit), product(*iterables))]
+
+
+def sample_data(model: type[BaseModel]) -> dict[str, Any]:
+    """모델 검증을 통과하는 입력 dict. 에러가 발생한 필드만 다음 후보 값으로 바꾸어 다시 시도한다."""
+    options = {name: candidates(field.annotation) for name, field in model.model_fields.items()}
+    keys = {name: field.alias or name for name, field in model.model_fields.items()}
+    choice = dict.fromkeys(options, 0)
+    for _ in range(MAX_ATTEMPTS):
+        data = {keys[name]: options[name][index] for name, index in choice.items()}
+        try:
+            model.model_validate(data)
+            return data
+        except ValidationError as ex:
+            failed = {error['loc'][0] for error in ex.errors() if error['loc']}
+            by_key = {key: name for name, key in keys.items()}
+            advanced = False
+            for key in failed:
+                name = by_key.get(key)
+                if name is not None and choice[name] + 1 < len(options[name]):
+                    choice[name] += 1
+                    advanced = True
+            if not advanced:
+                break
+    raise ValueError(f'cannot build sample data for {model.__qualname__}')
+
+
+def load_cases(module_filter: list[str] | None = None) -> tuple[list[BenchmarkCase], list[tuple[str, str, str]]]:
+    cases, skipped = [], []
+    for module in load_all():
+        if module_filter and not any(pattern in module.path for pattern in module_filter):
+            continue
+        for definition in module.models:
+            try:
+                cases.append(BenchmarkCase(module.path, definition.name, definition.cls, sample_data(definition.cls)))
+            except ValueError as ex:
+                skipped.append((module.path, definition.name, str(ex)))
+    return cases, skipped
+
+
+def workload_function(case: BenchmarkCase, workload: str, batch: int) -> Callable[[], Any] | None:
+    """batch 개의 항목을 처리하는 함수. 모델에 적용할 수 없는 작업이면 None"""
+    model, data = case.cls, case.data
+    rows = [dict(data) for _ in range(batch)]
+    frozen = model.model_config.get('frozen', False)
+    if workload == 'construct':
+        return lambda: [model(**row) for row in rows]
+    if workload == 'validate':
+        return lambda: [model.model_validate(row) for row in rows]
+    if workload == 'validate_json':
+        payloads = [model.model_validate(row).model_dump_json(by_alias=True) for row in rows]
+        return lambda: [model.model_validate_json(payload) for payload in payloads]
+
+    instances = [model.model_validate(row) for row in rows]
+    if workload == 'dump':
+        return lambda: [instance.model_dump() for instance in instances]
+    if workload == 'dump_json':
+        return lambda: [instance.model_dump_json() for instance in instances]
+    if workload == 'assignment':
+        if frozen or not model.model_fields:
+            return None
+        name = next(iter(model.model_fields))
+        value = getattr(instances[0], name)
+
+        def assign() -> None:
+            for instance in instances:
+                setattr(instance, name, value)
+        return assign
+    if workload == 'hash':
+        if not frozen:
+            return None  # frozen이 아닌 모델은 hash 할 수 없다.
+        return lambda: [hash(instance) for instance in instances]
+    raise ValueError(f'unknown workload: {workload}')
+
+
+def measure(func: Callable[[], Any], *, repeat: int, min_time: float) -> float:
+    """func 한 번 실행하는 시간(초). GC를 끄고 측정한 값 중 최소값"""
+    number = 1
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        while True:
+            elapsed = _run(func, number)
+            if elapsed >= min_time:
+                break
+            number *= 2
+        best = elapsed / number
+        for _ in range(repeat - 1):
+            best = min(best, _run(func, number) / number)
+        return best
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def _run(func: Callable[[], Any], number: int) -> float:
+    start = perf_counter()
+    for _ in range(number):
+        func()
+    return perf_counter() - start
+
+
+def run(cases: list[BenchmarkCase], workloads: list[str], sizes: list[int], *, repeat: int, min_time: float,
+        progress: Callable[[Result], None] | None = None) -> Iterator[Result]:
+    for case, workload, batch in product(cases, workloads, sizes):
+        func = workload_function(case, workload, batch)
+        if func is None:
+            continue
+        result = Result(case.module, case.model, workload, batch, measure(func, repeat=repeat, min_time=min_time) / batch * 1e9)
+        if progress is not None:
+            progress(result)
+        yield result
+
+
+def environment() -> dict[str, str]:
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'pydantic': pydantic.VERSION,
+        'pydantic_core': pydantic_core.__version__,
+    }
+
+
+class Comparison(NamedTuple):
+    key: tuple[str, str, str, int]
+    baseline_ns: float
+    current_ns: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current_ns / self.baseline_ns
+
+
+def compare(baseline: dict[str, Any], current: dict[str, Any]) -> list[Comparison]:
+    def index(report: dict[str, Any]) -> dict[tuple[str, str, str, int], float]:
+        return {(r['module'], r['model'], r['workload'], r['batch']): r['ns_per_item'] for r in report['results']}
+
+    old, new = index(baseline), index(current)
+    return [Comparison(key, old[key], new[key]) for key in new if key in old and old[key] > 0]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark every playground model with standardized workloads.')
+    parser.add_argument('--modules', nargs='*', help='module path substrings to include (default: all)')
+    parser.add_argument('--workloads', nargs='*', choices=WORKLOADS, default=list(WORKLOADS))
+    parser.add_argument('--sizes', nargs='*', type=int, default=[1, 1_000], help='batch sizes (default: 1 1000)')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.02, help='minimum seconds per measurement')
+    parser.add_argument('--output', help='write results to this JSON file')
+    parser.add_argument('--compare', help='baseline JSON file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.10, help='regression threshold ratio (default: 0.10 = 10%% slower)')
+    parser.add_argument('--quiet', action='store_true')
+    args = parser.parse_args(argv)
+
+    cases, skipped = load_cases(args.modules)
+    for module, model, reason in skipped:
+        print(f"skip {module} {model}: {reason}", file=sys.stderr)
+
+    def progress(result: Result) -> None:
+        if not args.quiet:
+            print(f"{result.module:<48} {result.model:<32} {result.workload:<14} {result.batch:>6} {result.ns_per_item:>12,.0f} ns/item")
+
+    results = list(run(cases, args.workloads, args.sizes, repeat=args.repeat, min_time=args.min_time, progress=progress))
+    report = {
+        'environment': environment(),
+        'settings': {'repeat': args.repeat, 'min_time': args.min_time, 'sizes': args.sizes, 'workloads': args.workloads},
+        'results': [result._asdict() for result in results],
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"saved {len(results)} results to {args.output}")
+
+    if not args.compare:
+        return 0
+    with open(args.compare, encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline['environment'].get('pydantic_core') != report['environment']['pydantic_core']:
+        print(f"note: pydantic-core {baseline['environment'].get('pydantic_core')} -> {report['environment']['pydantic_core']}")
+    comparisons = compare(baseline, report)
+    regressions = [c for c in comparisons if c.ratio > 1 + args.threshold]
+    improvements = [c for c in comparisons if c.ratio < 1 - args.threshold]
+    for title, items in (('regressions', regressions), ('improvements', improvements)):
+        print(f"{title} (threshold {args.threshold:.0%}): {len(items)}")
+        for c in sorted(items, key=lambda c: c.ratio, reverse=title == 'regressions'):
+            module, model, workload, batch = c.key
+            print(f"  {module} {model} {workload} batch={batch}: {c.baseline_ns:,.0f} -> {c.current_ns:,.0f} ns/item x{c.ratio:.2f}")
+    print(f"compared {len(comparisons)} results")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+"""
+`basics/2. (De)Serialization.py` 의 model_dump_json()은 indent, exclude, by_alias, exclude_unset, exclude_defaults, exclude_none,
+round_trip, serialize_as_any 등의 옵션을 받는다.
+- 호출할 때마다 옵션을 해석하고, `exclude={'age'}` 같은 include/exclude는 매번 Python set/dict에서 필터로 변환된다.
+- API 계층에서는 같은 모델을 같은 3~4가지 옵션 조합으로 수백만 번 직렬화한다.
+
+serializer_plan(Model, **options)은 (모델, 옵션 조합) 별로 직렬화 계획(SerializerPlan)을 한 번 만들어 캐시한다.
+- include/exclude에서 필드 단위로 제외되는 필드는 core schema 복사본의 해당 필드에 serialization_exclude=True를 설정하고,
+  이 schema로 SchemaSerializer를 만든다.(호출할 때 필터를 만들지 않는다.)
+  - 최상위 모델의 schema만 바꾸므로, 같은 모델을 참조하는 중첩된 인스턴스(재귀 모델)는 그 필드를 그대로 직렬화한다.
+  - 중첩된 필드의 include/exclude(`{'address': {'city'}}`)와 computed_field의 제외는 지금처럼 호출할 때 넘긴다.
+- 나머지 옵션(by_alias, exclude_none 등)은 functools.partial로 SchemaSerializer.to_json/to_python에 묶어 둔다.
+  - model_dump_json()은 Python 메소드를 거쳐 옵션을 다시 넘기지만, 계획은 pydantic-core를 바로 호출한다.
+- dump_json(instance)는 model_dump_json()과 같은 str을, dump_json_bytes(instance)는 decode 하지 않은 bytes를 돌려준다.
+  - 응답을 bytes로 보내는 API 계층에서는 dump_json_bytes()가 str 변환 비용도 줄인다.
+- dump(instance)는 model_dump()와 같은 dict를 돌려준다.(mode='python' 또는 'json')
+
+* 주의사항: serializer_plan() 조회는 옵션을 hash 가능한 값으로 바꾸므로 직렬화 한 번보다 비싸다.(벤치마크의 lookup + dump)
+  계획은 모듈을 불러올 때나 서비스를 시작할 때 한 번 만들어 두고, 요청마다 조회하지 않는다.
+* 주의사항: 계획은 모델 클래스 단위이다. 서브클래스의 인스턴스는 그 서브클래스의 계획을 사용해야 한다.
+"""
+import threading
+from functools import partial
+from timeit import repeat
+from typing import Any, Callable, Literal, NamedTuple, Optional
+
+from pydantic import BaseModel, Field, computed_field, create_model
+from pydantic_core import SchemaSerializer
+
+from _playground import find_model_schema, replace_model_schema
+
+IncEx = set[str] | dict[str, Any]
+
+
+class SerializerPlan(NamedTuple):
+    model: type[BaseModel]
+    options: tuple[tuple[str, Any], ...]
+    excluded: frozenset[str]  # serializer에 미리 반영된(호출할 때 넘기지 않는) 제외 필드
+    dump_json_bytes: Callable[..., bytes]
+    dump: Callable[..., dict[str, Any]]
+
+    def dump_json(self, instance: BaseModel, **kwargs: Any) -> str:
+        return self.dump_json_bytes(instance, **kwargs).decode()
+
+
+_plans: dict[tuple[type[BaseModel], tuple[tuple[str, Any], ...]], SerializerPlan] = {}
+_plans_lock = threading.Lock()
+
+
+def serializer_plan(
+    model: type[BaseModel],
+    *,
+    mode: Literal['json', 'python'] = 'python',
+    indent: Optional[int] = None,
+    include: Optional[IncEx] = None,
+    exclude: Optional[IncEx] = None,
+    by_alias: bool = False,
+    exclude_unset: bool = False,
+    exclude_defaults: bool = False,
+    exclude_none: bool = False,
+    round_trip: bool = False,
+    warnings: bool | Literal['none', 'warn', 'error'] = True,
+    serialize_as_any: bool = False,
+) -> SerializerPlan:
+    options = (
+        ('mode', mode), ('indent', indent), ('include', _freeze(include)), ('exclude', _freeze(exclude)),
+        ('by_alias', by_alias), ('exclude_unset', exclude_unset), ('exclude_defaults', exclude_defaults),
+        ('exclude_none', exclude_none), ('round_trip', round_trip), ('warnings', warnings), ('serialize_as_any', serialize_as_any),
+    )
+    key = (model, options)
+    plan = _plans.get(key)
+    if plan is None:
+        with _plans_lock:
+            plan = _plans.get(key)
+            if plan is None:
+                plan = _plans[key] = _compile(model, dict(options), include, exclude)
+    return plan
+
+
+def _compile(model: type[BaseModel], options: dict[str, Any], include: Optional[IncEx], exclude: Optional[IncEx]) -> SerializerPlan:
+    fields = set(model.model_fields)
+    excluded: set[str] = set()
+    runtime: dict[str, Any] = {}  # 필드 단위로 바꿀 수 없어 호출할 때 넘기는 include/exclude
+
+    if exclude is not None:
+        nested = {}
+        for name, value in _items(exclude):
+            if value is True or value is ...:
+                excluded.add(name)
+            else:
+                nested[name] = value
+        if nested:
+            runtime['exclude'] = nested
+    if include is not None:
+        items = dict(_items(include))
+        excluded |= fields - items.keys()
+        excluded |= model.model_computed_fields.keys() - items.keys()
+        if any(value is not True and value is not ... for value in items.values()):
+            runtime['include'] = include  # 중첩된 include는 원래 값을 그대로 넘긴다.
+    # computed_field는 schema에서 제외할 수 없으므로, 호출할 때 exclude로 넘긴다.
+    computed = excluded & model.model_computed_fields.keys()
+    if computed:
+        runtime['exclude'] = {**runtime.get('exclude', {}), **dict.fromkeys(computed, True)}
+    excluded &= fields
+
+    schema = model.__pydantic_core_schema__
+    serializer = model.__pydantic_serializer__
+    if excluded:
+        # 최상위 모델의 schema만 복사하여 바꾼다. 같은 모델을 참조하는 중첩된 인스턴스(재귀 모델)는 원래 schema로 직렬화한다.
+        model_schema = find_model_schema(schema)
+        fields_schema = model_schema['schema']
+        fields_schema = {**fields_schema, 'fields': {
+            name: {**field, 'serialization_exclude': True} if name in excluded else field
+            for name, field in fields_schema['fields'].items()
+        }}
+        serializer = SchemaSerializer(replace_model_schema(schema, schema=fields_schema), model_schema.get('config'))
+
+    common = dict(
+        by_alias=options['by_alias'], exclude_unset=options['exclude_unset'], exclude_defaults=options['exclude_defaults'],
+        exclude_none=options['exclude_none'], round_trip=options['round_trip'], warnings=options['warnings'],
+        serialize_as_any=options['serialize_as_any'], **runtime,
+    )
+    return SerializerPlan(
+        model,
+        tuple(options.items()),
+        frozenset(excluded),
+        partial(serializer.to_json, indent=options['indent'], **common),
+        partial(serializer.to_python, mode=options['mode'], **common),
+    )
+
+
+def _items(value: IncEx) -> list[tuple[str, Any]]:
+    if isinstance(value, dict):
+        return list(value.items())
+    return [(name, True) for name in value]
+
+
+def _freeze(value: Any) -> Any:
+    """include/exclude를 캐시 key로 사용할 수 있도록 hash 가능한 값으로 바꾼다."""
+    if isinstance(value, dict):
+        return frozenset((key, _freeze(item)) for key, item in value.items())
+    if isinstance(value, (set, frozenset, list, tuple)):
+        return frozenset(value)
+    return value
+
+
+class Person(BaseModel):
+    first_name: str
+    last_name: str
+    age: int
+
+
+p1 = Person(first_name='Seongyeon', last_name='Kim', age=29)
+without_age = serializer_plan(Person, exclude={'age'})
+print(without_age.dump_json(p1))  # 출력: {"first_name":"Seongyeon","last_name":"Kim"}
+print(without_age.dump_json(p1) == p1.model_dump_json(exclude={'age'}))  # 출력: True
+print(without_age.dump(p1))  # 출력: {'first_name': 'Seongyeon', 'last_name': 'Kim'}
+print(serializer_plan(Person, exclude=['age']) is without_age)  # 출력: True | 같은 옵션 조합은 캐시된 계획을 사용한다.
+print(serializer_plan(Person, indent=2).dump_json(p1) == p1.model_dump_json(indent=2))  # 출력: True
+
+
+class Address(BaseModel):
+    city: str
+    street: str
+
+
+class Customer(BaseModel):
+    name: str = Field(alias='customerName')
+    email: Optional[str] = None
+    address: Address
+
+
+customer = Customer(customerName='Isaac', address=Address(city='London', street='Main St'))
+public = serializer_plan(Customer, by_alias=True, exclude_none=True, exclude={'address': {'street'}})
+print(public.dump_json_bytes(customer))  # 출력: b'{"customerName":"Isaac","address":{"city":"London"}}'
+print(public.excluded)  # 출력: frozenset() | 중첩된 exclude는 호출할 때 넘긴다.
+print(serializer_plan(Customer, include={'name', 'address'}).excluded)  # 출력: frozenset({'email'})
+
+
+class Category(BaseModel):
+    name: str
+    note: Optional[str] = None
+    children: list['Category'] = []
+
+
+tree = Category(name='root', note='top', children=[Category(name='leaf', note='inner')])
+without_note = serializer_plan(Category, exclude={'note'})
+print(without_note.dump(tree))  # 출력: {'name': 'root', 'children': [{'name': 'leaf', 'note': 'inner', 'children': []}]}
+print(without_note.dump(tree) == tree.model_dump(exclude={'note'}))  # 출력: True | 중첩된 인스턴스는 최상위 exclude의 영향을 받지 않는다.
+
+
+class Profile(BaseModel):
+    name: str
+    title: str
+
+    @computed_field
+    @property
+    def display(self) -> str:
+        return f'{self.title} {self.name}'
+
+
+profile = Profile(name='Kim', title='Dr.')
+print(serializer_plan(Profile).dump(profile))  # 출력: {'name': 'Kim', 'title': 'Dr.', 'display': 'Dr. Kim'}
+print(serializer_plan(Profile, exclude={'display'}).dump_json(profile))  # 출력: {"name":"Kim","title":"Dr."}
+print(serializer_plan(Profile, include={'name'}).dump_json(profile))  # 출력: {"name":"Kim"}
+for options in ({'exclude': {'display'}}, {'include': {'name'}}, {'include': {'name', 'display'}}, {'exclude': {'title'}}):
+    assert serializer_plan(Profile, **options).dump_json(profile) == profile.model_dump_json(**options)
+
+print()
+print("--------------------")
+
+# 벤치마크: 같은 옵션 조합으로 반복해서 직렬화하는 비용
+# - Person(3 필드) exclude={'age'}, Wide(필드 30개) include 5개 필드, Customer by_alias + exclude_none + 중첩 exclude
+Wide = create_model('Wide', **{f'field_{i}': (int, i) for i in range(30)})
+wide = Wide()
+wide_include = {f'field_{i}' for i in range(5)}
+
+cases = {
+    "Person exclude={'age'}": (p1, {'exclude': {'age'}}),
+    'Wide include 5/30 fields': (wide, {'include': wide_include}),
+    'Customer public view': (customer, {'by_alias': True, 'exclude_none': True, 'exclude': {'address': {'street'}}}),
+}
+NUMBER, REPEAT = 100_000, 5
+
+
+def per_call(func: Callable[[], Any]) -> float:
+    return min(repeat(func, number=NUMBER, repeat=REPEAT)) / NUMBER
+
+
+print(f"{'':<26} {'model_dump_json':>16} {'plan.dump_json':>16} {'dump_json_bytes':>16} {'lookup + dump':>14}")
+for name, (instance, options) in cases.items():
+    plan = serializer_plan(type(instance), **options)
+    assert plan.dump_json(instance) == instance.model_dump_json(**options)
+    stock = per_call(lambda: instance.model_dump_json(**options))
+    planned = per_call(lambda: plan.dump_json(instance))
+    planned_bytes = per_call(lambda: plan.dump_json_bytes(instance))
+    lookup = per_call(lambda: serializer_plan(type(instance), **options).dump_json_bytes(instance))
+    print(f"{name:<26} {stock * 1e6:>13.2f} µs {planned * 1e6:>13.2f} µs {planned_bytes * 1e6:>13.2f} µs {lookup * 1e6:>11.2f} µs "
+          f"x{stock / planned_bytes:.2f}")
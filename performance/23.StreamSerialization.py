@@ -0,0 +1,372 @@
+"""
+`basics/2. (De)Serialization.py` 의 `p1.model_dump_json()`은 항상 완성된 str을 만든다.
+- 모델 목록을 내보낼 때 `'[' + ','.join(p.model_dump_json() for p in people) + ']'` 처럼 만들면,
+  모든 항목의 str, 합친 str, 그리고 파일/소켓에 쓰기 위해 encode 한 bytes가 한꺼번에 메모리에 존재한다.
+
+JSONStreamWriter는 모델을 JSON bytes로 직렬화하여, 쓰기 가능한 대상(target)에 조금씩 써 넣는다.
+- target: write()가 있는 객체(파일, io.BufferedWriter, BytesIO 등), socket(sendall), asyncio.StreamWriter(async 함수 사용)
+- 직렬화 결과는 재사용하는 bytearray 버퍼에 모았다가, buffer_size를 넘으면 target에 쓴다.(작은 write 호출을 줄인다.)
+- write_array(models): JSON 배열(`[...]`), write_ndjson(models): 한 줄에 하나의 JSON(NDJSON)
+  - iterable을 하나씩 읽으므로, generator를 넘기면 전체 목록이나 전체 출력을 메모리에 두지 않는다.
+  - JSON 배열은 같은 모델이 연속된 항목을 chunk_size개씩 `list[Model]` 직렬화기로 한 번에 직렬화한다.(항목마다 Python 호출을 하지 않는다.)
+  - NDJSON은 항목 사이에 줄바꿈이 필요하므로 항목마다 직렬화한다.
+- 직렬화 옵션(by_alias, exclude_none 등)은 model_dump_json()과 같이 넘긴다.
+- asyncio.StreamWriter: awrite_array/awrite_ndjson은 버퍼를 비울 때마다 drain()으로 흐름 제어(backpressure)를 따른다.
+  - drain()이 없는 target(파일, BytesIO 등)에서는 async 함수도 버퍼를 쓰기만 한다.
+- write(model)은 버퍼에 모으기만 하므로, 마지막에 flush()를 호출하거나 with 문(async with 문)으로 사용한다.
+  - with 블록을 벗어날 때 남은 버퍼를 target에 쓴다.
+
+* 참고사항: pydantic-core의 to_json()은 항목마다 새 bytes를 만든다.(외부 버퍼에 직접 쓰는 API는 없다.)
+  그래서 메모리 사용량은 "버퍼 + chunk 하나의 직렬화 결과"로 제한된다.
+"""
+import asyncio
+import io
+import os
+import socket
+import tempfile
+import threading
+import tracemalloc
+from datetime import timedelta
+from itertools import groupby
+from timeit import timeit
+from typing import Any, AsyncIterable, Callable, Iterable, Self
+
+from pydantic import BaseModel, ConfigDict, TypeAdapter
+from pydantic_core import SchemaSerializer, core_schema
+
+from _playground import find_model_schema
+
+
+class JSONStreamWriter:
+    def __init__(self, target: Any, *, buffer_size: int = 64 * 1024, chunk_size: int = 1_000, **dump_options: Any):
+        if isinstance(target, asyncio.StreamWriter):
+            self._write = target.write
+        elif isinstance(target, socket.socket):
+            self._write = target.sendall
+        else:
+            self._write = target.write
+        self.target = target
+        self.buffer_size = buffer_size
+        self.chunk_size = chunk_size
+        self.dump_options = dump_options
+        self.bytes_written = 0
+        self._buffer = bytearray()
+        self._list_serializers: dict[type[BaseModel], SchemaSerializer] = {}
+
+    def write(self, model: BaseModel) -> None:
+        """모델 하나를 JSON으로 버퍼에 쓴다. 버퍼가 buffer_size보다 작으면 flush()를 호출할 때 target에 쓴다."""
+        self._append(model.__pydantic_serializer__.to_json(model, **self.dump_options))
+        self._flush_if_full()
+
+    def write_array(self, models: Iterable[BaseModel]) -> None:
+        self._append(b'[')
+        for i, chunk in enumerate(self._chunks(models)):
+            if i:
+                self._append(b',')
+            self._append(chunk)
+            self._flush_if_full()
+        self._append(b']')
+        self.flush()
+
+    def write_ndjson(self, models: Iterable[BaseModel]) -> None:
+        for model in models:
+            self._append(model.__pydantic_serializer__.to_json(model, **self.dump_options))
+            self._append(b'\n')
+            self._flush_if_full()
+        self.flush()
+
+    async def awrite_array(self, models: Iterable[BaseModel] | AsyncIterable[BaseModel]) -> None:
+        self._append(b'[')
+        first = True
+        async for batch in _abatches(models, self.chunk_size):
+            for chunk in self._chunks(batch):
+                if not first:
+                    self._append(b',')
+                first = False
+                self._append(chunk)
+            await self._adrain_if_full()
+        self._append(b']')
+        await self.aflush()
+
+    async def awrite_ndjson(self, models: Iterable[BaseModel] | AsyncIterable[BaseModel]) -> None:
+        async for batch in _abatches(models, self.chunk_size):
+            for model in batch:
+                self._append(model.__pydantic_serializer__.to_json(model, **self.dump_options))
+                self._append(b'\n')
+            await self._adrain_if_full()
+        await self.aflush()
+
+    def flush(self) -> None:
+        if self._buffer:
+            self._write(self._buffer)
+            self.bytes_written += len(self._buffer)
+            self._buffer.clear()
+        flush = getattr(self.target, 'flush', None)
+        if flush is not None and not isinstance(self.target, socket.socket):
+            flush()
+
+    async def aflush(self) -> None:
+        """버퍼를 target에 쓰고, target에 drain()이 있다면(asyncio.StreamWriter) 기다린다."""
+        if not hasattr(self.target, 'drain'):
+            self.flush()
+            return
+        if self._buffer:
+            self._write(bytes(self._buffer))  # StreamWriter.write()는 버퍼를 보관할 수 있으므로 사본을 넘긴다.
+            self.bytes_written += len(self._buffer)
+            self._buffer.clear()
+        await self.target.drain()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.flush()
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aflush()
+
+    def _chunks(self, models: Iterable[BaseModel]) -> Iterable[memoryview]:
+        """같은 모델이 연속된 항목을 chunk_size개씩 `list[Model]`로 직렬화하고, 앞뒤의 `[`, `]`를 제외한 구간을 돌려준다."""
+        for model_type, group in groupby(models, type):
+            serializer = self._list_serializer(model_type)
+            while batch := _take(group, self.chunk_size):
+                data = serializer.to_json(batch, **self.dump_options)
+                if len(data) > 2:
+                    yield memoryview(data)[1:-1]
+
+    def _list_serializer(self, model_type: type[BaseModel]) -> SchemaSerializer:
+        serializer = self._list_serializers.get(model_type)
+        if serializer is None:
+            schema = model_type.__pydantic_core_schema__
+            if schema['type'] == 'definitions':
+                list_schema = core_schema.definitions_schema(core_schema.list_schema(schema['schema']), schema['definitions'])
+            else:
+                list_schema = core_schema.list_schema(schema)
+            serializer = self._list_serializers[model_type] = SchemaSerializer(list_schema, find_model_schema(schema).get('config'))
+        return serializer
+
+    def _append(self, data: bytes | memoryview) -> None:
+        self._buffer += data
+
+    def _flush_if_full(self) -> None:
+        if len(self._buffer) >= self.buffer_size:
+            self._write(self._buffer)
+            self.bytes_written += len(self._buffer)
+            self._buffer.clear()
+
+    async def _adrain_if_full(self) -> None:
+        if len(self._buffer) >= self.buffer_size:
+            await self.aflush()
+
+
+def _take(iterator: Iterable[Any], size: int) -> list[Any]:
+    iterator = iter(iterator)
+    batch = []
+    for item in iterator:
+        batch.append(item)
+        if len(batch) == size:
+            break
+    return batch
+
+
+async def _abatches(models: Iterable[BaseModel] | AsyncIterable[BaseModel], size: int):
+    if hasattr(models, '__aiter__'):
+        batch = []
+        async for model in models:
+            batch.append(model)
+            if len(batch) == size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+        return
+    iterator = iter(models)
+    while batch := _take(iterator, size):
+        yield batch
+
+
+def write_json_array(target: Any, models: Iterable[BaseModel], **options: Any) -> int:
+    writer = JSONStreamWriter(target, **options)
+    writer.write_array(models)
+    return writer.bytes_written
+
+
+def write_ndjson(target: Any, models: Iterable[BaseModel], **options: Any) -> int:
+    writer = JSONStreamWriter(target, **options)
+    writer.write_ndjson(models)
+    return writer.bytes_written
+
+
+class Person(BaseModel):
+    first_name: str
+    last_name: str
+    age: int
+
+
+class Robot(BaseModel):
+    serial: str
+
+
+people = [Person(first_name='Seongyeon', last_name='Kim', age=29), Person(first_name='Isaac', last_name='Newton', age=84)]
+
+out = io.BytesIO()
+write_json_array(out, [*people, Robot(serial='R2')])
+print(out.getvalue())
+# 출력: b'[{"first_name":"Seongyeon","last_name":"Kim","age":29},{"first_name":"Isaac","last_name":"Newton","age":84},{"serial":"R2"}]'
+
+out = io.BytesIO()
+write_ndjson(out, people, exclude={'age'})
+print(out.getvalue().decode())
+"""
+{"first_name":"Seongyeon","last_name":"Kim"}
+{"first_name":"Isaac","last_name":"Newton"}
+"""
+
+# socket: 다른 스레드에서 읽은 결과를 확인한다.
+left, right = socket.socketpair()
+received = []
+reader = threading.Thread(target=lambda: received.append(b''.join(iter(lambda: right.recv(65536), b''))))
+reader.start()
+write_ndjson(left, people)
+left.close()
+reader.join()
+right.close()
+print(received[0].count(b'\n'))  # 출력: 2
+
+# write(): with 블록을 벗어날 때 남은 버퍼를 쓴다.
+out = io.BytesIO()
+with JSONStreamWriter(out) as writer:
+    for person in people:
+        writer.write(person)
+    print(out.getvalue())  # 출력: b'' | 아직 버퍼에 있다.
+print(out.getvalue())
+# 출력: b'{"first_name":"Seongyeon","last_name":"Kim","age":29}{"first_name":"Isaac","last_name":"Newton","age":84}'
+
+
+# asyncio.StreamWriter
+async def stream_people() -> bytes:
+    server_done = asyncio.get_running_loop().create_future()
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        server_done.set_result(await reader.read())
+        writer.close()
+
+    async def generate():
+        for person in people:
+            yield person
+
+    server = await asyncio.start_server(handle, '127.0.0.1', 0)
+    _, client = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+    await JSONStreamWriter(client).awrite_array(generate())
+    client.close()
+    await client.wait_closed()
+    data = await server_done
+    server.close()
+    await server.wait_closed()
+    return data
+
+
+print(TypeAdapter(list[Person]).validate_json(asyncio.run(stream_people())) == people)  # 출력: True
+
+
+# drain()이 없는 target도 async 함수를 사용할 수 있다.
+async def stream_to_bytes() -> bytes:
+    buffer = io.BytesIO()
+    async with JSONStreamWriter(buffer) as async_writer:
+        await async_writer.awrite_ndjson(people)
+    return buffer.getvalue()
+
+
+print(asyncio.run(stream_to_bytes()).count(b'\n'))  # 출력: 2
+
+
+class Lap(BaseModel):
+    model_config = ConfigDict(ser_json_timedelta='float')
+
+    duration: timedelta
+
+
+# 배열 직렬화기도 모델의 설정(ser_json_timedelta 등)을 따른다.
+out = io.BytesIO()
+write_json_array(out, [Lap(duration=timedelta(seconds=90))])
+print(out.getvalue() == TypeAdapter(list[Lap]).dump_json([Lap(duration=timedelta(seconds=90))]))  # 출력: True
+print(out.getvalue())  # 출력: b'[{"duration":90.0}]'
+
+print()
+print("--------------------")
+
+# 벤치마크: Person 200,000개를 파일로 내보내는 시간과 최대 메모리 사용량(tracemalloc)
+COUNT = 200_000
+
+
+def generate_people() -> Iterable[Person]:
+    return (Person(first_name=f'first-{i}', last_name=f'last-{i}', age=i % 100) for i in range(COUNT))
+
+
+exported = list(generate_people())
+path = os.path.join(tempfile.mkdtemp(), 'people.json')
+
+
+def join_strings() -> None:
+    with open(path, 'wb') as f:
+        f.write(('[' + ','.join(person.model_dump_json() for person in exported) + ']').encode())
+
+
+def list_adapter() -> None:
+    with open(path, 'wb') as f:
+        f.write(TypeAdapter(list[Person]).dump_json(exported))
+
+
+def stream_array() -> None:
+    with open(path, 'wb') as f:
+        write_json_array(f, exported)
+
+
+def stream_ndjson() -> None:
+    with open(path, 'wb') as f:
+        write_ndjson(f, exported)
+
+
+def stream_generator() -> None:
+    with open(path, 'wb') as f:
+        write_json_array(f, generate_people())
+
+
+def measure(func: Callable[[], None]) -> tuple[float, int]:
+    seconds = min(timeit(func, number=1) for _ in range(3))
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak
+
+
+list_adapter()
+expected = open(path, 'rb').read()
+stream_array()
+assert open(path, 'rb').read() == expected
+for name, func in (
+    ("'[' + ','.join(...) + ']'", join_strings),
+    ('TypeAdapter(list).dump_json', list_adapter),
+    ('write_json_array', stream_array),
+    ('write_ndjson', stream_ndjson),
+    ('write_json_array(generator)', stream_generator),  # 모델 생성 비용이 포함된다.
+):
+    seconds, peak = measure(func)
+    print(f"{name:<28} {seconds * 1e3:8.1f} ms  peak {peak / 1e6:7.2f} MB  file {os.path.getsize(path) / 1e6:.1f} MB")
+
+"""
+'[' + ','.join(...) + ']'       505.5 ms  peak   36.74 MB  file 12.8 MB
+TypeAdapter(list).dump_json     171.3 ms  peak   12.77 MB  file 12.8 MB
+write_json_array                178.9 ms  peak    0.21 MB  file 12.8 MB
+write_ndjson                    407.2 ms  peak    0.08 MB  file 12.8 MB
+write_json_array(generator)     934.4 ms  peak    1.36 MB  file 12.8 MB
+- write_json_array는 TypeAdapter(list).dump_json과 비슷한 시간에, 출력 전체를 메모리에 두지 않는다.
+- write_ndjson은 항목마다 직렬화하므로 더 느리지만, join 방식보다는 빠르다.
+"""
+
+os.remove(path)
+os.rmdir(os.path.dirname(path))
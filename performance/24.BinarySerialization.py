@@ -0,0 +1,391 @@
+"""
+`basics/2. (De)Serialization.py` 는 모델을 dict와 JSON으로만 직렬화한다.
+- 서비스 간 내부 통신에서 `Person` 같은 레코드를 JSON으로 주고받으면, 매 레코드마다 필드 이름과 따옴표, 숫자의 10진수 텍스트가 전송된다.
+
+BinaryModel은 MessagePack 형식(의 일부)으로 모델을 직렬화/역직렬화하는 메서드를 추가한다.(순수 Python, 외부 패키지 없음)
+- model_dump_bytes(): `model_dump(mode='json')`과 같은 값을 MessagePack bytes로 변환한다.
+  - 지원하는 값: None, bool, int(64bit), float(64bit), str, list/tuple(array), dict(map)
+  - mode='json' 값을 사용하므로 datetime, bytes, Enum 등은 model_dump_json()과 같은 값(문자열 등)으로 변환된다.
+- model_validate_bytes(data): MessagePack bytes를 읽어서 모델을 검증한다.(model_validate와 같은 lax 검증)
+- positional=True(schema-aware 모드): 필드 이름을 생략하고, 필드 선언 순서대로 값만 array로 저장한다.
+  - 양쪽이 같은 모델 정의(필드 순서)를 사용할 때만 사용한다. 필드를 추가할 때는 맨 뒤에 추가해야 이전 데이터를 읽을 수 있다.
+    (array가 필드보다 짧으면, 남은 필드는 기본값을 사용한다.)
+  - 필드 타입이 모델, Optional[모델], list[모델], tuple[모델, ...] 인 중첩된 모델도 array로 저장된다.
+    그 밖의 타입(dict[str, 모델], Union[모델A, 모델B] 등) 안의 모델은 map(필드 이름 포함)으로 저장된다.
+  - 선언되지 않은 extra 필드와 computed_field, Field(exclude=True) 필드는 저장되지 않는다.(읽을 때 기본값을 사용한다.)
+- packb()/unpackb()는 모델이 아닌 값에도 사용할 수 있다. 형식이 잘못된 데이터는 ValueError를 발생시킨다.
+  - hash 할 수 없는 map key(array, map)와 _MAX_DEPTH보다 깊게 중첩된 array/map도 잘못된 데이터로 처리한다.
+
+* 주의사항: pydantic의 JSON 직렬화/파싱은 Rust로 구현되어 있으므로, 순수 Python 코덱은 속도 면에서 이기지 못한다.(벤치마크 참고)
+  이 방식의 이점은 크기이다. 대역폭이 병목인 경우에 사용하고, CPU가 병목이라면 model_dump_json()을 그대로 사용한다.
+  (C 확장인 msgpack 패키지를 사용할 수 있다면, packb/unpackb를 msgpack.packb/msgpack.unpackb로 바꿔도 같은 형식이다.)
+"""
+import struct
+import types
+from functools import cache
+from timeit import repeat
+from typing import Any, Callable, Optional, Union, get_args, get_origin
+
+from pydantic import BaseModel, Field
+
+_pack_uint8, _pack_uint16, _pack_uint32, _pack_uint64 = (struct.Struct(f'>{c}').pack for c in 'BHIQ')
+_pack_int8, _pack_int16, _pack_int32, _pack_int64 = (struct.Struct(f'>{c}').pack for c in 'bhiq')
+_pack_float64 = struct.Struct('>d').pack
+_unpack_from = {code: struct.Struct(fmt).unpack_from for code, fmt in (
+    (0xca, '>f'), (0xcb, '>d'),
+    (0xcc, '>B'), (0xcd, '>H'), (0xce, '>I'), (0xcf, '>Q'),
+    (0xd0, '>b'), (0xd1, '>h'), (0xd2, '>i'), (0xd3, '>q'),
+)}
+_sizes = {0xca: 4, 0xcb: 8, 0xcc: 1, 0xcd: 2, 0xce: 4, 0xcf: 8, 0xd0: 1, 0xd1: 2, 0xd2: 4, 0xd3: 8}
+_length_from = {code: struct.Struct(fmt).unpack_from for code, fmt in (('B', '>B'), ('H', '>H'), ('I', '>I'))}
+_MAX_DEPTH = 256  # array/map 중첩 깊이 제한 (Python 재귀 한도보다 먼저 멈춘다.)
+
+
+def packb(value: Any) -> bytes:
+    out = bytearray()
+    _pack(value, out)
+    return bytes(out)
+
+
+def _pack(value: Any, out: bytearray) -> None:
+    kind = type(value)
+    if kind is str:
+        data = value.encode()
+        size = len(data)
+        if size < 32:
+            out.append(0xa0 | size)
+        else:
+            _pack_header(out, size, b'\xd9', b'\xda', b'\xdb')
+        out += data
+    elif kind is int:
+        _pack_int(value, out)
+    elif kind is float:
+        out.append(0xcb)
+        out += _pack_float64(value)
+    elif value is None:
+        out.append(0xc0)
+    elif kind is bool:
+        out.append(0xc3 if value else 0xc2)
+    elif kind is dict:
+        size = len(value)
+        if size < 16:
+            out.append(0x80 | size)
+        else:
+            _pack_header(out, size, None, b'\xde', b'\xdf')
+        for key, item in value.items():
+            _pack(key, out)
+            _pack(item, out)
+    elif kind is list or kind is tuple:
+        size = len(value)
+        if size < 16:
+            out.append(0x90 | size)
+        else:
+            _pack_header(out, size, None, b'\xdc', b'\xdd')
+        for item in value:
+            _pack(item, out)
+    elif kind is bytes:
+        _pack_header(out, len(value), b'\xc4', b'\xc5', b'\xc6')
+        out += value
+    else:
+        raise TypeError(f'MessagePack으로 직렬화할 수 없는 타입입니다: {kind.__name__}')
+
+
+def _pack_int(value: int, out: bytearray) -> None:
+    if 0 <= value < 0x80:
+        out.append(value)
+    elif -32 <= value < 0:
+        out.append(value & 0xff)
+    elif value > 0:
+        if value <= 0xff:
+            out += b'\xcc' + _pack_uint8(value)
+        elif value <= 0xffff:
+            out += b'\xcd' + _pack_uint16(value)
+        elif value <= 0xffffffff:
+            out += b'\xce' + _pack_uint32(value)
+        elif value <= 0xffffffffffffffff:
+            out += b'\xcf' + _pack_uint64(value)
+        else:
+            raise ValueError(f'64bit 범위를 벗어난 정수입니다: {value}')
+    elif value >= -0x80:
+        out += b'\xd0' + _pack_int8(value)
+    elif value >= -0x8000:
+        out += b'\xd1' + _pack_int16(value)
+    elif value >= -0x80000000:
+        out += b'\xd2' + _pack_int32(value)
+    elif value >= -0x8000000000000000:
+        out += b'\xd3' + _pack_int64(value)
+    else:
+        raise ValueError(f'64bit 범위를 벗어난 정수입니다: {value}')
+
+
+def _pack_header(out: bytearray, size: int, code8: Optional[bytes], code16: bytes, code32: bytes) -> None:
+    if code8 is not None and size <= 0xff:
+        out += code8 + _pack_uint8(size)
+    elif size <= 0xffff:
+        out += code16 + _pack_uint16(size)
+    else:
+        out += code32 + _pack_uint32(size)
+
+
+def unpackb(data: bytes) -> Any:
+    try:
+        value, position = _unpack(data, 0, 0)
+    except (IndexError, struct.error, UnicodeDecodeError, TypeError, RecursionError) as ex:
+        raise ValueError(f'잘못된 MessagePack 데이터입니다: {ex}') from None
+    if position != len(data):
+        raise ValueError(f'잘못된 MessagePack 데이터입니다: {len(data) - position} bytes가 남았습니다.')
+    return value
+
+
+def _unpack(data: bytes, position: int, depth: int) -> tuple[Any, int]:
+    code = data[position]
+    position += 1
+    if code < 0x80:  # positive fixint
+        return code, position
+    if code >= 0xe0:  # negative fixint
+        return code - 0x100, position
+    if 0xa0 <= code <= 0xbf:  # fixstr
+        end = position + (code & 0x1f)
+        if end > len(data):
+            raise IndexError('문자열이 잘렸습니다.')
+        return data[position:end].decode(), end
+    if 0x80 <= code <= 0x8f:
+        return _unpack_map(data, position, code & 0x0f, depth)
+    if 0x90 <= code <= 0x9f:
+        return _unpack_array(data, position, code & 0x0f, depth)
+    if code == 0xc0:
+        return None, position
+    if code == 0xc2:
+        return False, position
+    if code == 0xc3:
+        return True, position
+    if code in _unpack_from:
+        return _unpack_from[code](data, position)[0], position + _sizes[code]
+    if code in (0xd9, 0xda, 0xdb, 0xc4, 0xc5, 0xc6):
+        size, position = _length(data, position, 'BHI'[(code - 0xd9) if code >= 0xd9 else (code - 0xc4)])
+        end = position + size
+        if end > len(data):
+            raise IndexError('문자열이 잘렸습니다.')
+        chunk = data[position:end]
+        return (chunk.decode() if code >= 0xd9 else bytes(chunk)), end
+    if code in (0xdc, 0xdd):
+        size, position = _length(data, position, 'HI'[code - 0xdc])
+        return _unpack_array(data, position, size, depth)
+    if code in (0xde, 0xdf):
+        size, position = _length(data, position, 'HI'[code - 0xde])
+        return _unpack_map(data, position, size, depth)
+    raise ValueError(f'지원하지 않는 MessagePack 타입입니다: 0x{code:02x}')
+
+
+def _length(data: bytes, position: int, fmt: str) -> tuple[int, int]:
+    return _length_from[fmt](data, position)[0], position + struct.calcsize(f'>{fmt}')
+
+
+def _unpack_array(data: bytes, position: int, size: int, depth: int) -> tuple[list[Any], int]:
+    if depth >= _MAX_DEPTH:
+        raise ValueError(f'잘못된 MessagePack 데이터입니다: {_MAX_DEPTH}단계보다 깊게 중첩되었습니다.')
+    items = []
+    for _ in range(size):
+        item, position = _unpack(data, position, depth + 1)
+        items.append(item)
+    return items, position
+
+
+def _unpack_map(data: bytes, position: int, size: int, depth: int) -> tuple[dict[Any, Any], int]:
+    if depth >= _MAX_DEPTH:
+        raise ValueError(f'잘못된 MessagePack 데이터입니다: {_MAX_DEPTH}단계보다 깊게 중첩되었습니다.')
+    result = {}
+    for _ in range(size):
+        key, position = _unpack(data, position, depth + 1)
+        result[key], position = _unpack(data, position, depth + 1)  # key가 list/dict라면 TypeError
+    return result, position
+
+
+Layout = tuple[tuple[str, str, Optional[str], Optional[type[BaseModel]]], ...]
+
+
+@cache
+def _layout(model: type[BaseModel]) -> Layout:
+    """필드 이름, 검증할 때 사용하는 key(alias), 중첩 종류(None, 'model', 'list'), 중첩된 모델을 필드 선언 순서대로 돌려준다."""
+    layout = []
+    for name, field in model.model_fields.items():
+        if field.exclude:
+            continue  # Field(exclude=True) 필드는 model_dump() 결과에 없으므로 저장하지 않는다.
+        # AliasChoices/AliasPath는 필드 이름으로 넘기므로 populate_by_name=True가 필요하다.
+        key = field.validation_alias if isinstance(field.validation_alias, str) else field.alias or name
+        annotation = field.annotation
+        if get_origin(annotation) in (Union, types.UnionType):
+            args = [arg for arg in get_args(annotation) if arg is not type(None)]
+            annotation = args[0] if len(args) == 1 else annotation
+        origin, args = get_origin(annotation), get_args(annotation)
+        if _is_model(annotation):
+            layout.append((name, key, 'model', annotation))
+        elif origin in (list, tuple) and args and _is_model(args[0]) and (origin is list or args[1:] in ((), (...,))):
+            layout.append((name, key, 'list', args[0]))
+        else:
+            layout.append((name, key, None, None))
+    return tuple(layout)
+
+
+def _is_model(annotation: Any) -> bool:
+    return isinstance(annotation, type) and issubclass(annotation, BaseModel)
+
+
+def _to_positional(model: type[BaseModel], values: dict[str, Any]) -> list[Any]:
+    result = []
+    for name, _, kind, nested in _layout(model):
+        value = values[name]
+        if value is not None and kind is not None:
+            value = _to_positional(nested, value) if kind == 'model' else [_to_positional(nested, item) for item in value]
+        result.append(value)
+    return result
+
+
+def _from_positional(model: type[BaseModel], values: Any) -> Any:
+    layout = _layout(model)
+    if type(values) is not list:
+        return values  # 잘못된 입력은 그대로 넘겨서, 검증 에러로 보고되도록 한다.
+    if len(values) > len(layout):
+        raise ValueError(f'{model.__name__}의 필드는 {len(layout)}개이지만, 값은 {len(values)}개입니다.')
+    result = {}
+    for (_, key, kind, nested), value in zip(layout, values):
+        if value is not None and kind is not None:
+            if kind == 'model':
+                value = _from_positional(nested, value)
+            elif type(value) is list:
+                value = [_from_positional(nested, item) for item in value]
+        result[key] = value
+    return result
+
+
+class BinaryModel(BaseModel):
+    def model_dump_bytes(self, *, positional: bool = False, by_alias: bool = False, exclude_none: bool = False) -> bytes:
+        if positional:
+            # 필드 이름을 생략하므로, 필드를 제외하는 옵션(exclude_none 등)은 사용할 수 없다.
+            # pydantic-core의 to_python()은 by_alias=True가 기본값이므로, 필드 이름으로 직렬화하도록 넘긴다.
+            return packb(_to_positional(type(self), self.__pydantic_serializer__.to_python(self, mode='json', by_alias=False)))
+        return packb(self.__pydantic_serializer__.to_python(self, mode='json', by_alias=by_alias, exclude_none=exclude_none))
+
+    @classmethod
+    def model_validate_bytes(cls, data: bytes, *, positional: bool = False, strict: Optional[bool] = None):
+        value = unpackb(data)
+        if positional:
+            if type(value) is not list:
+                raise ValueError('positional 형식은 MessagePack array여야 합니다.')
+            value = _from_positional(cls, value)  # 각 필드의 alias를 key로 사용한다.
+        return cls.__pydantic_validator__.validate_python(value, strict=strict)
+
+
+class Person(BinaryModel):
+    first_name: str
+    last_name: str
+    age: int
+
+
+p1 = Person(first_name='Seongyeon', last_name='Kim', age=29)
+print(p1.model_dump_json())  # 출력: {"first_name":"Seongyeon","last_name":"Kim","age":29}
+print(p1.model_dump_bytes())
+# 출력: b'\x83\xaafirst_name\xa9Seongyeon\xa9last_name\xa3Kim\xa3age\x1d'
+print(p1.model_dump_bytes(positional=True))  # 출력: b'\x93\xa9Seongyeon\xa3Kim\x1d'
+print(len(p1.model_dump_json()), len(p1.model_dump_bytes()), len(p1.model_dump_bytes(positional=True)))  # 출력: 53 41 16
+print(Person.model_validate_bytes(p1.model_dump_bytes()) == p1)  # 출력: True
+print(Person.model_validate_bytes(p1.model_dump_bytes(positional=True), positional=True) == p1)  # 출력: True
+
+try:
+    Person.model_validate_bytes(p1.model_dump_bytes()[:-3])
+except ValueError as ex:
+    print(ex)  # 출력: 잘못된 MessagePack 데이터입니다: 문자열이 잘렸습니다.
+
+
+class Item(BaseModel):
+    sku: str
+    quantity: int
+    price: float
+
+
+class Order(BinaryModel):
+    order_id: int
+    customer: Person
+    items: list[Item]
+    note: Optional[str] = None
+    paid: bool = False
+
+
+order = Order(
+    order_id=2_024_000_001,
+    customer=p1,
+    items=[Item(sku=f'SKU-{i:04d}', quantity=i, price=i * 1.5) for i in range(20)],
+    paid=True,
+)
+print(Order.model_validate_bytes(order.model_dump_bytes(positional=True), positional=True) == order)  # 출력: True
+order_id, customer, items, note, paid = unpackb(order.model_dump_bytes(positional=True))
+print(customer, items[1])  # 출력: ['Seongyeon', 'Kim', 29] ['SKU-0001', 1, 1.5] | 중첩된 모델도 array로 저장된다.
+print(unpackb(packb({'big': 2 ** 40, 'negative': -300, 'tags': ['a'] * 20, 'raw': b'\x00\x01'})))
+# 출력: {'big': 1099511627776, 'negative': -300, 'tags': ['a', 'a', ..., 'a'], 'raw': b'\x00\x01'}
+
+
+class Account(BinaryModel):
+    username: str
+    password: str = Field(default='', exclude=True)
+    active: bool = True
+
+
+account = Account(username='kim', password='secret')
+print(unpackb(account.model_dump_bytes(positional=True)))  # 출력: ['kim', True] | exclude=True 필드는 저장되지 않는다.
+print(Account.model_validate_bytes(account.model_dump_bytes(positional=True), positional=True))  # 출력: username='kim' password='' active=True
+
+
+class Member(BinaryModel):
+    user_name: str = Field(alias='userName')
+    account: Account
+
+
+member = Member(userName='kim', account=account)
+print(unpackb(member.model_dump_bytes(positional=True)))  # 출력: ['kim', ['kim', True]]
+print(Member.model_validate_bytes(member.model_dump_bytes(positional=True), positional=True))
+# 출력: user_name='kim' account=Account(username='kim', password='', active=True) | populate_by_name 없이 alias로 검증한다.
+
+for data in (b'\x81\x90\x00', b'\x91' * 100_000 + b'\x00'):  # hash 할 수 없는 map key, 깊게 중첩된 array
+    try:
+        unpackb(data)
+    except ValueError as ex:
+        print(ex)
+        # 출력: 잘못된 MessagePack 데이터입니다: unhashable type: 'list'
+        # 출력: 잘못된 MessagePack 데이터입니다: 256단계보다 깊게 중첩되었습니다.
+
+print()
+print("--------------------")
+
+# 벤치마크: 크기와 속도(직렬화, 역직렬화+검증)
+NUMBER, REPEAT = 20_000, 5
+
+
+def per_call(func: Callable[[], Any]) -> float:
+    return min(repeat(func, number=NUMBER, repeat=REPEAT)) / NUMBER
+
+
+for instance in (p1, order):
+    model = type(instance)
+    json_data = instance.model_dump_json()
+    keyed, positional = instance.model_dump_bytes(), instance.model_dump_bytes(positional=True)
+    print(f"{model.__name__}: size JSON {len(json_data.encode())} B, MessagePack {len(keyed)} B, positional {len(positional)} B")
+    rows = (
+        ('model_dump_json', lambda: instance.model_dump_json(), lambda: model.model_validate_json(json_data)),
+        ('model_dump_bytes', lambda: instance.model_dump_bytes(), lambda: model.model_validate_bytes(keyed)),
+        ('positional', lambda: instance.model_dump_bytes(positional=True),
+         lambda: model.model_validate_bytes(positional, positional=True)),
+    )
+    for name, dump, validate in rows:
+        print(f"  {name:<18} dump {per_call(dump) * 1e6:7.2f} µs  validate {per_call(validate) * 1e6:7.2f} µs")
+"""
+Person: size JSON 53 B, MessagePack 41 B, positional 16 B
+  model_dump_json    dump    2.54 µs  validate    3.58 µs
+  model_dump_bytes   dump    5.93 µs  validate    8.35 µs
+  positional         dump    5.24 µs  validate    7.47 µs
+Order: size JSON 1025 B, MessagePack 866 B, positional 427 B
+  model_dump_json    dump   22.98 µs  validate   42.07 µs
+  model_dump_bytes   dump   66.85 µs  validate  127.51 µs
+  positional         dump   59.75 µs  validate  102.72 µs
+- positional 형식은 JSON 대비 Person 30%, Order 42% 크기이다.
+- 순수 Python 코덱이므로 직렬화/역직렬화는 JSON보다 2~3배 느리다.
+"""
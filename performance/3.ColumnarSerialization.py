@@ -0,0 +1,227 @@
+"""
+`basics/2. (De)Serialization.py` 에서는 인스턴스마다 model_dump()를 호출하여, 행(row) 하나 당 dict 하나를 만들었다.
+- 분석용 export 처럼 수많은 인스턴스를 한꺼번에 내보내는 경우, N개의 dict를 만드는 비용과 메모리가 부담이 된다.
+- 분석 도구(pandas, NumPy, Arrow 등)는 대부분 행 단위가 아닌 열(column) 단위의 데이터를 원한다.
+
+열 단위(struct-of-arrays)로 직렬화하면 필드 이름을 key로, 해당 필드의 값들을 모은 열을 value로 갖는 dict 하나만 만든다.
+- int, float, bool 필드는 array.array에 담는다. 값 하나 당 8바이트(bool은 1바이트)만 차지하는 연속된 버퍼이다.
+  - array.array는 buffer protocol을 지원하므로, memoryview나 numpy.frombuffer()로 복사 없이 넘겨줄 수 있다.
+  - None이 섞여 있거나 64bit 범위를 벗어나는 int가 있으면 list로 대체한다.
+- str 등 나머지 기본 타입 필드는 list에 담는다.
+- 중첩 모델 등 직렬화가 필요한 타입은, 열 전체를 TypeAdapter(list[타입]).dump_python()으로 한 번에 직렬화한다.
+  - model_dump()의 결과와 같은 형태가 된다.
+- PlainSerializer, WrapSerializer 등 Annotated로 지정한 serializer가 있는 필드는, 타입 대신 Annotated[타입, ...]으로 직렬화한다.
+- @field_serializer가 지정된 필드는 인스턴스(self)가 필요할 수 있으므로, TypeAdapter(list[모델])에 include로 해당 필드만 직렬화한다.
+- model_dump()와 같은 열을 만든다.
+  - Field(exclude=True) 필드는 열을 만들지 않는다.
+  - @computed_field는 property 값을 반환 타입의 열로 직렬화한다.
+  - @model_serializer가 있는 모델은 출력 형태를 알 수 없으므로, TypeAdapter(list[모델]).dump_python()으로 행 단위로 직렬화한 뒤 열로 바꾼다.
+"""
+import tracemalloc
+from array import array
+from operator import attrgetter
+from timeit import timeit
+from typing import Annotated, Any, Callable, Generic, Sequence, TypeVar
+
+from pydantic import (
+    BaseModel, Field, PlainSerializer, TypeAdapter, WrapSerializer, computed_field, field_serializer, model_serializer,
+)
+
+ModelT = TypeVar('ModelT', bound=BaseModel)
+
+_ARRAY_TYPECODES = {int: 'q', float: 'd', bool: 'b'}
+_PLAIN_TYPES = {str, bytes, int, float, bool}
+_SERIALIZERS = (PlainSerializer, WrapSerializer)
+
+
+class ColumnarDumper(Generic[ModelT]):
+    """
+    모델의 필드 별로 어떤 열(array/list)에 담을지 미리 정해두고, 인스턴스 목록을 열 단위로 직렬화한다.
+    """
+
+    def __init__(self, model: type[ModelT]):
+        self.model = model
+        self._plans: dict[str, tuple[attrgetter | None, str | None, Callable[[list[Any]], list[Any]] | None]] = {}
+        decorators = model.__pydantic_decorators__
+        if decorators.model_serializers:
+            # model_serializer는 출력 형태를 바꿀 수 있으므로, 행 단위로 직렬화한다.(_dump_rows)
+            self._rows_adapter: TypeAdapter | None = TypeAdapter(list[model])
+            return
+        self._rows_adapter = None
+
+        names = [*model.model_fields, *model.model_computed_fields]
+        decorated = {
+            name
+            for decorator in decorators.field_serializers.values()
+            for name in (names if '*' in decorator.info.fields else decorator.info.fields)
+        }
+        rows_adapter = TypeAdapter(list[model]) if decorated else None
+        annotations = [
+            (name, field.annotation, field.metadata) for name, field in model.model_fields.items() if not field.exclude
+        ]
+        annotations += [(name, field.return_type, []) for name, field in model.model_computed_fields.items()]
+        for name, annotation, metadata in annotations:
+            if name in decorated:
+                # field_serializer는 인스턴스가 필요할 수 있으므로, 값이 아닌 인스턴스 목록을 직렬화한다.
+                self._plans[name] = (None, None, self._decorated_dumper(rows_adapter, name))
+                continue
+            if any(isinstance(item, _SERIALIZERS) for item in metadata):  # Annotated로 지정한 직렬화 설정을 유지한다.
+                annotation = Annotated[(annotation, *metadata)]
+            typecode = _ARRAY_TYPECODES.get(annotation)
+            dumper = None if annotation in _PLAIN_TYPES else TypeAdapter(list[annotation]).dump_python
+            self._plans[name] = (attrgetter(name), typecode, dumper)
+
+    @staticmethod
+    def _decorated_dumper(rows_adapter: TypeAdapter, name: str) -> Callable[[list[Any]], list[Any]]:
+        include = {'__all__': {name}}
+        return lambda instances: [row[name] for row in rows_adapter.dump_python(instances, include=include)]
+
+    def dump(self, instances: Sequence[ModelT], include: set[str] | None = None) -> dict[str, array | list[Any]]:
+        if self._rows_adapter is not None:
+            return self._dump_rows(instances, include)
+        columns: dict[str, array | list[Any]] = {}
+        for name, (getter, typecode, dumper) in self._plans.items():
+            if include is not None and name not in include:
+                continue
+            if typecode is not None:
+                try:
+                    columns[name] = array(typecode, map(getter, instances))
+                    continue
+                except (TypeError, OverflowError):
+                    pass
+            values = list(instances) if getter is None else list(map(getter, instances))
+            columns[name] = values if dumper is None else dumper(values)
+        return columns
+
+    def _dump_rows(self, instances: Sequence[ModelT], include: set[str] | None) -> dict[str, list[Any]]:
+        rows = self._rows_adapter.dump_python(instances)
+        if any(type(row) is not dict for row in rows):
+            raise TypeError(f'{self.model.__name__}의 model_serializer가 dict가 아닌 값을 반환하여 열로 바꿀 수 없습니다.')
+        names = dict.fromkeys(name for row in rows for name in row)  # 행마다 key가 다를 수 있다.
+        return {
+            name: [row.get(name) for row in rows]
+            for name in names if include is None or name in include
+        }
+
+
+class Person(BaseModel):
+    first_name: str
+    last_name: str
+    age: int
+
+
+class Coordinate(BaseModel):
+    x: float
+    y: float
+
+
+class Route(BaseModel):
+    name: str
+    start: Coordinate
+    distance: float | None = None
+
+
+people = [Person(first_name='Seongyeon', last_name='Kim', age=29), Person(first_name='Isaac', last_name='Newton', age=84)]
+print(ColumnarDumper(Person).dump(people))
+# 출력: {'first_name': ['Seongyeon', 'Isaac'], 'last_name': ['Kim', 'Newton'], 'age': array('q', [29, 84])}
+
+coordinates = [Coordinate(x=1.1, y=-2.2), Coordinate(x=0, y='-2.2')]
+columns = ColumnarDumper(Coordinate).dump(coordinates)
+print(columns)  # 출력: {'x': array('d', [1.1, 0.0]), 'y': array('d', [-2.2, -2.2])}
+
+# buffer protocol: 복사 없이 다른 라이브러리로 넘겨줄 수 있다. (NumPy가 설치되어 있다면 numpy.frombuffer(columns['x']))
+x_view = memoryview(columns['x'])
+print(x_view.format, x_view.itemsize, x_view.nbytes)  # 출력: d 8 16
+
+routes = [Route(name='home', start=Coordinate(x=1, y=2)), Route(name='work', start=Coordinate(x=3, y=4), distance=1.5)]
+print(ColumnarDumper(Route).dump(routes))
+# 출력: {'name': ['home', 'work'], 'start': [{'x': 1.0, 'y': 2.0}, {'x': 3.0, 'y': 4.0}], 'distance': [None, 1.5]}
+# distance는 None이 섞여 있으므로 array 대신 list가 된다.
+
+
+class Measurement(BaseModel):
+    sensor: str
+    celsius: Annotated[float, PlainSerializer(lambda value: round(value, 1))]
+    tags: set[str]
+
+    @field_serializer('tags')
+    def sort_tags(self, tags: set[str]) -> list[str]:
+        return sorted(tags)
+
+
+measurements = [Measurement(sensor='a', celsius=21.349, tags={'y', 'x'}), Measurement(sensor='b', celsius=19.96, tags=set())]
+print(ColumnarDumper(Measurement).dump(measurements))
+# 출력: {'sensor': ['a', 'b'], 'celsius': [21.3, 20.0], 'tags': [['x', 'y'], []]}
+print([measurement.model_dump() for measurement in measurements])
+# 출력: [{'sensor': 'a', 'celsius': 21.3, 'tags': ['x', 'y']}, {'sensor': 'b', 'celsius': 20.0, 'tags': []}] | model_dump()와 같은 값이다.
+
+
+class Account(BaseModel):
+    username: str
+    password: str = Field(exclude=True)
+    visits: int
+
+    @computed_field
+    @property
+    def display(self) -> str:
+        return self.username.title()
+
+
+class Envelope(BaseModel):
+    kind: str
+    body: str
+
+    @model_serializer
+    def serialize(self) -> dict[str, Any]:
+        return {self.kind: self.body}
+
+
+def dump_rows_to_columns(instances: Sequence[BaseModel]) -> dict[str, list]:
+    rows = [instance.model_dump() for instance in instances]
+    return {name: [row.get(name) for row in rows] for name in dict.fromkeys(name for row in rows for name in row)}
+
+
+accounts = [Account(username='kim', password='secret', visits=3), Account(username='lee', password='hunter2', visits=5)]
+print(ColumnarDumper(Account).dump(accounts))
+# 출력: {'username': ['kim', 'lee'], 'visits': array('q', [3, 5]), 'display': ['Kim', 'Lee']} | password는 직렬화하지 않는다.
+envelopes = [Envelope(kind='text', body='hi'), Envelope(kind='html', body='<p>hi</p>')]
+print(ColumnarDumper(Envelope).dump(envelopes))
+# 출력: {'text': ['hi', None], 'html': [None, '<p>hi</p>']} | model_serializer가 있는 모델은 행 단위로 직렬화한 뒤 열로 바꾼다.
+for instances in (people, routes, measurements, accounts, envelopes):
+    columns = ColumnarDumper(type(instances[0])).dump(instances)
+    assert {name: list(column) for name, column in columns.items()} == dump_rows_to_columns(instances)
+
+print()
+print("--------------------")
+
+# 벤치마크: 인스턴스 마다 model_dump() (+ 열 단위로 변환) vs ColumnarDumper
+ROWS = 100_000
+NUMBER = 5
+
+coordinate_rows = [Coordinate(x=i * 0.5, y=-i * 0.5) for i in range(ROWS)]
+person_rows = [Person(first_name=f'first-{i}', last_name=f'last-{i}', age=i % 100) for i in range(ROWS)]
+coordinate_dumper = ColumnarDumper(Coordinate)
+person_dumper = ColumnarDumper(Person)
+
+
+def dump_rows(instances: Sequence[BaseModel]) -> list[dict]:
+    return [instance.model_dump() for instance in instances]
+
+
+benchmarks = {
+    'Coordinate model_dump() per row': lambda: dump_rows(coordinate_rows),
+    'Coordinate rows -> columns': lambda: dump_rows_to_columns(coordinate_rows),
+    'Coordinate ColumnarDumper': lambda: coordinate_dumper.dump(coordinate_rows),
+    'Person model_dump() per row': lambda: dump_rows(person_rows),
+    'Person rows -> columns': lambda: dump_rows_to_columns(person_rows),
+    'Person ColumnarDumper': lambda: person_dumper.dump(person_rows),
+}
+print(f"{ROWS:,} instances x {NUMBER} runs")
+for name, func in benchmarks.items():
+    seconds = timeit(func, number=NUMBER) / NUMBER
+    tracemalloc.start()
+    result = func()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    print(f"{name:<34} {seconds * 1000:8.2f} ms {size / 1e6:8.2f} MB retained")
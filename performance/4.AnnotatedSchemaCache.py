@@ -0,0 +1,353 @@
+"""
+`Annotated Types/AnnotatedTypes.py` 에서는 BoundedInt, BoundedList[T], StandardString 처럼 제약 조건이 포함된 재사용 가능한 타입을 정의했다.
+- 타입 정의는 재사용되지만, 모델 클래스가 정의될 때마다 Pydantic은 같은 제약 조건의 core schema를 처음부터 다시 만든다.
+  - Annotated의 메타데이터(Field, StringConstraints)를 해석하고, 제약 조건을 core schema에 적용하는 작업이 반복된다.
+- 모델이 수백 개라면, 클래스 생성(=서비스 시작 시간)의 상당 부분을 이 작업이 차지한다.
+
+AnnotatedSchemaCache는 `(정규화된 타입, 메타데이터, 설정)`을 key로 core schema를 한 번만 만들고, 이후에는 캐시된 schema의 복사본을 돌려준다.
+- cache(Annotated[int, Field(gt=0, le=100)])은 CachedType 클래스(BoundedInt 등)를 반환한다.
+  - 메타데이터는 클래스 안에 숨겨져, Pydantic이 모델을 만들 때 메타데이터를 다시 해석하지 않는다.
+  - 클래스의 __get_pydantic_core_schema__가 캐시된 schema를 돌려주므로, Pydantic은 타입과 메타데이터를 해석하는 과정을 건너뛴다.
+    - Annotated[int, 마커] 처럼 메타데이터로 남겨두면, Pydantic은 int의 메타데이터 해석(runtime Protocol isinstance 등)을 그대로 수행하므로
+      캐시를 사용해도 빨라지지 않는다.(벤치마크에서 오히려 느려지는 경우도 있었다.)
+  - description, alias 처럼 제약 조건이 아닌 값을 가진 Field는 캐시하지 않고 Annotated[CachedType, Field(...)]로 남겨둔다.
+- BoundedList[int], BoundedList[str] 처럼 TypeVar가 치환된 타입은 치환된 타입(list[int], list[str]) 별로 캐시된다.
+- 같은 제약 조건을 따로 작성해도(Field(gt=0, le=100)를 두 번 작성) 정규화된 key가 같으므로 같은 클래스와 schema를 공유한다.
+- schema는 공개 API인 TypeAdapter(타입, config=...)로 만들고, cache(..., config=ConfigDict(...))로 넘긴 설정도 key에 포함한다.
+  - strict, str_strip_whitespace, allow_inf_nan 처럼 CoreConfig로 전달되는 모델 설정은 모델의 검증기를 컴파일할 때 그대로 적용된다.
+  - json_encoders, arbitrary_types_allowed 처럼 schema 생성에 사용되는 설정은 모델 설정이 아니라 cache()의 config를 따른다.
+- Pydantic은 모델을 만들면서 받은 schema를 제자리에서 수정(Annotated[캐시된 타입, Field(lt=5)]의 제약 조건 적용 등)하므로,
+  캐시에는 복사본을 저장하고 매번 복사본을 돌려준다.(다른 모델의 제약 조건이 섞이지 않는다.)
+- 중첩 모델처럼 다른 schema를 참조(definition-ref)하는 schema는 처음 만든 모델의 definitions에만 존재하므로 캐시하지 않는다.
+- cache.validator(타입)은 같은 key의 TypeAdapter(=컴파일된 검증기)를 하나만 만들어 공유한다.
+- maxsize를 넘으면 가장 오래 사용되지 않은 항목부터 제거(LRU)하며, cache_info()로 hit/miss를 확인할 수 있다.
+
+* 참고사항: 모델의 SchemaValidator(Rust)는 모델 단위로 컴파일되고, 필드 정보(FieldInfo)를 만드는 비용도 그대로 남는다.
+  캐시가 줄여주는 것은 Annotated 타입의 core schema 생성 비용이며, 벤치마크에서 모델 생성 시간이 약 20~30% 줄어든다.
+"""
+import threading
+from collections import OrderedDict
+from time import perf_counter
+from typing import Annotated, Any, Hashable, NamedTuple, Optional, TypeVar, get_args, get_origin
+
+from pydantic import BaseModel, ConfigDict, Field, GetCoreSchemaHandler, StringConstraints, TypeAdapter, ValidationError, create_model
+from pydantic.fields import FieldInfo
+from pydantic_core import CoreSchema
+
+from _playground import copy_schema
+
+_UNCACHEABLE: Any = object()  # 다른 schema를 참조하여 캐시할 수 없는 key의 표시
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class CachedType(type):
+    """Annotated 타입을 대신하는 클래스의 metaclass: core schema를 AnnotatedSchemaCache에서 가져온다."""
+
+    __cache__: 'AnnotatedSchemaCache'
+    __annotated__: Any  # 캐시할 Annotated[타입, 제약 조건...]
+    __source__: Any  # cache()에 전달된 Annotated 타입(캐시하지 않는 메타데이터 포함)
+    __cache_key__: Hashable
+    __config__: ConfigDict | None  # schema를 만들 때 사용하는 설정
+
+    def __getitem__(cls, params: Any) -> Any:
+        # BoundedList[int]: TypeVar를 치환한 Annotated 타입으로 새로운(또는 캐시된) 클래스를 만든다.
+        return cls.__cache__(cls.__source__[params], config=cls.__config__)
+
+    def __repr__(cls) -> str:
+        return f'CachedType[{cls.__annotated__!r}]'
+
+    def __get_pydantic_core_schema__(cls, source_type: Any, handler: GetCoreSchemaHandler) -> CoreSchema:
+        return cls.__cache__.core_schema(cls, handler)
+
+
+class AnnotatedSchemaCache:
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[Hashable, CoreSchema] = OrderedDict()  # (타입 key, 설정 key) -> core schema
+        # (타입 key, 캐시하지 않는 메타데이터) -> [클래스, TypeAdapter]
+        self._types: OrderedDict[Hashable, list[CachedType | TypeAdapter | None]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = self._misses = 0
+
+    def __call__(self, annotated: Any, *, config: ConfigDict | None = None) -> Any:
+        if get_origin(annotated) is not Annotated:
+            raise TypeError(f'Annotated 타입이 필요합니다: {annotated!r}')
+        source_type, *metadata = get_args(annotated)
+        cached = tuple(item for item in metadata if _is_cacheable(item))
+        kept = tuple(item for item in metadata if not _is_cacheable(item))
+        key = (_normalize(source_type), tuple(_normalize(item) for item in cached), _config_key(config))
+        with self._lock:
+            entry = self._types.get((key, repr(kept)))
+            if entry is None:
+                cached_type = CachedType('CachedType', (), {
+                    '__cache__': self,
+                    '__annotated__': Annotated[(source_type, *cached)] if cached else source_type,
+                    '__source__': annotated,
+                    '__cache_key__': key,
+                    '__config__': config,
+                })
+                entry = self._put(self._types, (key, repr(kept)), [cached_type, None])
+            cached_type = entry[0]
+        if kept and not annotated.__parameters__:
+            return Annotated[(cached_type, *kept)]
+        # TypeVar가 남아 있다면 클래스를 그대로 반환하고, 캐시하지 않는 메타데이터는 치환(Described[int])할 때 붙인다.
+        return cached_type
+
+    def core_schema(self, cached_type: CachedType, handler: GetCoreSchemaHandler) -> CoreSchema:
+        key = cached_type.__cache_key__
+        with self._lock:
+            schema = self._entries.get(key)
+            if schema is not None:
+                self._entries.move_to_end(key)
+                if schema is not _UNCACHEABLE:
+                    self._hits += 1
+                    # Pydantic이 받은 schema를 제자리에서 수정하므로, 캐시된 schema는 복사해서 돌려준다.
+                    return copy_schema(schema)
+            self._misses += 1
+
+        if schema is None:
+            schema = TypeAdapter(cached_type.__annotated__, config=cached_type.__config__).core_schema
+            if not _has_refs(schema):
+                with self._lock:
+                    self._put(self._entries, key, copy_schema(schema))
+                return schema
+            with self._lock:
+                self._put(self._entries, key, _UNCACHEABLE)
+        # 다른 schema를 참조한다면, 이 모델의 definitions에서만 유효하므로 모델마다 만든다.
+        return handler.generate_schema(cached_type.__annotated__)
+
+    def validator(self, annotated: Any) -> TypeAdapter:
+        """캐시된 타입(cache(...)의 반환 값)에 대한 TypeAdapter를 key 당 하나만 만들어 공유한다."""
+        cached_type = _split_cached(annotated)
+        key = (cached_type.__cache_key__, repr(get_args(annotated)[1:] if get_origin(annotated) is Annotated else ()))
+        with self._lock:
+            entry = self._types.get(key)
+            if entry is not None and entry[1] is not None:
+                return entry[1]
+        # core schema는 캐시에서 가져오므로, 검증기 컴파일 비용만 발생한다.
+        # TypeAdapter가 core_schema()에서 lock을 다시 얻으므로, lock 밖에서 만든다.
+        adapter = TypeAdapter(annotated)
+        with self._lock:
+            entry = self._types.get(key)
+            if entry is None:
+                return adapter
+            if entry[1] is None:
+                entry[1] = adapter
+            return entry[1]
+
+    def cache_info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self.maxsize, len(self._entries))
+
+    def cache_clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._types.clear()
+            self._hits = self._misses = 0
+
+    def _put(self, entries: OrderedDict, key: Hashable, value: Any) -> Any:
+        entries[key] = value
+        while len(entries) > self.maxsize:
+            entries.popitem(last=False)
+        return value
+
+
+def _is_cacheable(item: Any) -> bool:
+    # description, alias, default 등 제약 조건이 아닌 값은 필드 정보(FieldInfo)에 반영되어야 하므로 캐시하지 않는다.
+    if isinstance(item, FieldInfo):
+        return set(item._attributes_set) <= set(FieldInfo.metadata_lookup)
+    return True
+
+
+def _normalize(item: Any) -> Hashable:
+    if isinstance(item, FieldInfo):
+        # FieldInfo는 객체마다 hash가 다르므로, 제약 조건(Gt, Le, MaxLen 등) 목록으로 정규화한다.
+        return FieldInfo, tuple(_normalize(metadata) for metadata in item.metadata)
+    try:
+        hash(item)
+    except TypeError:
+        return type(item), repr(item)
+    return item
+
+
+def _config_key(config: ConfigDict | None) -> Hashable:
+    return tuple((name, _normalize(value)) for name, value in sorted((config or {}).items()) if name != 'title')
+
+
+def _has_refs(schema: Any) -> bool:
+    if isinstance(schema, dict):
+        return schema.get('type') == 'definition-ref' or 'ref' in schema or any(map(_has_refs, schema.values()))
+    if isinstance(schema, list):
+        return any(map(_has_refs, schema))
+    return False
+
+
+def _split_cached(annotated: Any) -> CachedType:
+    if get_origin(annotated) is Annotated:
+        annotated = get_args(annotated)[0]
+    if isinstance(annotated, CachedType):
+        return annotated
+    raise TypeError(f'AnnotatedSchemaCache로 만든 타입이 아닙니다: {annotated!r}')
+
+
+# 프로세스 전체에서 공유하는 캐시
+annotated_schema_cache = AnnotatedSchemaCache(maxsize=1024)
+
+T = TypeVar('T')
+BoundedInt = annotated_schema_cache(Annotated[int, Field(gt=0, le=100)])
+BoundedList = annotated_schema_cache(Annotated[list[T], Field(max_length=10)])
+StandardString = annotated_schema_cache(
+    Annotated[str, StringConstraints(to_lower=True, min_length=2, strip_whitespace=True)]
+)
+print(BoundedInt)  # 출력: CachedType[typing.Annotated[int, FieldInfo(annotation=NoneType, required=True, metadata=[Gt(gt=0), Le(le=100)])]]
+
+
+class Model(BaseModel):
+    x: BoundedInt
+    y: BoundedInt
+    z: BoundedInt
+
+
+class ListModel(BaseModel):
+    integers: BoundedList[int] = []
+    strings: BoundedList[str] = []
+
+
+class CodeModel(BaseModel):
+    code: StandardString | None = None
+
+
+print(annotated_schema_cache.cache_info())  # 출력: CacheInfo(hits=2, misses=4, maxsize=1024, currsize=4)
+print(Model(x=1, y=2, z=3))  # 출력: x=1 y=2 z=3
+print(CodeModel(code="ABC   "))  # 출력: code='abc'
+
+try:
+    ListModel(integers=[0.5])
+except ValidationError as ex:
+    print(ex)
+    """
+    1 validation error for ListModel
+    integers.0
+      Input should be a valid integer, got a number with a fractional part [type=int_from_float, input_value=0.5, input_type=float]
+        For further information visit https://errors.pydantic.dev/2.7/v/int_from_float
+    """
+
+# 따로 작성한 같은 제약 조건도 정규화된 key가 같으므로 캐시를 공유한다.
+AnotherBoundedInt = annotated_schema_cache(Annotated[int, Field(gt=0, le=100)])
+
+
+class AnotherModel(BaseModel):
+    value: AnotherBoundedInt
+
+
+print(annotated_schema_cache.cache_info())  # 출력: CacheInfo(hits=3, misses=4, maxsize=1024, currsize=4)
+print(AnotherModel.model_json_schema()['properties'])
+# 출력: {'value': {'exclusiveMinimum': 0, 'maximum': 100, 'title': 'Value', 'type': 'integer'}}
+
+
+class StrictModel(BaseModel):
+    model_config = ConfigDict(strict=True)
+
+    value: BoundedInt  # strict는 CoreConfig로 전달되므로, 캐시된 schema를 그대로 사용한다.
+
+
+print(annotated_schema_cache.cache_info())  # 출력: CacheInfo(hits=4, misses=4, maxsize=1024, currsize=4)
+try:
+    StrictModel(value='5')
+except ValidationError as ex:
+    print(ex.errors()[0]['type'])  # 출력: int_type | 모델의 strict 설정이 적용된다.
+
+# 같은 캐시된 타입에 모델마다 다른 제약 조건을 붙여도, 캐시된 schema는 바뀌지 않는다.
+OptionalCount = annotated_schema_cache(Annotated[Optional[int], Field(ge=0)])
+
+
+class SmallCount(BaseModel):
+    count: Annotated[OptionalCount, Field(lt=5)]
+
+
+class DescribedCount(BaseModel):
+    count: Annotated[OptionalCount, Field(description='개수')]
+
+
+class AnyCount(BaseModel):
+    count: OptionalCount
+
+
+print(AnyCount(count=10))  # 출력: count=10
+print(AnyCount.model_json_schema()['properties'])
+# 출력: {'count': {'anyOf': [{'minimum': 0, 'type': 'integer'}, {'type': 'null'}], 'title': 'Count'}}
+try:
+    SmallCount(count=10)
+except ValidationError as ex:
+    print(ex.errors()[0]['type'])  # 출력: less_than
+print(DescribedCount.model_json_schema()['properties']['count']['description'])  # 출력: 개수
+assert AnyCount.model_json_schema() == create_model('AnyCount', count=(Optional[int], Field(ge=0))).model_json_schema()
+
+
+class Item(BaseModel):
+    name: str
+
+
+BoundedItems = annotated_schema_cache(Annotated[list[Item], Field(max_length=2)])
+
+
+class Order(BaseModel):
+    items: BoundedItems
+
+
+class Cart(BaseModel):
+    items: BoundedItems
+
+
+# 중첩 모델을 참조(definition-ref)하는 schema는 캐시하지 않으므로, 모델마다 각자의 definitions로 만들어진다.
+print(Cart(items=[{'name': 'apple'}]))  # 출력: items=[Item(name='apple')]
+print(annotated_schema_cache.cache_info())  # 출력: CacheInfo(hits=6, misses=7, maxsize=1024, currsize=6)
+
+# 캐시된 타입에 대한 TypeAdapter(컴파일된 검증기)도 하나만 만들어진다.
+print(annotated_schema_cache.validator(BoundedInt) is annotated_schema_cache.validator(AnotherBoundedInt))  # 출력: True
+print(annotated_schema_cache.validator(BoundedList[int]).validate_python([1, '2']))  # 출력: [1, 2]
+
+print()
+print("--------------------")
+
+# 벤치마크: 재사용 타입으로 구성된 모델 클래스 N개 생성 시간 (캐시 미사용 vs 캐시 사용)
+MODELS = 300
+plain_types = {
+    'BoundedInt': Annotated[int, Field(gt=0, le=100)],
+    'BoundedList': Annotated[list[T], Field(max_length=10)],
+    'StandardString': Annotated[str, StringConstraints(to_lower=True, min_length=2, strip_whitespace=True)],
+}
+cached_types = {'BoundedInt': BoundedInt, 'BoundedList': BoundedList, 'StandardString': StandardString}
+
+
+def create_models(types: dict[str, Any]) -> float:
+    start = perf_counter()
+    for i in range(MODELS):
+        create_model(
+            f'GeneratedModel{i}',
+            x=(types['BoundedInt'], ...),
+            y=(types['BoundedInt'], ...),
+            integers=(types['BoundedList'][int], []),
+            strings=(types['BoundedList'][str], []),
+            code=(types['StandardString'], 'ab'),
+            optional_code=(types['StandardString'] | None, None),
+        )
+    return perf_counter() - start
+
+
+# 실행 환경의 잡음을 줄이기 위해, 두 경우를 번갈아 실행하고 가장 빠른 시간을 사용한다.
+variants = {'without cache': plain_types, 'with cache': cached_types}
+timings = {name: [] for name in variants}
+for _ in range(5):
+    for name, types in variants.items():
+        timings[name].append(create_models(types))
+for name, seconds in timings.items():
+    seconds = min(seconds)
+    print(f"{name:<14} {MODELS} models {seconds * 1000:8.2f} ms ({seconds / MODELS * 1e6:6.1f} µs/model)")
+print(annotated_schema_cache.cache_info())
@@ -0,0 +1,133 @@
+"""
+BaseModel을 상속한 클래스는, 클래스가 정의되는 순간(=모듈 import 시점) core schema와 검증기/직렬화기를 만든다.
+- basics/, model configuration/ 의 Person, Circle, LooseExampleModel, StrictExampleModel, ModelLevelValidateDefault 등
+- 하나의 worker 프로세스에서는 이 중 일부 모델만 사용하는 경우가 많지만, import 하는 순간 모든 모델의 비용을 지불한다.
+
+Pydantic은 ConfigDict(defer_build=True) 설정으로 검증기/직렬화기 생성을 처음 사용할 때까지 미룰 수 있다.
+- 관련 공식문서: https://docs.pydantic.dev/2.7/api/config/#pydantic.config.ConfigDict.defer_build
+- 모델 단위로 선택하려면 LazyModel(defer_build=True가 설정된 BaseModel)을 상속한다.
+- 기존 모듈을 수정하지 않고 선택하려면, deferred_build() 블록 안에서 모듈을 import 한다.
+  - 블록 안에서 정의되는 모든 BaseModel 서브클래스에 defer_build=True가 적용된다.
+- 비용이 사라지는 것이 아니라 "처음 사용하는 시점"으로 옮겨진다. 사용하지 않는 모델의 비용만 사라진다.
+  - 지연 시간이 중요한 요청 경로에서 첫 요청이 느려질 수 있으므로, 필요하다면 시작 후 model_rebuild()로 미리 만들어 둔다.
+
+벤치마크는 14개 예제 모듈의 모델 정의(`_playground.py`)를 새 프로세스에서 불러오는 cold start 시간을 측정한다.
+- eager: 기본 동작, lazy: deferred_build() 적용
+- first use: 불러온 모든 모델을 한 번씩 사용(빌드)하는 데 걸린 시간
+"""
+import json
+import statistics
+import subprocess
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+from pydantic import BaseModel, ConfigDict
+
+
+class LazyModel(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+
+
+@contextmanager
+def deferred_build() -> Iterator[None]:
+    """블록 안에서 정의되는 BaseModel 서브클래스의 검증기/직렬화기 생성을 처음 사용할 때까지 미룬다."""
+    previous = BaseModel.model_config.get('defer_build')
+    BaseModel.model_config['defer_build'] = True
+    try:
+        yield
+    finally:
+        if previous is None:
+            BaseModel.model_config.pop('defer_build', None)
+        else:
+            BaseModel.model_config['defer_build'] = previous
+
+
+class Person(LazyModel):
+    first_name: str
+    last_name: str
+    age: int
+
+
+print(Person.__pydantic_complete__)  # 출력: False | 아직 검증기가 만들어지지 않았다.
+print(Person(first_name='Seongyeon', last_name='Kim', age=29))  # 출력: first_name='Seongyeon' last_name='Kim' age=29
+print(Person.__pydantic_complete__)  # 출력: True | 처음 사용할 때 만들어진다.
+
+with deferred_build():
+    class Circle(BaseModel):
+        center: tuple[int, int] = (0, 0)
+        radius: int
+
+
+class Coordinate(BaseModel):
+    x: float
+    y: float
+
+
+print(Circle.__pydantic_complete__, Coordinate.__pydantic_complete__)  # 출력: False True
+print(Circle.model_fields['center'])  # 출력: annotation=tuple[int, int] required=False default=(0, 0) | 필드 정보는 바로 사용할 수 있다.
+print(Circle.model_validate({'radius': 1}))  # 출력: center=(0, 0) radius=1
+
+print()
+print("--------------------")
+
+# 벤치마크: 14개 예제 모듈의 cold start (eager vs lazy)
+RUNS = 5
+COLD_START = '''
+import json, sys, time
+start = time.perf_counter()
+from pydantic import BaseModel
+if sys.argv[2] == 'lazy':
+    BaseModel.model_config['defer_build'] = True
+imported = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+from _playground import PLAYGROUND_MODULES, load_definitions
+
+modules = {}
+models = []
+for path in PLAYGROUND_MODULES:
+    module_start = time.perf_counter()
+    models += load_definitions(path).models
+    modules[path] = time.perf_counter() - module_start
+loaded = time.perf_counter()
+for definition in models:
+    definition.cls.model_rebuild()
+used = time.perf_counter()
+print(json.dumps({
+    'import pydantic': imported - start,
+    'load 14 modules': loaded - imported,
+    'first use': used - loaded,
+    'modules': modules,
+}))
+'''
+
+
+def cold_start(mode: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, '-c', COLD_START, str(Path(__file__).resolve().parent), mode],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output)
+
+
+results = {mode: [cold_start(mode) for _ in range(RUNS)] for mode in ('eager', 'lazy')}
+
+
+def median_ms(mode: str, *keys: str) -> float:
+    values = []
+    for run in results[mode]:
+        value = run
+        for key in keys:
+            value = value[key]
+        values.append(value)
+    return statistics.median(values) * 1000
+
+
+print(f"median of {RUNS} fresh processes (ms)")
+print(f"{'':<52} {'eager':>8} {'lazy':>8}")
+for key in ('import pydantic', 'load 14 modules', 'first use'):
+    print(f"{key:<52} {median_ms('eager', key):8.2f} {median_ms('lazy', key):8.2f}")
+print()
+for path in results['eager'][0]['modules']:
+    print(f"{path:<52} {median_ms('eager', 'modules', path):8.2f} {median_ms('lazy', 'modules', path):8.2f}")
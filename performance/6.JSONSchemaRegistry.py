@@ -0,0 +1,177 @@
+"""
+`basics/6.JSONSchemaGeneration.py` 에서는 model_json_schema()로 JSON Schema를 생성했다.
+- 요청된 Schema를 반환하는 API 엔드포인트(OpenAPI, introspection 등)에서 사용하면, 요청마다 Schema dict를 새로 생성한다.
+- 모델이 바뀌지 않는 한 결과는 항상 같으므로, 한 번만 생성하여 재사용할 수 있다.
+
+SchemaRegistry는 (모델, mode, ref_template, by_alias) 조합 별로 JSON Schema를 한 번만 생성한다.
+- Schema dict, 미리 직렬화한 JSON bytes, ETag를 함께 캐시한다.
+  - 엔드포인트는 JSON bytes를 그대로 응답하고, If-None-Match 헤더가 ETag와 같다면 304(Not Modified)로 응답할 수 있다.
+  - 캐시된 Schema dict는 여러 요청이 공유하므로 수정하지 않는다.
+- 캐시의 key는 모델 클래스의 `모듈.이름`이다. 같은 이름의 모델 클래스가 다시 정의되면(코드 reload 등) 해당 항목만 다시 생성한다.
+- get_many()는 여러 모델의 Schema를 한 번에 생성하며, 모델들이 공유하는 정의는 하나의 `$defs`에 모은다.
+"""
+import hashlib
+from timeit import timeit
+from typing import Any, NamedTuple, Sequence
+
+from pydantic import BaseModel
+from pydantic.json_schema import DEFAULT_REF_TEMPLATE, JsonSchemaMode, models_json_schema
+from pydantic_core import to_json
+
+
+class SchemaEntry(NamedTuple):
+    schema: dict[str, Any]
+    json: bytes
+    etag: str
+
+    def not_modified(self, if_none_match: str | None) -> bool:
+        """If-None-Match 헤더 값이 현재 ETag와 일치하는지 확인한다."""
+        if not if_none_match:
+            return False
+        return if_none_match.strip() == '*' or self.etag in (tag.strip() for tag in if_none_match.split(','))
+
+
+class BulkSchemaEntry(NamedTuple):
+    refs: dict[type[BaseModel], dict[str, Any]]  # 모델 -> {'$ref': '#/$defs/...'}
+    definitions: dict[str, Any]  # {'$defs': {...}}
+    json: bytes
+    etag: str
+
+
+class SchemaRegistry:
+    def __init__(self):
+        self._entries: dict[tuple, tuple[type[BaseModel], SchemaEntry]] = {}
+        self._bulk_entries: dict[tuple, tuple[tuple[type[BaseModel], ...], BulkSchemaEntry]] = {}
+        self.hits = self.misses = 0
+
+    def get(
+        self,
+        model: type[BaseModel],
+        *,
+        mode: JsonSchemaMode = 'validation',
+        ref_template: str = DEFAULT_REF_TEMPLATE,
+        by_alias: bool = True,
+    ) -> SchemaEntry:
+        key = (_model_key(model), mode, ref_template, by_alias)
+        cached = self._entries.get(key)
+        if cached is not None and cached[0] is model:
+            self.hits += 1
+            return cached[1]
+
+        # 처음 요청되었거나, 같은 이름의 모델 클래스가 다시 정의된 경우
+        self.misses += 1
+        schema = model.model_json_schema(by_alias=by_alias, ref_template=ref_template, mode=mode)
+        json_bytes = to_json(schema)
+        entry = SchemaEntry(schema, json_bytes, _etag(json_bytes))
+        self._entries[key] = (model, entry)
+        return entry
+
+    def get_many(
+        self,
+        models: Sequence[type[BaseModel]],
+        *,
+        mode: JsonSchemaMode = 'validation',
+        ref_template: str = DEFAULT_REF_TEMPLATE,
+        by_alias: bool = True,
+        title: str | None = None,
+    ) -> BulkSchemaEntry:
+        models = tuple(models)
+        key = (tuple(_model_key(model) for model in models), mode, ref_template, by_alias, title)
+        cached = self._bulk_entries.get(key)
+        if cached is not None and all(old is new for old, new in zip(cached[0], models)):
+            self.hits += 1
+            return cached[1]
+
+        self.misses += 1
+        refs, definitions = models_json_schema(
+            [(model, mode) for model in models], by_alias=by_alias, ref_template=ref_template, title=title
+        )
+        refs = {model: schema for (model, _), schema in refs.items()}
+        json_bytes = to_json(definitions)
+        entry = BulkSchemaEntry(refs, definitions, json_bytes, _etag(json_bytes))
+        self._bulk_entries[key] = (models, entry)
+        return entry
+
+
+def _model_key(model: type[BaseModel]) -> str:
+    return f'{model.__module__}.{model.__qualname__}'
+
+
+def _etag(json_bytes: bytes) -> str:
+    return f'"{hashlib.blake2b(json_bytes, digest_size=16).hexdigest()}"'
+
+
+schema_registry = SchemaRegistry()
+
+
+class ForJSONModel(BaseModel):
+    field_1: int | None = None
+    field_2: str = "Python"
+
+
+entry = schema_registry.get(ForJSONModel)
+print(entry.json)
+# 출력: b'{"properties":{"field_1":{"anyOf":[{"type":"integer"},{"type":"null"}],"default":null,"title":"Field 1"},"field_2":{"default":"Python","title":"Field 2","type":"string"}},"title":"ForJSONModel","type":"object"}'
+print(entry.etag)  # 출력: "..." | JSON bytes의 blake2b 해시
+print(schema_registry.get(ForJSONModel) is entry)  # 출력: True | 다시 생성하지 않는다.
+print(entry.not_modified(entry.etag))  # 출력: True | 클라이언트가 같은 ETag를 보냈다면 304로 응답한다.
+print(schema_registry.get(ForJSONModel, mode='serialization') is entry)  # 출력: False | 조합 별로 캐시된다.
+
+
+# 같은 이름의 모델을 다시 정의하면(코드 reload 등), 해당 항목만 다시 생성된다.
+class ForJSONModel(BaseModel):
+    field_1: int | None = None
+    field_2: str = "Python"
+    field_3: list[int] = []
+
+
+new_entry = schema_registry.get(ForJSONModel)
+print(new_entry.etag != entry.etag, list(new_entry.schema['properties']))  # 출력: True ['field_1', 'field_2', 'field_3']
+
+print()
+print("--------------------")
+
+
+# 여러 모델의 Schema를 한 번에 생성: 공유하는 정의(Coordinate)는 $defs에 한 번만 포함된다.
+class Coordinate(BaseModel):
+    x: float
+    y: float
+
+
+class Circle(BaseModel):
+    center: Coordinate
+    radius: int
+
+
+class Route(BaseModel):
+    start: Coordinate
+    end: Coordinate
+
+
+bulk = schema_registry.get_many([Circle, Route, Coordinate], title='Geometry')
+print(bulk.refs)
+# 출력: {<class '__main__.Circle'>: {'$ref': '#/$defs/Circle'}, <class '__main__.Route'>: {'$ref': '#/$defs/Route'},
+#        <class '__main__.Coordinate'>: {'$ref': '#/$defs/Coordinate'}}
+print(list(bulk.definitions['$defs']))  # 출력: ['Circle', 'Coordinate', 'Route']
+print(schema_registry.get_many([Circle, Route, Coordinate], title='Geometry') is bulk)  # 출력: True
+
+print()
+print("--------------------")
+
+# 벤치마크: 요청마다 model_json_schema() + JSON 직렬화 vs SchemaRegistry
+NUMBER = 2_000
+
+
+def generate_every_time() -> bytes:
+    return to_json(Circle.model_json_schema())
+
+
+benchmarks = {
+    'model_json_schema() per request': generate_every_time,
+    'SchemaRegistry.get()': lambda: schema_registry.get(Circle).json,
+    'SchemaRegistry.get_many() (3 models)': lambda: schema_registry.get_many([Circle, Route, Coordinate]).json,
+}
+for name, func in benchmarks.items():
+    seconds = timeit(func, number=NUMBER) / NUMBER
+    print(f"{name:<38} {seconds * 1e6:10.2f} µs/request")
+print(f"hits={schema_registry.hits:,} misses={schema_registry.misses}")
@@ -0,0 +1,192 @@
+"""
+예제의 model_validate()와 strict/lax 모델들은 모두 호출한 스레드에서 순서대로 실행되므로, CPU 코어 하나만 사용한다.
+- pydantic-core의 검증은 GIL을 잡고 실행되므로, 스레드를 늘려도 처리량이 늘어나지 않는다.
+
+ParallelValidator는 큰 입력(list[dict] 혹은 JSON lines)을 shard로 나누어 프로세스 풀에서 검증한다.
+- 각 worker 프로세스는 시작할 때(initializer) 모델의 검증기(TypeAdapter)를 한 번만 만들어 두고 재사용한다.
+- shard 하나는 worker 안에서 한 번의 일괄 검증으로 처리된다.(`1.BatchValidation.py` 와 같은 `Model | Any` 방식)
+  - JSON lines 입력은 shard 단위로 하나의 JSON 배열 bytes로 이어 붙여 보내므로, 프로세스 간 전송(pickle) 비용이 작다.
+  - JSON 문법이 깨진 줄이 있거나, 한 줄에 값이 여러 개(`{...},{...}`)라서 배열의 원소 수가 줄 수와 다르면, 그 shard만 한 줄씩 검증한다.
+- 결과는 입력 순서대로 (True, model_dump() 결과) 혹은 (False, 에러 목록)으로 돌려준다.
+  - 모델 인스턴스 대신 model_dump() 결과(dict)를 돌려주는 이유는, 인스턴스보다 pickle 비용이 작기 때문이다.
+- 결과를 부모 프로세스로 돌려보내는 비용(pickle)이 있으므로, 코어가 하나뿐인 환경에서는 오히려 직렬 처리보다 느리다.
+  - 처리량은 코어 수에 비례해 늘어나며, 벤치마크로 worker 수 별 처리량을 확인한다.
+
+* 참고사항: multiprocessing은 spawn/forkserver 방식에서 worker가 이 모듈을 다시 import 하므로,
+  실행 코드는 `if __name__ == "__main__":` 아래에 두어야 한다.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+from time import perf_counter
+from typing import Any, Sequence
+
+from pydantic import BaseModel, ConfigDict, TypeAdapter, ValidationError
+from pydantic_core import to_json
+
+from _playground import lenient_list_adapter
+
+Outcome = tuple[bool, dict[str, Any] | list[dict[str, Any]]]
+
+_worker_model: type[BaseModel] | None = None
+_worker_adapter: TypeAdapter | None = None
+_worker_dump_adapter: TypeAdapter | None = None
+
+
+def _init_worker(model: type[BaseModel]) -> None:
+    global _worker_model, _worker_adapter, _worker_dump_adapter
+    _worker_model = model
+    _worker_adapter = lenient_list_adapter(model)
+    _worker_dump_adapter = TypeAdapter(list[model])
+
+
+def _validate_shard(shard: list[Any] | tuple[bytes, tuple[int, ...]]) -> list[Outcome]:
+    is_json = isinstance(shard, tuple)
+    if not is_json:
+        outputs = _worker_adapter.validate_python(shard)
+    else:
+        data, sizes = shard
+        try:
+            outputs = _worker_adapter.validate_json(data)
+        except ValidationError:
+            outputs = None  # 어떤 줄의 JSON 문법이 깨져 있으면 배열 전체를 파싱할 수 없다.
+        if outputs is None or len(outputs) != len(sizes):
+            return [_validate_line(line) for line in _split_lines(data, sizes)]
+    # 성공한 인스턴스는 인스턴스 마다 model_dump()를 호출하지 않고, 한 번에 직렬화한다.
+    dumps = iter(_worker_dump_adapter.dump_python([output for output in outputs if isinstance(output, _worker_model)]))
+    outcomes: list[Outcome] = []
+    for output in outputs:
+        if isinstance(output, _worker_model):
+            outcomes.append((True, next(dumps)))
+            continue
+        # union 검증에서는 실패했지만 다시 검증하면 성공하는 행도 버리지 않는다.(출력 순서를 입력과 맞춘다.)
+        outcomes.append(_validate_line(to_json(output)) if is_json else _validate_row(output))
+    return outcomes
+
+
+def _validate_row(row: Any) -> Outcome:
+    try:
+        return True, _worker_model.model_validate(row).model_dump()
+    except ValidationError as ex:
+        return False, ex.errors(include_url=False, include_context=False, include_input=False)
+
+
+def _validate_line(line: bytes) -> Outcome:
+    try:
+        return True, _worker_model.model_validate_json(line).model_dump()
+    except ValidationError as ex:
+        return False, ex.errors(include_url=False, include_context=False, include_input=False)
+
+
+def _split_lines(data: bytes, sizes: tuple[int, ...]) -> list[bytes]:
+    """`[line1,line2,...]` 로 이어 붙인 shard를 다시 줄 단위로 나눈다."""
+    lines, position = [], 1
+    for size in sizes:
+        lines.append(data[position:position + size])
+        position += size + 1
+    return lines
+
+
+class ParallelValidator:
+    def __init__(self, model: type[BaseModel], workers: int | None = None, shard_size: int = 5_000):
+        self.model = model
+        self.workers = workers or os.cpu_count() or 1
+        self.shard_size = shard_size
+        self._pool = ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(model,))
+
+    def validate_python(self, rows: Sequence[dict[str, Any]]) -> list[Outcome]:
+        shards = [list(rows[i:i + self.shard_size]) for i in range(0, len(rows), self.shard_size)]
+        return list(chain.from_iterable(self._pool.map(_validate_shard, shards)))
+
+    def validate_json_lines(self, lines: Sequence[str | bytes]) -> list[Outcome]:
+        shards = []
+        for i in range(0, len(lines), self.shard_size):
+            shard = [line.encode() if isinstance(line, str) else line for line in lines[i:i + self.shard_size]]
+            shards.append((b'[' + b','.join(shard) + b']', tuple(map(len, shard))))
+        return list(chain.from_iterable(self._pool.map(_validate_shard, shards)))
+
+    def warm_up(self) -> None:
+        """worker 프로세스를 미리 띄우고, 각 worker의 검증기를 만들어 둔다."""
+        list(self._pool.map(_validate_shard, [[] for _ in range(self.workers)]))
+
+    def close(self) -> None:
+        self._pool.shutdown()
+
+    def __enter__(self) -> 'ParallelValidator':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class Person(BaseModel):
+    first_name: str
+    last_name: str
+    age: int
+
+
+class LooseExampleModel(BaseModel):
+    field_1: str
+    field_2: float
+    field_3: list
+    field_4: tuple
+
+
+class StrictExampleModel(BaseModel):
+    model_config = ConfigDict(strict=True)
+
+    field_1: str
+    field_2: float
+    field_3: list
+    field_4: tuple
+
+
+if __name__ == "__main__":
+    rows = [
+        {'field_1': 'a', 'field_2': 1, 'field_3': (1, 2, 3), 'field_4': [1, 2, 3]},
+        {'field_1': 'b', 'field_2': 1.5, 'field_3': [1], 'field_4': (1,)},
+    ]
+    with ParallelValidator(LooseExampleModel, workers=2, shard_size=1) as loose:
+        print(loose.validate_python(rows))
+        # 출력: [(True, {'field_1': 'a', 'field_2': 1.0, 'field_3': [1, 2, 3], 'field_4': (1, 2, 3)}),
+        #        (True, {'field_1': 'b', 'field_2': 1.5, 'field_3': [1], 'field_4': (1,)})]
+    with ParallelValidator(StrictExampleModel, workers=2, shard_size=1) as strict:
+        print(strict.validate_python(rows))
+        # 출력: [(False, [{'type': 'list_type', 'loc': ('field_3',), 'msg': 'Input should be a valid list'},
+        #                {'type': 'tuple_type', 'loc': ('field_4',), 'msg': 'Input should be a valid tuple'}]),
+        #        (True, {'field_1': 'b', 'field_2': 1.5, 'field_3': [1], 'field_4': (1,)})]
+
+    # JSON 문법이 깨진 줄과 값이 두 개인 줄이 있어도, 입력 한 줄에 결과 하나를 순서대로 돌려준다.
+    json_lines = [
+        '{"first_name": "Ada", "last_name": "Lovelace", "age": 36}',
+        '{"first_name": "Alan", "last_name": "Turing"',
+        '{"first_name": "Grace", "last_name": "Hopper", "age": 85},{"first_name": "Linus", "last_name": "Torvalds", "age": 54}',
+        '{"first_name": "Marie", "last_name": "Curie", "age": 66}',
+    ]
+    with ParallelValidator(Person, workers=2, shard_size=2) as people:
+        print([(ok, value[0]['type'] if not ok else value['first_name']) for ok, value in people.validate_json_lines(json_lines)])
+        # 출력: [(True, 'Ada'), (False, 'json_invalid'), (False, 'json_invalid'), (True, 'Marie')]
+
+    print()
+    print("--------------------")
+
+    # 벤치마크: worker 수 별 처리량 (JSON lines 입력)
+    ROWS = 200_000
+    lines = [to_json({'first_name': f'first-{i}', 'last_name': f'last-{i}', 'age': i % 100}) for i in range(ROWS)]
+
+    start = perf_counter()
+    serial = [Person.model_validate_json(line).model_dump() for line in lines]
+    serial_seconds = perf_counter() - start
+    print(f"{ROWS:,} rows, os.cpu_count()={os.cpu_count()}")
+    print(f"{'serial model_validate_json':<28} {serial_seconds:6.2f} s {ROWS / serial_seconds:>12,.0f} rows/s")
+
+    worker_counts = sorted({1, 2, 4, os.cpu_count() or 1})
+    for workers in worker_counts:
+        with ParallelValidator(Person, workers=workers) as validator:
+            validator.warm_up()
+            start = perf_counter()
+            outcomes = validator.validate_json_lines(lines)
+            seconds = perf_counter() - start
+        assert [value for _, value in outcomes] == serial
+        print(f"{f'ParallelValidator({workers})':<28} {seconds:6.2f} s {ROWS / seconds:>12,.0f} rows/s "
+              f"x{serial_seconds / seconds:.2f}")
@@ -0,0 +1,213 @@
+"""
+asyncio 기반 웹 서비스에서 `basics/3.TypeCoercion.py` 의 Contact 같은 JSON payload를 검증하는 경우,
+model_validate_json()은 동기 함수이므로 검증하는 동안 event loop 전체가 멈춘다.
+- 작은 payload는 문제가 되지 않지만, 큰 payload 하나가 다른 모든 요청의 응답을 지연시킨다.(p99 지연 시간 증가)
+
+AsyncValidator는 payload 크기에 따라 검증 위치를 나눈다.
+- inline_threshold 이하의 작은 payload: event loop에서 바로 검증한다.(스레드 전환 비용이 검증 비용보다 크다.)
+- 큰 payload: 크기가 제한된 executor(기본: 스레드 풀)에서 검증하고, event loop는 그동안 다른 작업을 처리한다.
+- max_pending: executor에서 동시에 처리 중(대기 포함)인 큰 payload의 수를 제한한다.
+  - 제한에 도달하면 호출자는 자리가 날 때까지 await 하며, 대기열이 무한히 늘어나지 않는다.(backpressure)
+  - asyncio.Semaphore는 하나의 event loop에서만 사용할 수 있으므로, event loop 마다 처음 사용할 때 만든다.(제한도 event loop 별로 적용된다.)
+    모듈을 import 할 때 만들어지는 default_async_validator도 여러 event loop(asyncio.run()을 여러 번 호출)에서 사용할 수 있다.
+
+* 주의사항: pydantic-core(2.18)는 검증하는 동안 GIL을 놓지 않는다.
+  - field_validator 처럼 Python 코드가 실행되는 검증은, 인터프리터가 switch interval(기본 5ms)마다 스레드를 전환하므로
+    스레드 풀로 옮기면 event loop가 멈추는 시간이 제한된다.
+  - Python 코드가 없는(Rust 안에서 끝나는) 검증은 스레드 풀로 옮겨도 event loop가 검증이 끝날 때까지 멈춘다.
+    이 경우 ProcessPoolExecutor를 executor로 넘기면 event loop는 멈추지 않지만, 결과를 pickle로 돌려받는 비용이 추가된다.
+  - 벤치마크에서 두 경우의 event loop 지연 시간을 비교한다.
+
+AsyncModel을 상속하면 `await Model.amodel_validate_json(...)`, `Model.amodel_validate_json_stream(...)`을 사용할 수 있다.
+- stream은 async iterable에서 payload를 읽어 입력 순서대로 인스턴스를 돌려준다.
+- 동시에 검증 중인 payload 수를 max_in_flight로 제한하므로, 소비가 느리면 입력도 그만큼 천천히 읽는다.
+"""
+import asyncio
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from time import perf_counter
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Self, TypeVar
+from weakref import WeakKeyDictionary
+
+from pydantic import BaseModel, ValidationError, field_validator
+
+ModelT = TypeVar('ModelT', bound=BaseModel)
+
+
+class AsyncValidator:
+    def __init__(
+        self,
+        executor: Executor | None = None,
+        max_workers: int = 4,
+        inline_threshold: int = 16 * 1024,
+        max_pending: int = 32,
+    ):
+        self.inline_threshold = inline_threshold
+        self.max_pending = max_pending
+        self._executor = executor or ThreadPoolExecutor(max_workers, thread_name_prefix='validation')
+        self._pending: WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore] = WeakKeyDictionary()
+
+    async def validate_json(
+        self, model: type[ModelT], json_data: str | bytes, *, strict: bool | None = None, context: dict | None = None
+    ) -> ModelT:
+        if len(json_data) <= self.inline_threshold:
+            return model.model_validate_json(json_data, strict=strict, context=context)
+        loop = asyncio.get_running_loop()
+        async with self._semaphore(loop):
+            # ProcessPoolExecutor에서도 사용할 수 있도록, lambda 대신 pickle 가능한 partial을 넘긴다.
+            return await loop.run_in_executor(self._executor, partial(_validate_json, model, json_data, strict, context))
+
+    async def validate_json_stream(
+        self, model: type[ModelT], source: AsyncIterable[str | bytes], *, max_in_flight: int = 8
+    ) -> AsyncIterator[ModelT]:
+        in_flight: deque[asyncio.Task] = deque()
+        try:
+            async for json_data in source:
+                in_flight.append(asyncio.create_task(self.validate_json(model, json_data)))
+                if len(in_flight) >= max_in_flight:
+                    yield await in_flight.popleft()
+            while in_flight:
+                yield await in_flight.popleft()
+        finally:
+            for task in in_flight:
+                task.cancel()
+
+    def _semaphore(self, loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+        semaphore = self._pending.get(loop)
+        if semaphore is None:
+            semaphore = self._pending[loop] = asyncio.Semaphore(self.max_pending)
+        return semaphore
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _validate_json(model: type[ModelT], json_data: str | bytes, strict: bool | None, context: dict | None) -> ModelT:
+    return model.model_validate_json(json_data, strict=strict, context=context)
+
+
+default_async_validator = AsyncValidator()
+
+
+class AsyncModel(BaseModel):
+    @classmethod
+    async def amodel_validate_json(
+        cls, json_data: str | bytes, *, strict: bool | None = None, context: dict | None = None
+    ) -> Self:
+        return await default_async_validator.validate_json(cls, json_data, strict=strict, context=context)
+
+    @classmethod
+    def amodel_validate_json_stream(
+        cls, source: AsyncIterable[str | bytes], *, max_in_flight: int = 8
+    ) -> AsyncIterator[Self]:
+        return default_async_validator.validate_json_stream(cls, source, max_in_flight=max_in_flight)
+
+
+class Contact(AsyncModel):
+    email: str
+
+
+class ContactBook(AsyncModel):
+    contacts: list[Contact]
+
+
+class NormalizedContact(AsyncModel):
+    email: str
+
+    @field_validator('email')
+    @classmethod
+    def normalize(cls, value: str) -> str:
+        return value.lower()
+
+
+class NormalizedContactBook(AsyncModel):
+    contacts: list[NormalizedContact]
+
+
+initial_json_data = '''
+{
+    "email": "inewton@principia.com"
+}
+'''
+new_json_data = '''
+{
+    "email": {
+        "personal": "inewton@principia.com",
+        "work": "isaac.newton@themint.com"
+    }
+}
+'''
+
+
+async def examples() -> None:
+    print(await Contact.amodel_validate_json(initial_json_data))  # 출력: email='inewton@principia.com'
+
+    try:
+        await Contact.amodel_validate_json(new_json_data)
+    except ValidationError as ex:
+        print(ex)
+        """
+        1 validation error for Contact
+        email
+          Input should be a valid string [type=string_type, input_value={'personal': 'inewton@pri...aac.newton@themint.com'}, input_type=dict]
+            For further information visit https://errors.pydantic.dev/2.7/v/string_type
+        """
+
+    async def payloads() -> AsyncIterator[str]:
+        for i in range(3):
+            yield f'{{"email": "user{i}@principia.com"}}'
+
+    print([contact async for contact in Contact.amodel_validate_json_stream(payloads())])
+    # 출력: [Contact(email='user0@principia.com'), Contact(email='user1@principia.com'), Contact(email='user2@principia.com')]
+
+
+# 벤치마크: 큰 payload를 검증하는 동안 event loop가 멈춘 최대 시간 (heartbeat 지연)
+# - heartbeat task는 1ms 마다 깨어나며, 예정보다 늦게 깨어난 시간을 기록한다.
+async def measure(validate: Callable[[], Awaitable[Any]]) -> tuple[float, float]:
+    lags = [0.0]
+
+    async def heartbeat() -> None:
+        while True:
+            start = perf_counter()
+            await asyncio.sleep(0.001)
+            lags.append(perf_counter() - start - 0.001)
+
+    task = asyncio.create_task(heartbeat())
+    await asyncio.sleep(0.01)
+    start = perf_counter()
+    await validate()
+    elapsed = perf_counter() - start
+    await asyncio.sleep(0.01)  # 검증이 끝난 뒤 heartbeat가 지연 시간을 기록할 수 있도록 한다.
+    task.cancel()
+    return elapsed, max(lags)
+
+
+if __name__ == "__main__":
+    asyncio.run(examples())
+
+    print()
+    print("--------------------")
+
+    contacts = ','.join(f'{{"email": "User{i}@Principia.com"}}' for i in range(200_000))
+    large_payload = '{"contacts": [' + contacts + ']}'
+    print(f"payload size: {len(large_payload) / 1e6:.1f} MB")
+
+    process_validator = AsyncValidator(ProcessPoolExecutor(1))
+    for model in (ContactBook, NormalizedContactBook):
+        strategies = {
+            'inline model_validate_json': lambda: asyncio.sleep(0, model.model_validate_json(large_payload)),
+            'thread pool': lambda: model.amodel_validate_json(large_payload),
+            'process pool': lambda: process_validator.validate_json(model, large_payload),
+        }
+        for name, validate in strategies.items():
+            elapsed, max_lag = asyncio.run(measure(validate))
+            print(f"{model.__name__:<22} {name:<28} validation {elapsed * 1000:8.2f} ms, "
+                  f"max event loop lag {max_lag * 1000:8.2f} ms")
+    process_validator.shutdown()
+    default_async_validator.shutdown()
+    # 출력 예시(코어 1개 환경):
+    # ContactBook            inline       validation   908 ms, max event loop lag   869 ms
+    # ContactBook            thread pool  validation   936 ms, max event loop lag   936 ms | Rust 안에서 끝나는 검증은 loop가 그대로 멈춘다.
+    # ContactBook            process pool validation  4560 ms, max event loop lag   188 ms | 결과 pickle 비용으로 전체 시간은 늘어난다.
+    # NormalizedContactBook  thread pool  validation   768 ms, max event loop lag   101 ms | field_validator 실행 중 스레드가 전환된다.
@@ -0,0 +1,249 @@
+"""
+`model configuration/5. Mutablity.py` 의 ImmutableModel(frozen=True)은 dictionary의 key로 사용할 수 있다.
+- 그러나 인스턴스마다 `__dict__`, `__pydantic_fields_set__`(set) 등을 가지고 있으므로, 필드가 두 개인 작은 레코드도 수백 bytes를 사용한다.
+- 수천만 개의 레코드를 캐시 key로 메모리에 들고 있다면, 필드 값보다 부가 정보가 더 많은 메모리를 사용한다.
+
+compact_model()은 frozen 모델로부터 `__slots__` 기반의 작은 레코드 클래스를 만든다.
+- 필드 값은 slot에 저장하며, `__dict__`와 fields_set이 없다.
+- 검증은 원래 모델의 core schema 중 필드 부분(model-fields)만으로 만든 검증기를 사용하므로, 필드 검증 규칙은 원래 모델과 같다.
+  - model_validator가 있는 모델은 원래 모델로 검증한 뒤 값을 옮겨 담는다.
+- hash는 처음 요청될 때 한 번만 계산하여 slot에 저장한다.
+- 값을 수정하려고 하면 frozen 모델과 같은 ValidationError(frozen_instance)가 발생한다.
+- to_model()/from_model()로 원래 모델과 서로 변환할 수 있다.
+- 레코드 클래스는 compact_model()이 동적으로 만들므로 pickle이 이름으로 찾을 수 없다.
+  __reduce__로 (원래 모델, 필드 값)을 저장하고, 복원할 때 compact_model(원래 모델)로 레코드 클래스를 다시 찾는다.
+- 필드 이름은 slot이 되므로, CompactRecord의 메서드(to_model, model_dump 등)와 같은 이름의 필드가 있는 모델은 거부한다.
+
+* 참고사항: 레코드는 BaseModel이 아니므로 model_dump_json(), JSON Schema 등 BaseModel의 기능은 to_model()로 변환한 뒤 사용한다.
+"""
+import pickle
+import tracemalloc
+from operator import attrgetter
+from timeit import timeit
+from typing import Any, Callable, ClassVar
+
+from pydantic import BaseModel, ConfigDict, ValidationError
+from pydantic_core import SchemaValidator
+
+from _playground import find_model_schema, with_definitions
+
+
+class CompactRecord:
+    __slots__ = ('_hash',)
+
+    __model__: ClassVar[type[BaseModel]]  # 원래 모델: 필드 이름(예: model)과 겹치지 않도록 dunder 이름을 사용한다.
+    _fields: ClassVar[tuple[str, ...]]
+    _validator: ClassVar[SchemaValidator | None]  # None이면 원래 모델로 검증한다.
+    _values: ClassVar[Callable[['CompactRecord'], Any]]  # attrgetter(*fields)
+
+    def __init__(self, **data: Any):
+        if self._validator is None:
+            values = self.__model__(**data).__dict__
+        else:
+            values, _, _ = self._validator.validate_python(data)
+        self._set_values(values)
+
+    @classmethod
+    def model_validate(cls, obj: Any) -> 'CompactRecord':
+        if cls._validator is None:
+            return cls.from_model(cls.__model__.model_validate(obj))
+        record = object.__new__(cls)
+        record._set_values(cls._validator.validate_python(obj)[0])
+        return record
+
+    @classmethod
+    def model_validate_json(cls, json_data: str | bytes) -> 'CompactRecord':
+        if cls._validator is None:
+            return cls.from_model(cls.__model__.model_validate_json(json_data))
+        record = object.__new__(cls)
+        record._set_values(cls._validator.validate_json(json_data)[0])
+        return record
+
+    @classmethod
+    def from_model(cls, instance: BaseModel) -> 'CompactRecord':
+        record = object.__new__(cls)
+        record._set_values(instance.__dict__)
+        return record
+
+    def to_model(self) -> BaseModel:
+        # 이미 검증된 값이므로 다시 검증하지 않는다.
+        return self.__model__.model_construct(**self.model_dump())
+
+    def model_dump(self) -> dict[str, Any]:
+        return {name: getattr(self, name) for name in self._fields}
+
+    def _set_values(self, values: dict[str, Any]) -> None:
+        for name in self._fields:
+            object.__setattr__(self, name, values[name])
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return _restore_record, (self.__model__, self.model_dump())
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise ValidationError.from_exception_data(
+            type(self).__name__, [{'type': 'frozen_instance', 'loc': (name,), 'input': value}]
+        )
+
+    def __delattr__(self, name: str) -> None:
+        raise ValidationError.from_exception_data(
+            type(self).__name__, [{'type': 'frozen_instance', 'loc': (name,), 'input': None}]
+        )
+
+    def __hash__(self) -> int:
+        try:
+            return self._hash
+        except AttributeError:  # 처음 요청될 때만 계산한다.
+            object.__setattr__(self, '_hash', hash((type(self), self._values(self))))
+            return self._hash
+
+    def __eq__(self, other: Any) -> bool:
+        if self is other:
+            return True
+        if type(other) is not type(self):
+            return NotImplemented
+        return self._values(self) == other._values(other)
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in self._fields)
+        return f'{type(self).__name__}({fields})'
+
+
+def _restore_record(model: type[BaseModel], values: dict[str, Any]) -> CompactRecord:
+    record = object.__new__(compact_model(model))
+    record._set_values(values)
+    return record
+
+
+_compact_models: dict[type[BaseModel], type[CompactRecord]] = {}
+
+
+def compact_model(model: type[BaseModel]) -> type[CompactRecord]:
+    """frozen 모델과 같은 필드/검증 규칙을 가지는 `__slots__` 기반 레코드 클래스를 만든다.(모델 별로 한 번만 만든다.)"""
+    compact = _compact_models.get(model)
+    if compact is not None:
+        return compact
+    if not model.model_config.get('frozen'):
+        raise TypeError(f'{model.__name__} is not frozen')
+    if model.model_config.get('extra') == 'allow':
+        raise TypeError(f'{model.__name__} allows extra fields, which cannot be stored in slots')
+
+    fields = tuple(model.model_fields)
+    reserved = sorted(set(fields).intersection(dir(CompactRecord)))
+    if reserved:
+        raise TypeError(f'{model.__name__} has fields {reserved} that clash with CompactRecord attributes')
+    compact = type(model.__name__, (CompactRecord,), {
+        '__slots__': fields,
+        '__qualname__': f'compact_model({model.__qualname__})',
+        '__module__': model.__module__,
+        '__model__': model,
+        '_fields': fields,
+        '_validator': _fields_validator(model),
+        '_values': staticmethod(attrgetter(*fields)),
+    })
+    _compact_models[model] = compact
+    return compact
+
+
+def _fields_validator(model: type[BaseModel]) -> SchemaValidator | None:
+    if model.__pydantic_decorators__.model_validators:
+        return None  # model_validator(function-before/after/wrap)로 감싸져 있다.
+    schema = model.__pydantic_core_schema__
+    model_schema = find_model_schema(schema)
+    return SchemaValidator(with_definitions(schema, model_schema['schema']), model_schema.get('config'))
+
+
+class ImmutableModel(BaseModel):
+    a: int
+    b: int
+    model_config = ConfigDict(frozen=True)
+
+
+CompactImmutable = compact_model(ImmutableModel)
+
+m1 = CompactImmutable(a=1, b=2)
+print(m1)  # 출력: ImmutableModel(a=1, b=2)
+print(CompactImmutable(a='1', b=2) == m1)  # 출력: True | 원래 모델과 같은 규칙(lax)으로 검증된다.
+
+try:
+    m1.a = 10
+except ValidationError as ex:
+    print(ex)
+    """
+    1 validation error for ImmutableModel
+    a
+      Instance is frozen [type=frozen_instance, input_value=10, input_type=int]
+        For further information visit https://errors.pydantic.dev/2.7/v/frozen_instance
+    """
+
+try:
+    CompactImmutable(a='one', b=2)
+except ValidationError as ex:
+    print(ex.errors(include_url=False))
+    # 출력: [{'type': 'int_parsing', 'loc': ('a',), 'msg': 'Input should be a valid integer, unable to parse string as an integer', 'input': 'one'}]
+
+d = {m1: "model"}
+print(d[CompactImmutable.model_validate_json('{"a": 1, "b": 2}')])  # 출력: model
+print(m1.to_model(), CompactImmutable.from_model(ImmutableModel(a=1, b=2)) == m1)  # 출력: a=1 b=2 True
+print(hasattr(m1, '__dict__'))  # 출력: False
+print(pickle.loads(pickle.dumps(m1)) == m1)  # 출력: True
+
+
+class Car(BaseModel):
+    model_config = ConfigDict(frozen=True, protected_namespaces=())
+
+    model: str  # 원래 모델은 __model__에 저장하므로, model이라는 필드도 사용할 수 있다.
+    to_model: str
+
+
+try:
+    compact_model(Car)
+except TypeError as ex:
+    print(ex)  # 출력: Car has fields ['to_model'] that clash with CompactRecord attributes
+
+print()
+print("--------------------")
+
+# 벤치마크: ImmutableModel vs compact_model(ImmutableModel)
+# - 메모리: 레코드 N개를 만들었을 때 tracemalloc으로 측정한 증가량 (정수 객체는 미리 만들어 두어 측정에서 제외)
+N = 200_000
+rows = [{'a': i, 'b': i + 1} for i in range(N)]
+
+
+def measure_memory(factory) -> tuple[list, int]:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    records = [factory(**row) for row in rows]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return records, after - before
+
+
+models, model_bytes = measure_memory(ImmutableModel)
+records, record_bytes = measure_memory(CompactImmutable)
+print(f"{N:,} records")
+print(f"{'memory ImmutableModel':<36} {model_bytes / N:8.1f} bytes/record")
+print(f"{'memory compact_model(ImmutableModel)':<36} {record_bytes / N:8.1f} bytes/record")
+
+models_copy = [ImmutableModel(**row) for row in rows]
+records_copy = [CompactImmutable(**row) for row in rows]
+for record in records:
+    hash(record)  # 레코드의 hash는 처음 한 번만 계산되므로, 반복해서 hash 하는 비용을 측정한다.
+NUMBER = 5
+benchmarks = {
+    'create': (lambda: [ImmutableModel(**row) for row in rows], lambda: [CompactImmutable(**row) for row in rows]),
+    'hash (repeated)': (lambda: [hash(m) for m in models], lambda: [hash(r) for r in records]),
+    'eq (equal, not identical)': (
+        lambda: [a == b for a, b in zip(models, models_copy)],
+        lambda: [a == b for a, b in zip(records, records_copy)],
+    ),
+    'dict build + lookup': (
+        lambda: {m: None for m in models}.get(models[-1]),
+        lambda: {r: None for r in records}.get(records[-1]),
+    ),
+}
+print(f"{'':<28} {'ImmutableModel':>16} {'compact':>16}")
+for name, (model_func, record_func) in benchmarks.items():
+    model_seconds = timeit(model_func, number=NUMBER) / NUMBER
+    record_seconds = timeit(record_func, number=NUMBER) / NUMBER
+    print(f"{name:<28} {model_seconds * 1000:13.2f} ms {record_seconds * 1000:13.2f} ms "
+          f"x{model_seconds / record_seconds:.2f}")
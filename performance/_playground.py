@@ -0,0 +1,183 @@
+"""
+플레이그라운드 예제 모듈(basics, Annotated Types, model configuration)의 모델 정의만 불러오는 도우미
+
+예제 모듈들은 파일 이름에 공백과 `.`이 포함되어 있어 import 할 수 없고, 모듈 본문에서 예제를 실행하며 결과를 출력한다.
+- 모듈의 AST에서 import, 함수/클래스 정의, 예제 실행과 관계없는 대입문(타입 별칭, 데이터 등)만 남겨 실행한다.
+- 모델 인스턴스를 만들거나, 모듈에서 정의한 함수를 호출하거나, print 하는 문장은 실행하지 않는다.
+- 같은 이름의 모델이 여러 번 재정의되는 경우(예: Model)에도, 정의된 순서대로 모든 모델 클래스를 수집한다.
+
+performance 예제들이 함께 사용하는 core schema 도우미도 이 모듈에 둔다.
+- find_model_schema(), replace_model_schema(): definitions, definition-ref(재귀 모델), function-*(model_validator)를 따라 model schema를 찾는다.
+- copy_schema(), with_definitions(), input_keys(), init_error(), lenient_list_adapter()
+"""
+import ast
+from pathlib import Path
+from typing import Annotated, Any, NamedTuple, Union
+
+from pydantic import BaseModel, Field, TypeAdapter
+from pydantic_core import PydanticCustomError, core_schema
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PLAYGROUND_MODULES = [
+    'basics/1.Pydantic의 BaseModel 사용하기.py',
+    'basics/2. (De)Serialization.py',
+    'basics/3.TypeCoercion.py',
+    'basics/4.Required vs Optional Fields.py',
+    'basics/5.Nullable Fields.py',
+    'basics/6.JSONSchemaGeneration.py',
+    'Annotated Types/AnnotatedTypes.py',
+    'model configuration/1.ExtraFieldsHandling.py',
+    'model configuration/2.StrictAndLaxTypeCoercion.py',
+    'model configuration/3. ValidatingDefaultValues.py',
+    'model configuration/4. ValidatingAssignments.py',
+    'model configuration/5. Mutablity.py',
+    'model configuration/6.CoercingNumberToString.py',
+    'model configuration/7.StandardzingString.py',
+]
+
+
+class ModelDefinition(NamedTuple):
+    name: str  # 모듈 안에서 재정의된 모델은 `Model (2)` 처럼 순번이 붙는다.
+    lineno: int
+    cls: type[BaseModel]
+
+
+class PlaygroundModule(NamedTuple):
+    path: str
+    namespace: dict[str, Any]
+    models: list[ModelDefinition]
+
+
+def load_definitions(path: str) -> PlaygroundModule:
+    source_path = ROOT / path
+    tree = ast.parse(source_path.read_text(encoding='utf-8'), filename=str(source_path))
+    defined = {node.name for node in tree.body if isinstance(node, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef))}
+
+    namespace: dict[str, Any] = {'__name__': f'playground.{Path(path).stem}', '__file__': str(source_path)}
+    models: list[ModelDefinition] = []
+    seen: dict[str, int] = {}
+    skipped: set[str] = set()  # 실행하지 않은 대입문의 변수 이름
+    for node in tree.body:
+        if not _is_definition(node, defined, skipped):
+            if isinstance(node, (ast.Assign, ast.AnnAssign)):
+                skipped.update(target.id for target in ast.walk(node) if isinstance(target, ast.Name) and isinstance(target.ctx, ast.Store))
+            continue
+        exec(compile(ast.Module(body=[node], type_ignores=[]), str(source_path), 'exec'), namespace)
+        if isinstance(node, ast.ClassDef):
+            cls = namespace[node.name]
+            if isinstance(cls, type) and issubclass(cls, BaseModel):
+                seen[node.name] = seen.get(node.name, 0) + 1
+                name = node.name if seen[node.name] == 1 else f'{node.name} ({seen[node.name]})'
+                models.append(ModelDefinition(name, node.lineno, cls))
+    return PlaygroundModule(path, namespace, models)
+
+
+def load_all() -> list[PlaygroundModule]:
+    return [load_definitions(path) for path in PLAYGROUND_MODULES]
+
+
+def _is_definition(node: ast.stmt, defined: set[str], skipped: set[str]) -> bool:
+    if isinstance(node, (ast.Import, ast.ImportFrom, ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+        return True
+    if isinstance(node, (ast.Assign, ast.AnnAssign)) and node.value is not None:
+        targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+        if not all(isinstance(target, ast.Name) for target in targets):
+            return False  # `m.a = 10` 처럼 인스턴스를 수정하는 문장
+        # 모듈에서 정의한 모델/함수를 호출하거나 print 하는 대입문은 예제 실행이므로 제외한다.
+        # 제외된 변수를 사용하는 대입문(`d = {m1: "model"}`)도 함께 제외한다.
+        for child in ast.walk(node.value):
+            if isinstance(child, ast.Call) and _root_name(child.func) in defined | {'print'}:
+                return False
+            if isinstance(child, ast.Name) and child.id in skipped:
+                return False
+        return True
+    return False
+
+
+def _root_name(node: ast.expr) -> str | None:
+    while isinstance(node, (ast.Attribute, ast.Call, ast.Subscript)):
+        node = node.func if isinstance(node, ast.Call) else node.value
+    return node.id if isinstance(node, ast.Name) else None
+
+
+def find_model_schema(schema: dict[str, Any]) -> dict[str, Any]:
+    """모델의 core schema에서 model schema를 찾는다.
+    - 같은 모델을 여러 필드에서 사용하거나 재귀 모델(`children: list['Tree']`)이면 schema가 definitions로 감싸지고,
+      최상위 schema가 definitions 목록을 가리키는 definition-ref일 수 있다.
+    - model_validator는 model schema를 function-* schema로 감싼다.
+    """
+    definitions = schema['definitions'] if schema['type'] == 'definitions' else []
+    if definitions:
+        schema = schema['schema']
+    while schema['type'] != 'model':
+        schema = _resolve_ref(schema, definitions) if schema['type'] == 'definition-ref' else schema['schema']
+    return schema
+
+
+def replace_model_schema(schema: dict[str, Any], /, **changes: Any) -> dict[str, Any]:
+    """model schema까지의 경로만 복사하여 model schema의 값을 바꾼다.(definitions는 그대로 사용한다.)
+    최상위가 definition-ref라면 참조하는 정의를 복사하여 최상위에 둔다. 원래 정의는 definitions에 그대로 남으므로,
+    재귀적으로 참조하는 중첩 모델은 바꾸지 않은 schema로 검증된다.
+    """
+    if schema['type'] == 'definitions':
+        return {**schema, 'schema': _replace(schema['schema'], schema['definitions'], changes)}
+    return _replace(schema, [], changes)
+
+
+def with_definitions(model_schema: dict[str, Any], schema: dict[str, Any]) -> dict[str, Any]:
+    """모델의 core schema 일부(필드 schema 등)로 검증기를 만들 때, definition-ref를 찾을 수 있도록 definitions로 감싼다."""
+    if model_schema['type'] == 'definitions':
+        return core_schema.definitions_schema(schema, model_schema['definitions'])
+    return schema
+
+
+def _resolve_ref(schema: dict[str, Any], definitions: list[dict[str, Any]]) -> dict[str, Any]:
+    ref = schema['schema_ref']
+    return next(definition for definition in definitions if definition.get('ref') == ref)
+
+
+def _replace(schema: dict[str, Any], definitions: list[dict[str, Any]], changes: dict[str, Any]) -> dict[str, Any]:
+    if schema['type'] == 'definition-ref':
+        # 복사본이 원래 정의와 같은 ref를 다시 정의하지 않도록 ref를 제거한다.
+        schema = {key: value for key, value in _resolve_ref(schema, definitions).items() if key != 'ref'}
+    if schema['type'] == 'model':
+        return {**schema, **changes}
+    return {**schema, 'schema': _replace(schema['schema'], definitions, changes)}
+
+
+def copy_schema(schema: Any) -> Any:
+    # core schema는 dict/list로 이루어져 있으므로, 일부를 수정하기 위해 dict/list만 복사한다.
+    if isinstance(schema, dict):
+        return {key: copy_schema(value) for key, value in schema.items()}
+    if isinstance(schema, list):
+        return [copy_schema(value) for value in schema]
+    return schema
+
+
+def input_keys(name: str, field: dict[str, Any], config: dict[str, Any]) -> set[str]:
+    """model-field schema가 입력 dict에서 읽는 최상위 key(alias, populate_by_name인 경우 필드 이름)"""
+    alias = field.get('validation_alias', name)
+    if isinstance(alias, str):
+        keys = {alias}
+    elif alias and isinstance(alias[0], list):  # AliasChoices: 경로 목록
+        keys = {path[0] for path in alias if isinstance(path[0], str)}
+    else:  # AliasPath: 첫 번째 key
+        keys = {alias[0]}
+    if config.get('populate_by_name'):
+        keys.add(name)
+    return keys
+
+
+def init_error(error: dict[str, Any]) -> dict[str, Any]:
+    # errors()의 항목을 ValidationError.from_exception_data()의 입력으로 변환한다.(메시지는 그대로 유지한다.)
+    return {
+        'type': PydanticCustomError(error['type'], error['msg'].replace('{', '{{').replace('}', '}}')),
+        'loc': error['loc'],
+        'input': error['input'],
+    }
+
+
+def lenient_list_adapter(model: type[BaseModel]) -> TypeAdapter:
+    """원소를 `Model | Any` (left_to_right)로 검증하는 list 검증기: 검증에 실패한 원소는 입력 그대로 남는다."""
+    return TypeAdapter(list[Annotated[Union[model, Any], Field(union_mode='left_to_right')]])